@@ -0,0 +1,145 @@
+"""Measures the memory held by a full dungeon
+
+Generates a dungeon in a fresh process and reports the memory allocated by Python while generating it, the resident
+size of the process and the number of game objects created.
+
+The classes which declare __slots__ are counted per class, split into the instances without a __dict__ and those which
+still have one, such as instances of a subclass that does not declare __slots__. The memory their __dict__s would take
+is estimated by building a dict from the slot values of every slotted instance.
+
+Chunks, and the tiles in them, are only created once the player discovers them, so a fresh dungeon has none. Pass
+--chunks to create every chunk of every floor before measuring.
+
+Usage:
+    python benchmarks/dungeon_memory.py [--floors 100] [--seed 0] [--chunks]
+"""
+# Standard Library
+import argparse
+import gc
+import os
+import random
+import resource
+import sys
+import tracemalloc
+
+# Run from the root of the repository so the data and image folders are found
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# Third Party
+import pygame
+
+# My Modules
+from source.assets import loadAssets
+from source.main import initializePygame
+from source.components import AI, Camera, Inventory
+from source.entities import Entity
+from source.floors import Chunk, Floor, Tile
+from source.projectile import Projectile
+
+# Classes which declare __slots__. Subclasses are counted under their own names
+slotted_classes = (Entity, Tile, Chunk, Projectile, AI, Camera, Inventory)
+
+
+def main():
+    """Generates the dungeon and prints the measurements"""
+    parser = argparse.ArgumentParser(description="Measures the memory held by a generated dungeon")
+    parser.add_argument('--floors', type=int, default=100, help="number of floors to generate (default: 100)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random module (default: 0)")
+    parser.add_argument('--chunks', action='store_true', help="create every chunk of every floor before measuring")
+    arguments = parser.parse_args()
+
+    initializePygame()
+    loadAssets()
+    random.seed(arguments.seed)
+
+    gc.collect()
+    rss_before = getResidentSize()
+    tracemalloc.start()
+
+    dungeon = Floor.generateDungeon(arguments.floors)
+    if arguments.chunks:
+        for floor in dungeon:
+            for x in range(0, floor.width, Chunk.size):
+                for y in range(0, floor.height, Chunk.size):
+                    floor.getChunk(x, y)
+
+    gc.collect()
+    traced, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = getResidentSize()
+
+    cells = sum(floor.width * floor.height for floor in dungeon)
+    chunks = sum(len(floor.chunks) for floor in dungeon)
+    entities = sum(len(floor.entities) for floor in dungeon)
+
+    print("Floors: %d" % len(dungeon))
+    print("tcod map cells: %d" % cells)
+    print("Chunks created: %d (%d tiles)" % (chunks, sum(1 for floor in dungeon for tile in floor.getTiles())))
+    print("Entities on floors: %d" % entities)
+    print("Allocated while generating: %.1f MiB (peak %.1f MiB)" % (traced / 2**20, peak / 2**20))
+    print("Peak resident size growth: %.1f MiB" % ((rss_after - rss_before) / 2**20))
+
+    print()
+    printSlotsReport(countInstances(slotted_classes))
+
+    pygame.quit()
+
+
+def getResidentSize():
+    """Returns the peak resident set size of the process in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes while macOS reports bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def countInstances(classes):
+    """Counts the tracked instances of the given classes, per class
+
+    Returns: dict{string : dict{string : int}} : class name to the number of slotted instances, the number of instances
+        with a __dict__, the bytes of those __dict__s and the estimated bytes of __dict__s for the slotted instances
+    """
+    counts = dict()
+    for obj in gc.get_objects():
+        if not isinstance(obj, classes):
+            continue
+
+        row = counts.setdefault(type(obj).__name__, {'slotted': 0, 'with dict': 0, 'dict bytes': 0, 'avoided bytes': 0})
+        if hasattr(obj, '__dict__'):
+            row['with dict'] += 1
+            row['dict bytes'] += sys.getsizeof(obj.__dict__)
+        else:
+            row['slotted'] += 1
+            row['avoided bytes'] += sys.getsizeof(getSlotValues(obj))
+
+    return counts
+
+
+def getSlotValues(obj):
+    """Returns a dict of the slot values set on the object, as a __dict__ would hold them"""
+    values = dict()
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            if hasattr(obj, name):
+                values[name] = getattr(obj, name)
+    return values
+
+
+def printSlotsReport(counts):
+    """Prints the instances with and without a __dict__ per class"""
+    columns = ('slotted', 'with dict', 'dict KiB', 'avoided KiB')
+    print("%-12s " % "class" + " ".join("%12s" % column for column in columns))
+    for name, row in sorted(counts.items()):
+        print("%-12s %12d %12d %12.1f %12.1f" % (name, row['slotted'], row['with dict'], row['dict bytes'] / 1024,
+                                                 row['avoided bytes'] / 1024))
+    print("%-12s %12d %12d %12.1f %12.1f" % ("all", sum(row['slotted'] for row in counts.values()),
+                                             sum(row['with dict'] for row in counts.values()),
+                                             sum(row['dict bytes'] for row in counts.values()) / 1024,
+                                             sum(row['avoided bytes'] for row in counts.values()) / 1024))
+
+
+if __name__ == '__main__':
+    main()
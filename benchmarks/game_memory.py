@@ -0,0 +1,288 @@
+"""Reports the memory held by a game, per floor, per entity class and per component
+
+Walks every object reachable from a new game created by setupGame, or from a loaded save, and adds each object's size
+to the first part of the game it is found in. Images loaded from the image folders and the character and item
+templates are shared by every floor, so they are reported once on their own. The pixels of surfaces and the data of
+NumPy arrays are included. The native memory of the tcod path finders can not be seen by Python, so it is measured
+from the growth of the resident size while creating extra path finders.
+
+Usage:
+    python benchmarks/game_memory.py [--save FILE] [--seed 0] [--draw] [--tracemalloc] [--top 15] [--output FILE]
+"""
+# Standard Library
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import types
+from collections import defaultdict
+
+# Run from the root of the repository so the data and image folders are found
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# Third Party
+import pygame
+import tcod
+
+# My Modules
+from source.assets import loadAssets, Images
+from source.main import initializePygame, setupGame
+from source.entities import CharacterTemplate, ItemTemplate
+from source.game import Log
+from source.quit import loadSave
+
+# Objects of these types are never counted or walked into
+skipped_types = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                 types.CodeType)
+
+
+class MemoryCounter:
+    """Adds up the size of objects and everything they reference, counting every object once
+
+    Attributes:
+        seen : set(int) : ids of the objects already counted, or marked as belonging elsewhere
+        keep : list : objects that were only marked, kept alive so that their ids are not reused
+    """
+    def __init__(self):
+        self.seen = set()
+        self.keep = []
+
+    def mark(self, *objects):
+        """Marks the objects as counted, so that walks stop at them"""
+        for obj in objects:
+            self.seen.add(id(obj))
+            self.keep.append(obj)
+
+    def count(self, *objects, exclude=()):
+        """Returns the bytes of the objects and of every object they reference which was not counted before
+
+        Parameters:
+            objects : the objects to count
+            exclude : objects the walk stops at without counting them, so they can be counted later
+        """
+        excluded = {id(obj) for obj in exclude}
+        total = 0
+        stack = list(objects)
+        while stack:
+            obj = stack.pop()
+            if id(obj) in self.seen or id(obj) in excluded or isinstance(obj, skipped_types):
+                continue
+            self.seen.add(id(obj))
+            self.keep.append(obj)
+
+            total += getSize(obj)
+            stack.extend(gc.get_referents(obj))
+
+        return total
+
+
+def getSize(obj):
+    """Returns the bytes of an object, including the pixels of a surface. NumPy includes the data it owns"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, pygame.Surface) and obj.get_parent() is None:
+        size += obj.get_width() * obj.get_height() * obj.get_bytesize()
+    return size
+
+
+def getResidentSize():
+    """Returns the current resident set size of the process in bytes, or None if it can not be read"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measurePathFinder(floor, count=1000):
+    """Returns the native bytes held by one path finder after finding a path, measured by creating many, or None if it
+    can not be measured. Enough are created that freed memory the process already holds can not hide them
+    """
+    up, down = floor.portals['up'], floor.portals['down']
+    gc.collect()
+    before = getResidentSize()
+    path_finders = [tcod.path.AStar(floor.map, diagonal=1.01) for i in range(count)]
+    for path_finder in path_finders:
+        path_finder.get_path(up.x, up.y, down.x, down.y)
+    after = getResidentSize()
+    del path_finders
+    if before is None or after is None:
+        return None
+    return max(0, after - before) // count
+
+
+def main():
+    """Creates or loads the game and prints where its memory goes"""
+    parser = argparse.ArgumentParser(description="Reports the memory held by a game")
+    parser.add_argument('--save', metavar='FILE', help="load this save instead of creating a new game")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random module (default: 0)")
+    parser.add_argument('--draw', action='store_true',
+                        help="draw every floor once first, so the surfaces built while playing are included")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="also report the lines which allocated the most memory while creating the game")
+    parser.add_argument('--top', type=int, default=15, help="lines shown in the tracemalloc report (default: 15)")
+    parser.add_argument('--output', metavar='FILE', help="store the report as JSON")
+    arguments = parser.parse_args()
+
+    window, fps_clock = initializePygame()
+    loadAssets()
+    random.seed(arguments.seed)
+
+    if arguments.tracemalloc:
+        tracemalloc.start()
+
+    if arguments.save:
+        game = loadSave(arguments.save)
+        Log.instance = game.log
+    else:
+        game = setupGame(window, fps_clock, "Memory", "Officer")
+
+    if arguments.tracemalloc:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    if arguments.draw:
+        for floor in game.dungeon:
+            floor.draw(game.surface, game.player.camera)
+            floor.getMinimap()
+
+    report = countGame(game)
+    report['path_finder_native_bytes'] = measurePathFinder(game.dungeon[0])
+    printReport(report)
+
+    if arguments.tracemalloc:
+        report['tracemalloc'] = printAllocations(snapshot, arguments.top)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    pygame.quit()
+
+
+def countGame(game):
+    """Returns a dict of the bytes held by each part of the game"""
+    counter = MemoryCounter()
+
+    # Shared assets are counted first, so they are not added to the first floor which uses them
+    shared = {'images': counter.count(Images.images, Images.atlas, Images.missing_image),
+              'templates': counter.count(CharacterTemplate.templates, ItemTemplate.templates)}
+
+    # Walks from an entity stop at its floor and at the game, so each part only counts what it holds
+    counter.mark(game, *game.dungeon)
+
+    entity_classes = defaultdict(lambda: {'count': 0, 'bytes': 0})
+    components = defaultdict(lambda: {'count': 0, 'bytes': 0})
+
+    def countEntity(entity, owner=None):
+        """Counts the entity's components, then the entity, and returns the total. Components are counted without
+        the entity that owns them, and carried items without the entity carrying them
+        """
+        total = 0
+        for component in (entity.ai, entity.inventory, getattr(entity, 'camera', None)):
+            if component is None:
+                continue
+            # Carried items are entities of their own
+            if component is entity.inventory:
+                for item in entity.inventory.contents:
+                    total += countEntity(item, owner=entity)
+            size = counter.count(component, exclude=(entity,))
+            components[type(component).__name__]['count'] += 1
+            components[type(component).__name__]['bytes'] += size
+            total += size
+
+        size = counter.count(entity, exclude=(owner, owner.inventory) if owner is not None else ())
+        entity_classes[type(entity).__name__]['count'] += 1
+        entity_classes[type(entity).__name__]['bytes'] += size
+        return total + size
+
+    floors = []
+    for floor in game.dungeon:
+        # Surfaces are counted before the chunks holding them
+        surfaces = [surface for chunk in floor.chunks.values() for surface in (chunk.background, chunk.fog)
+                    if surface is not None]
+        surfaces_size = counter.count(floor.minimap, *surfaces)
+        parts = {'number': floor.number,
+                 'tcod map': counter.count(floor.map),
+                 'path finder': counter.count(floor.path_finder),
+                 'chunks': counter.count(floor.chunks),
+                 'entities': sum(countEntity(entity) for entity in floor.entities),
+                 'surfaces': surfaces_size}
+        parts['other'] = counter.count(*gc.get_referents(floor)) + sys.getsizeof(floor)
+        parts['total'] = sum(size for name, size in parts.items() if name != 'number')
+        floors.append(parts)
+
+    game_parts = {'log': counter.count(game.log),
+                  'game surface': counter.count(game.surface)}
+    game_parts['other'] = counter.count(*gc.get_referents(game)) + sys.getsizeof(game)
+
+    return {'floors': floors,
+            'entity_classes': dict(entity_classes),
+            'components': dict(components),
+            'game': game_parts,
+            'shared': shared}
+
+
+def printReport(report):
+    """Prints the report as tables"""
+    mib = 2**20
+    floors = report['floors']
+    columns = ('tcod map', 'path finder', 'chunks', 'entities', 'surfaces', 'other', 'total')
+
+    print("Per floor (KiB)")
+    print("%6s " % "floor" + " ".join("%11s" % column for column in columns))
+    for parts in floors:
+        print("%6d " % parts['number'] + " ".join("%11.1f" % (parts[column] / 1024) for column in columns))
+    print("%6s " % "all" + " ".join("%11.1f" % (sum(parts[column] for parts in floors) / 1024)
+                                    for column in columns))
+
+    native = report['path_finder_native_bytes']
+    if native is not None:
+        print("Path finders also hold about %.1f KiB of native memory each, %.1f MiB for all %d floors"
+              % (native / 1024, native * len(floors) / mib, len(floors)))
+
+    for title, table in (("Per entity class", report['entity_classes']), ("Per component", report['components'])):
+        print()
+        print(title)
+        for name, totals in sorted(table.items(), key=lambda item: item[1]['bytes'], reverse=True):
+            print("  %-12s %7d objects %10.1f KiB %8.0f bytes each"
+                  % (name, totals['count'], totals['bytes'] / 1024, totals['bytes'] / totals['count']))
+
+    print()
+    print("Game")
+    for name, size in report['game'].items():
+        print("  %-12s %10.1f KiB" % (name, size / 1024))
+    print("Shared")
+    for name, size in report['shared'].items():
+        print("  %-12s %10.1f KiB" % (name, size / 1024))
+
+    total = sum(parts['total'] for parts in floors) + sum(report['game'].values()) + sum(report['shared'].values())
+    print()
+    print("Total counted: %.1f MiB" % (total / mib))
+
+
+def printAllocations(snapshot, top):
+    """Prints the lines and files which allocated the most memory while the game was created
+
+    Returns: dict : the printed statistics
+    """
+    statistics = {}
+    for key_type, title in (('lineno', "line"), ('filename', "file")):
+        print()
+        print("Allocated while creating the game, by %s" % title)
+        statistics[key_type] = []
+        for statistic in snapshot.statistics(key_type)[:top]:
+            print("  %10.1f KiB %8d blocks  %s" % (statistic.size / 1024, statistic.count, statistic.traceback[0]))
+            statistics[key_type].append({'location': str(statistic.traceback[0]), 'bytes': statistic.size,
+                                         'blocks': statistic.count})
+    return statistics
+
+
+if __name__ == '__main__':
+    main()
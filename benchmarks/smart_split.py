@@ -0,0 +1,91 @@
+"""Compares smartSplit with the wrapping function it replaced on long combat messages
+
+The memoized function is timed both on repeated messages, as in the log pane, and without its cache, which measures
+the wrapping itself.
+
+Usage:
+    python benchmarks/smart_split.py [--length 40] [--repeat 5]
+"""
+# Standard Library
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# Run from the root of the repository
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, root)
+
+# My Modules
+from source.utilities import smartSplit
+
+
+def previousSmartSplit(string, max_length):
+    """The wrapping function before smartSplit was rewritten, kept for comparison"""
+    split_chars = (".", ",", " ", ";")
+
+    strings = [string]
+
+    for i, string in enumerate(strings):
+        if len(string) > max_length:
+            found_split = False
+            index = max_length
+            while not found_split:
+                if string[index] in split_chars:
+                    strings.remove(string)
+                    strings.insert(i, string[index+1:])
+                    strings.insert(i, string[:index+1])
+                    found_split = True
+                else:
+                    index -= 1
+                    if index < 0:
+                        break
+
+    return strings
+
+
+def getCombatMessages(count, hits_per_message):
+    """Returns messages like those written to the log during a long fight"""
+    random.seed(0)
+    names = ("Blob", "Phorpian", "Gladiator", "Sentinel")
+    verbs = ("hits", "slashes", "shoots", "bludgeons")
+    messages = []
+    for i in range(count):
+        hits = ["The %s %s you for %.1f damage" % (random.choice(names), random.choice(verbs), random.uniform(1, 9))
+                for hit in range(hits_per_message)]
+        messages.append(", ".join(hits) + ". Your force field absorbs the rest; you feel weaker")
+    return messages
+
+
+def main():
+    """Times both functions and prints the results"""
+    parser = argparse.ArgumentParser(description="Compares smartSplit with the function it replaced")
+    parser.add_argument('--length', type=int, default=40, help="line length in characters (default: 40)")
+    parser.add_argument('--repeat', type=int, default=5, help="number of timing runs, the best is kept (default: 5)")
+    arguments = parser.parse_args()
+
+    for hits_per_message in (1, 10, 100):
+        messages = getCombatMessages(100, hits_per_message)
+        average_length = sum(len(message) for message in messages) / len(messages)
+
+        def runPrevious():
+            for message in messages:
+                previousSmartSplit(message, arguments.length)
+
+        def runUncached():
+            for message in messages:
+                smartSplit.__wrapped__(message, arguments.length)
+
+        def runCached():
+            for message in messages:
+                smartSplit(message, arguments.length)
+
+        print("Messages of %d characters" % average_length)
+        for name, function in (("previous", runPrevious), ("single pass", runUncached), ("memoized", runCached)):
+            best = min(timeit.repeat(function, number=1, repeat=arguments.repeat))
+            print("  %-12s %10.1f us per message" % (name, best / len(messages) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,379 @@
+"""Benchmark suite for dungeon generation, FOV, pathfinding, AI, rendering and saving
+
+Every benchmark seeds the random module before it sets up, so each revision times the same dungeons and the same
+moves. Rendering runs under SDL's dummy video driver. Timings are reported in milliseconds as the median and
+percentiles of every round, and can be stored as JSON and compared with the results of another revision.
+
+Usage:
+    python benchmarks/suite.py [--rounds N] [--seed N] [--only NAME ...] [--output FILE] [--baseline FILE]
+    python benchmarks/suite.py --compare OLD_FILE NEW_FILE
+"""
+# Standard Library
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+# Run from the root of the repository so the data and image folders are found
+root = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+os.chdir(root)
+sys.path.insert(0, root)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# Third Party
+import numpy
+import pygame
+
+# My Modules
+from source.assets import loadAssets
+from source.main import initializePygame
+from source.floors import Floor
+from source.entities import Player, Character
+from source.game import Game
+from source.draw import getPanes, drawAllPanes
+from source.quit import saveGame, loadSave
+from source.prefetch import FloorPrefetcher
+
+# Name : (setup function, default number of rounds). Filled in by the benchmark decorator
+benchmarks = dict()
+
+# Percentiles stored for every benchmark, along with the median
+percentiles = (10, 90, 99)
+
+
+def benchmark(rounds):
+    """Registers a benchmark
+
+    The decorated function sets up the benchmark and returns the function that is timed once per round. It may
+    instead return a function which prepares each round without being timed, and the timed function
+
+    Parameters:
+        rounds : int : default number of times the returned function is timed
+    """
+    def register(setup):
+        benchmarks[setup.__name__] = (setup, rounds)
+        return setup
+    return register
+
+
+def main():
+    """Runs the benchmarks, or compares two result files"""
+    parser = argparse.ArgumentParser(description="Times the expensive parts of the game")
+    parser.add_argument('--rounds', type=int, default=None, help="rounds for every benchmark instead of the defaults")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random module (default: 0)")
+    parser.add_argument('--only', nargs='+', choices=sorted(benchmarks), metavar='NAME',
+                        help="benchmarks to run: %s" % ", ".join(sorted(benchmarks)))
+    parser.add_argument('--output', metavar='FILE', help="store the results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="compare the results with an earlier results file")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD_FILE', 'NEW_FILE'),
+                        help="compare two results files without running anything")
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        printComparison(readResults(arguments.compare[0]), readResults(arguments.compare[1]))
+        return
+
+    window, fps_clock = initializePygame()
+    loadAssets()
+
+    results = {'revision': getRevision(),
+               'python': platform.python_version(),
+               'platform': platform.platform(),
+               'seed': arguments.seed,
+               'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+               'benchmarks': dict()}
+
+    for name in arguments.only or benchmarks:
+        setup, rounds = benchmarks[name]
+        timings = runBenchmark(setup, window, arguments.seed, arguments.rounds or rounds)
+        results['benchmarks'][name] = summarize(timings)
+        printSummary(name, results['benchmarks'][name])
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if arguments.baseline:
+        print()
+        printComparison(readResults(arguments.baseline), results)
+
+    pygame.quit()
+
+
+def runBenchmark(setup, window, seed, rounds):
+    """Seeds the random module, sets up the benchmark and times each round
+
+    Returns: List[float] : duration of each round in milliseconds
+    """
+    random.seed(seed)
+    run = setup(window)
+    prepare = None
+    if isinstance(run, tuple):
+        prepare, run = run
+
+    timings = []
+    for i in range(rounds):
+        if prepare is not None:
+            prepare()
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def summarize(timings):
+    """Returns a dict of the statistics of the timings"""
+    summary = {'rounds': len(timings),
+               'median': float(numpy.median(timings)),
+               'mean': float(numpy.mean(timings)),
+               'min': min(timings),
+               'max': max(timings)}
+    for percentile in percentiles:
+        summary['p%d' % percentile] = float(numpy.percentile(timings, percentile))
+    return summary
+
+
+def printSummary(name, summary):
+    """Prints the statistics of one benchmark on one line"""
+    spread = "  ".join("p%d %9.3f" % (percentile, summary['p%d' % percentile]) for percentile in percentiles)
+    print("%-18s median %9.3f ms  %s  (%d rounds)" % (name, summary['median'], spread, summary['rounds']))
+
+
+def readResults(path):
+    """Returns the results stored in a JSON file"""
+    with open(path) as file:
+        return json.load(file)
+
+
+def printComparison(old, new):
+    """Prints the change in the median of every benchmark found in both results"""
+    print("Comparing %s with %s" % (old.get('revision'), new.get('revision')))
+    for name, summary in new['benchmarks'].items():
+        if name not in old['benchmarks']:
+            continue
+        old_median = old['benchmarks'][name]['median']
+        change = (summary['median'] - old_median) / old_median * 100 if old_median else 0.0
+        print("%-18s %9.3f ms -> %9.3f ms  %+7.1f%%" % (name, old_median, summary['median'], change))
+
+
+def getRevision():
+    """Returns the current git commit, or None if it can not be found"""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip()
+
+
+def createGame(num_of_floors, size=None):
+    """Returns a game with a player standing on the up portal of the first floor. The player can not die
+
+    Parameters:
+        num_of_floors : int
+        size : tuple(int, int) or None : width and height of every floor, or the normal sizes if None
+    """
+    if size is None:
+        dungeon = Floor.generateDungeon(num_of_floors)
+    else:
+        dungeon = [Floor(number, *size) for number in range(1, num_of_floors + 1)]
+    up_portal = dungeon[0].portals['up']
+    player = Player("Benchmark", "Officer", dungeon[0], up_portal.x, up_portal.y)
+    player.life = 10**9
+    return Game(dungeon, player)
+
+
+def getWalkable(floor):
+    """Returns a list of every walkable (x, y) on the floor"""
+    ys, xs = numpy.nonzero(floor.map.walkable)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def teleport(player, x, y):
+    """Moves the player without taking a turn"""
+    player.location.moveEntity(player, x, y)
+    player.camera.update()
+
+
+@benchmark(rounds=50)
+def floor_init(window):
+    """A single floor"""
+    return lambda: Floor(1)
+
+
+@benchmark(rounds=5)
+def generate_dungeon(window):
+    """The 100 floor dungeon created when a new game starts"""
+    return lambda: Floor.generateDungeon(100)
+
+
+@benchmark(rounds=500)
+def fov(window):
+    """calculateFOV and discoverTiles after moving to a new tile"""
+    game = createGame(1)
+    player = game.player
+    positions = getWalkable(player.location)
+    random.shuffle(positions)
+    position = iter(positions * 10)
+
+    def run():
+        teleport(player, *next(position))
+        player.calculateFOV()
+        player.discoverTiles()
+
+    return run
+
+
+@benchmark(rounds=500)
+def pathfinding(window):
+    """A* paths between random walkable tiles"""
+    floor = createGame(1).player.location
+    positions = getWalkable(floor)
+    pairs = iter([(random.choice(positions), random.choice(positions)) for i in range(5000)])
+
+    def run():
+        start, end = next(pairs)
+        floor.path_finder.get_path(start[0], start[1], end[0], end[1])
+
+    return run
+
+
+@benchmark(rounds=100)
+def ai_crowded(window):
+    """One turn of every AI on a floor with 100 extra enemies standing around the player"""
+    game = createGame(1)
+    player = game.player
+    floor = player.location
+
+    positions = [position for position in getWalkable(floor) if position != (player.x, player.y)]
+    positions.sort(key=lambda position: max(abs(position[0] - player.x), abs(position[1] - player.y)))
+    char_ids = ("BLOB_1", "WIERDMUNK", "GEOMEFOX", "AVIBOY")
+    for i, (x, y) in enumerate(positions[:100]):
+        Character(char_ids[i % len(char_ids)], floor, x, y)
+
+    def run():
+        for character in list(floor.characters):
+            if character.ai:
+                character.ai.takeTurn()
+        floor.projectiles.clear()
+        game.log.buffer.clear()
+
+    return run
+
+
+@benchmark(rounds=300)
+def floor_draw(window):
+    """Floor.draw with the camera following the player to new tiles"""
+    game = createGame(1)
+    player = game.player
+    positions = getWalkable(player.location)
+    random.shuffle(positions)
+    position = iter(positions * 10)
+
+    def run():
+        teleport(player, *next(position))
+        player.calculateFOV()
+        player.discoverTiles()
+        player.location.draw(game.surface, player.camera)
+
+    return run
+
+
+@benchmark(rounds=10)
+def large_floor_init(window):
+    """A single 256x256 floor"""
+    return lambda: Floor(1, 256, 256)
+
+
+@benchmark(rounds=300)
+def large_floor_walk(window):
+    """calculateFOV, discoverTiles and drawAllPanes while walking across a 256x256 floor"""
+    game = createGame(1, size=(256, 256))
+    player = game.player
+    floor = player.location
+    panes = getPanes(window.get_rect())
+
+    positions = getWalkable(floor)
+    steps = []
+    while len(steps) < 3000:
+        x, y = steps[-1] if steps else (player.x, player.y)
+        destination = random.choice(positions)
+        steps.extend(floor.path_finder.get_path(x, y, *destination))
+    step = iter(steps)
+
+    def run():
+        teleport(player, *next(step))
+        player.calculateFOV()
+        player.discoverTiles()
+        drawAllPanes(window, game, panes)
+
+    return run
+
+
+def descend(window, game, panes):
+    """Takes the player down the portal of their floor and runs the first turn and frame there, as mainGameScreen does"""
+    player = game.player
+    portal = player.location.portals['down']
+    teleport(player, portal.x, portal.y)
+
+    FloorPrefetcher.beginTransition()
+    player.changeFloors(game.dungeon[player.location.number], "down")
+    game.simulateTurn()
+    game.endTurn()
+    drawAllPanes(window, game, panes)
+
+
+@benchmark(rounds=20)
+def transition_cold(window):
+    """Going down a portal to a floor which was not warmed up"""
+    game = createGame(21)
+    panes = getPanes(window.get_rect())
+    return lambda: descend(window, game, panes)
+
+
+@benchmark(rounds=20)
+def transition_warm(window):
+    """Going down a portal to a floor which FloorPrefetcher warmed up"""
+    game = createGame(21)
+    panes = getPanes(window.get_rect())
+
+    def prepare():
+        """Warms the next floor, as happens while the player walks to the portal"""
+        FloorPrefetcher.start(game.dungeon[game.player.location.number], game.player.fov_radius)
+        FloorPrefetcher.thread.join()
+
+    return prepare, lambda: descend(window, game, panes)
+
+
+@benchmark(rounds=300)
+def draw_all_panes(window):
+    """drawAllPanes with the player standing still"""
+    game = createGame(1)
+    panes = getPanes(window.get_rect())
+    return lambda: drawAllPanes(window, game, panes)
+
+
+@benchmark(rounds=5)
+def save_load(window):
+    """Saving and loading a 100 floor dungeon, as terminateGame and loadSave do"""
+    game = createGame(100)
+    # The run function holds the directory, which is removed with the save in it once the benchmark is done with it
+    folder = tempfile.TemporaryDirectory()
+
+    def run():
+        nonlocal game
+        path = os.path.join(folder.name, 'benchmark.save')
+        saveGame(game, path=path)
+        game = loadSave(path)
+
+    return run
+
+
+if __name__ == '__main__':
+    main()
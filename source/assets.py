@@ -6,15 +6,24 @@ Functions:
 Classes:
     Images : Contains the png files for use throughout the game
     Data : Contains data pulled from json files
+    LevelIndex : Dense mapping of levels onto leveled data
+    LeveledList : Weighted table of ids which can be sampled
+    Fonts : Contains the font presets
+    TextCache : Keeps rendered text surfaces so unchanged text is not rendered again
 """
 # Standard Library
+import json
 import os
+import pickle
 import random
+import threading
+from bisect import bisect
+from collections import OrderedDict
+from itertools import accumulate
 # Third Party
 import pygame
-from pygame.font import Font
 # My Modules
-from source.utilities import loadJson
+from source.utilities import loadJson, hashFiles, FontPresets
 
 
 def loadAssets():
@@ -25,7 +34,14 @@ def loadAssets():
 
 
 class Images:
-    """Contains the png files for use throughout the game"""
+    """Contains the png files for use throughout the game
+
+    Images are loaded the first time they are requested. Small sprites are packed into a single atlas surface and
+    handed out as subsurfaces of it. Rotated images are cached by the angle rounded to rotation_step degrees
+
+    The floor prefetcher draws chunks on a worker thread while the game draws on the main thread, so loading an image
+    is guarded by a lock. Images which are already loaded are returned without taking it
+    """
     # Image Folders
     main_folder = 'images'
     character_images = os.path.join(main_folder, 'characters')
@@ -36,6 +52,9 @@ class Images:
     splatter_images = os.path.join(main_folder, 'splatters')
     proj_images = os.path.join(main_folder, 'projectiles')
     
+    # Held while an image or the atlas is being loaded
+    load_lock = threading.Lock()
+
     # Missing Image
     missing_image_path = os.path.join(main_folder, 'unknown.png')
     missing_image = None
@@ -81,10 +100,10 @@ class Images:
                         'starry': os.path.join(bg_images, 'starry_bg.png')
                     },
                     'Splatters': {
-                        1: os.path.join(splatter_images, 'splatter01.png'),
-                        2: os.path.join(splatter_images, 'splatter02.png'),
-                        3: os.path.join(splatter_images, 'splatter03.png'),
-                        4: os.path.join(splatter_images, 'splatter04.png')
+                        'splatter01': os.path.join(splatter_images, 'splatter01.png'),
+                        'splatter02': os.path.join(splatter_images, 'splatter02.png'),
+                        'splatter03': os.path.join(splatter_images, 'splatter03.png'),
+                        'splatter04': os.path.join(splatter_images, 'splatter04.png')
                     },
                     'Projectiles': {
                         'green_beam': os.path.join(proj_images, 'green_beam.png'),
@@ -101,42 +120,193 @@ class Images:
         images[folder] = dict()
         for image in image_paths[folder]:
             images[folder][image] = None
-    
-    
+
+    # Atlas Settings. Folders of small sprites are packed into one surface the first time one of them is needed
+    atlas_folders = ('Characters', 'Other', 'Tiles', 'Items', 'Splatters', 'Projectiles')
+    atlas_width = 512
+    atlas_cache_folder = 'cache'
+    atlas_cache_image = os.path.join(atlas_cache_folder, 'atlas.png')
+    atlas_cache_layout = os.path.join(atlas_cache_folder, 'atlas.json')
+    use_atlas = True
+    use_atlas_cache = True
+    atlas = None
+
+    # Rotated images by (directory, image, step). 45 is a multiple of the step, so every image shot along one of the 8
+    # grid directions reuses one of the 8 images made when the projectiles are warmed
+    rotation_step = 5
+    rotated_images = dict()
+    grid_angles = range(0, 360, 45)
+
     @classmethod
-    def load(cls):
-        """Loads the images into the class dictionary
-        
+    def load(cls, use_atlas=True, use_atlas_cache=True):
+        """Prepares the images for use. Images are loaded lazily the first time getImage asks for them
+
         Requires pygame to be initialized and video mode to be set
+
+        Parameters:
+            use_atlas : bool : pack the sprite folders into a single surface
+            use_atlas_cache : bool : read and write the packed atlas from the cache folder
         """
-        for folder in cls.image_paths:
-            for image in cls.image_paths[folder]:
-                cls.images[folder][image] = pygame.image.load(cls.image_paths[folder][image]).convert_alpha()
+        cls.use_atlas = use_atlas
+        cls.use_atlas_cache = use_atlas_cache
         cls.missing_image = pygame.image.load(cls.missing_image_path)
-    
+        cls.rotated_images = dict()
+        cls.warmRotations('Projectiles')
+
+    @classmethod
+    def warmRotations(cls, directory):
+        """Rotates every image in the directory to the 8 grid directions, so the rotations are not made during play"""
+        for image in cls.image_paths[directory]:
+            for angle in cls.grid_angles:
+                cls.getRotatedImage(directory, image, angle)
+
+    @classmethod
+    def getRotatedImage(cls, directory, image, angle):
+        """Returns the image rotated counterclockwise by the angle rounded to the nearest rotation step. Each rotation
+        is only made once
+
+        Parameters:
+            directory : string
+            image : string
+            angle : float : degrees counterclockwise, as returned by math.atan2 with the y axis pointing up
+
+        Returns: pygame.Surface
+        """
+        step = round(angle / cls.rotation_step) % (360 // cls.rotation_step)
+        key = (directory, image, step)
+
+        surface = cls.rotated_images.get(key)
+        if surface is None:
+            surface = pygame.transform.rotate(cls.getImage(directory, image), step * cls.rotation_step)
+            cls.rotated_images[key] = surface
+
+        return surface
+
     @classmethod
     def getImage(cls, directory, image):
         """Returns the correct image unless it cannot be found in which case it returns the missing_image surface
-        
+
         Parameters:
             directory : string
             image : string
-        
+
         Returns: pygame.Surface
         """
         try:
-            return cls.images[directory][image]
+            surface = cls.images[directory][image]
         except KeyError:
             return cls.missing_image
-    
+
+        if surface is None:
+            with cls.load_lock:
+                # Another thread may have loaded it while this one waited for the lock
+                surface = cls.images[directory][image]
+                if surface is None:
+                    surface = cls.loadImage(directory, image)
+
+        return surface
+
     @classmethod
-    def getRandomSplatter(cls):
-        """Returns a random image from the splatter directory"""
-        return random.choice(list(cls.images['Splatters'].values()))
+    def loadImage(cls, directory, image):
+        """Loads a single image, or the whole atlas if the directory is packed into it
+
+        Returns: pygame.Surface
+        """
+        if cls.use_atlas and directory in cls.atlas_folders:
+            cls.loadAtlas()
+        else:
+            cls.images[directory][image] = pygame.image.load(cls.image_paths[directory][image]).convert_alpha()
+
+        return cls.images[directory][image]
+
+    @classmethod
+    def loadAtlas(cls):
+        """Loads the atlas from the cache if it is up to date, otherwise packs it from the image files.
+        Then stores a subsurface of the atlas for every image in the atlas folders"""
+        paths = [cls.image_paths[folder][image] for folder in cls.atlas_folders for image in cls.image_paths[folder]]
+        source_hash = hashFiles(paths)
+
+        layout = None
+        if cls.use_atlas_cache:
+            layout = cls.readAtlasCache(source_hash)
+
+        if layout is None:
+            layout = cls.buildAtlas()
+            if cls.use_atlas_cache:
+                cls.writeAtlasCache(source_hash, layout)
+
+        for folder, image, x, y, width, height in layout:
+            cls.images[folder][image] = cls.atlas.subsurface((x, y, width, height))
+
+    @classmethod
+    def buildAtlas(cls):
+        """Packs every image in the atlas folders into rows of the atlas surface
+
+        Returns: List[list] : folder, image, x, y, width and height of every image in the atlas
+        """
+        surfaces = []
+        for folder in cls.atlas_folders:
+            for image in cls.image_paths[folder]:
+                surfaces.append((folder, image, pygame.image.load(cls.image_paths[folder][image])))
+
+        # Place the images left to right, starting a new row when the current one is full
+        layout = []
+        x = y = row_height = 0
+        for folder, image, surface in surfaces:
+            width, height = surface.get_size()
+            if x + width > cls.atlas_width:
+                x = 0
+                y += row_height
+                row_height = 0
+            layout.append([folder, image, x, y, width, height])
+            x += width
+            row_height = max(row_height, height)
+
+        atlas = pygame.Surface((cls.atlas_width, y + row_height), pygame.SRCALPHA)
+        for (folder, image, surface), (_, _, x, y, width, height) in zip(surfaces, layout):
+            atlas.blit(surface, (x, y))
+
+        cls.atlas = atlas.convert_alpha()
+        return layout
+
+    @classmethod
+    def readAtlasCache(cls, source_hash):
+        """Loads the cached atlas if it was built from the current image files under their current names
+
+        Returns: List[list] or None : the layout of the atlas or None if the cache is missing or out of date
+        """
+        names = {(folder, image) for folder in cls.atlas_folders for image in cls.image_paths[folder]}
+        try:
+            cache = loadJson(cls.atlas_cache_layout)
+            if cache['hash'] != source_hash or {(entry[0], entry[1]) for entry in cache['layout']} != names:
+                return None
+            cls.atlas = pygame.image.load(cls.atlas_cache_image).convert_alpha()
+        except (OSError, ValueError, KeyError, IndexError, TypeError, pygame.error):
+            return None
+
+        return cache['layout']
+
+    @classmethod
+    def writeAtlasCache(cls, source_hash, layout):
+        """Saves the atlas and its layout to the cache folder"""
+        if not os.path.exists(cls.atlas_cache_folder):
+            os.makedirs(cls.atlas_cache_folder)
+
+        pygame.image.save(cls.atlas, cls.atlas_cache_image)
+        with open(cls.atlas_cache_layout, 'w') as file:
+            json.dump({'hash': source_hash, 'layout': layout}, file)
+
+    @classmethod
+    def getRandomSplatterId(cls):
+        """Returns the name of a random image from the splatter directory"""
+        return random.choice(list(cls.image_paths['Splatters']))
 
 
 class Data:
-    """Contains data pulled from json files"""
+    """Contains data pulled from json files
+
+    The leveled lists and leveled inventories are compiled into LevelIndex objects when loaded
+    """
     data_folder = 'data'
     
     json_files = {'Characters': os.path.join(data_folder, 'characters.json'),
@@ -148,12 +318,84 @@ class Data:
     for file in json_files:
         data[file] = None
 
+    leveled_lists = dict()
+    inventories = dict()
+
+    # Compiled data is cached keyed on a hash of the json files. Bump the version when the compiled format changes
+    cache_folder = 'cache'
+    cache_file = os.path.join(cache_folder, 'data.pickle')
+    cache_version = 1
+    use_cache = True
+
     @classmethod
     def load(cls):
-        """Loads the data from the json files"""
+        """Loads the compiled data from the cache if the json files have not changed since it was written.
+        Otherwise loads the data from the json files, compiles it and writes the cache"""
+        source_hash = "%d:%s" % (cls.cache_version, hashFiles(cls.json_files.values()))
+
+        if cls.use_cache and cls.readCache(source_hash):
+            return
+
         for file in cls.json_files:
             cls.data[file] = loadJson(cls.json_files[file])
+
+        cls.compile()
+
+        if cls.use_cache:
+            cls.writeCache(source_hash)
+
+    @classmethod
+    def compile(cls):
+        """Builds the leveled list samplers and the leveled inventory indexes from the loaded data"""
+        cls.leveled_lists = {category: LevelIndex(levels, LeveledList)
+                             for category, levels in cls.data['Leveled_Lists'].items()}
+
+        # Player inventories are keyed on background rather than level
+        cls.inventories = {inv_type: LevelIndex(levels)
+                           for inv_type, levels in cls.data['Inventories'].items() if inv_type != 'PLAYER'}
     
+    @classmethod
+    def readCache(cls, source_hash):
+        """Loads the data from the cache if it was written from json files with the given hash
+
+        Returns: bool : whether the cache was loaded
+        """
+        try:
+            with open(cls.cache_file, 'rb') as file:
+                cache = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return False
+
+        # A cache written by another version may hold anything, so it is only used if every field is present
+        if not isinstance(cache, dict) or cache.get('hash') != source_hash:
+            return False
+
+        try:
+            data, leveled_lists, inventories = cache['data'], cache['leveled_lists'], cache['inventories']
+        except KeyError:
+            return False
+
+        cls.data = data
+        cls.leveled_lists = leveled_lists
+        cls.inventories = inventories
+        return True
+
+    @classmethod
+    def writeCache(cls, source_hash):
+        """Writes the loaded and compiled data to the cache"""
+        cache = {'hash': source_hash,
+                 'data': cls.data,
+                 'leveled_lists': cls.leveled_lists,
+                 'inventories': cls.inventories}
+        try:
+            if not os.path.exists(cls.cache_folder):
+                os.makedirs(cls.cache_folder)
+            with open(cls.cache_file, 'wb') as file:
+                pickle.dump(cache, file, pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            # The cache is only an optimisation; the game runs without it
+            pass
+
     @classmethod
     def getCharacter(cls, identifier):
         """Returns the data for a charcter with a given id"""
@@ -166,15 +408,11 @@ class Data:
 
     @classmethod
     def getLeveledList(cls, category, level):
-        """Category is characters or items, level is an int. Returns a dict"""
-        levels = cls.data['Leveled_Lists'][category]
+        """Category is characters or items, level is an int. Returns a LeveledList
 
-        # Try to return the specified level but if not found, return the level present closest without going over
-        while True:
-            try:
-                return levels['LEVEL_'+str(level)]
-            except KeyError:
-                level -= 1
+        If the level is not in the json, the closest level without going over is used
+        """
+        return cls.leveled_lists[category].get(level)
 
     @classmethod
     def getInventory(cls, type, level):
@@ -186,21 +424,90 @@ class Data:
 
         Returns : dict
         """
-        levels = cls.data['Inventories'][type]
-
-        # Try to return the specified level but if not found, return the level present closest without going over
-        while True:
-            try:
-                return levels['LEVEL_'+str(level)]
-            except KeyError:
-                level -= 1
+        return cls.inventories[type].get(level)
 
     @classmethod
     def getPlayerInventory(cls, background):
         return cls.data['Inventories']['PLAYER'][background]
 
 
+class LevelIndex:
+    """Dense mapping of levels 1 to N onto the entries of a leveled json object
+
+    Levels missing from the json map onto the closest level below them. Levels above N map onto level N
+
+    Attributes:
+        entries : list : entries[level-1] is the entry for that level
+    """
+    level_prefix = 'LEVEL_'
+
+    def __init__(self, levels, compile_entry=None):
+        """Init method for LevelIndex
+
+        Parameters:
+            levels : dict{string : object} : keys are in the form LEVEL_<int>
+            compile_entry : callable or None : applied to every entry in the json
+        """
+        entries = dict()
+        for key, entry in levels.items():
+            if compile_entry is not None:
+                entry = compile_entry(entry)
+            entries[int(key[len(self.level_prefix):])] = entry
+
+        if 1 not in entries:
+            raise ValueError("Leveled data requires a %s1 entry" % self.level_prefix)
+
+        self.entries = []
+        for level in range(1, max(entries) + 1):
+            self.entries.append(entries.get(level, self.entries[-1] if self.entries else None))
+
+    def get(self, level):
+        """Returns the entry for the level
+
+        Parameters:
+            level : int : must be at least 1
+        """
+        if level < 1:
+            raise ValueError("Level must be at least 1, not %d" % level)
+
+        return self.entries[min(level, len(self.entries)) - 1]
+
+
+class LeveledList:
+    """Weighted table of ids which is sampled with a bisect on prebuilt cumulative weights
+
+    Attributes:
+        ids : tuple of strings
+        cum_weights : list of numbers : running total of the weights of the ids
+        total : float : sum of all the weights
+    """
+    def __init__(self, weights):
+        """Init method for LeveledList
+
+        Parameters:
+            weights : dict{string : int} : relative chance of each id being chosen
+        """
+        self.ids = tuple(weights)
+        self.cum_weights = list(accumulate(weights.values()))
+        self.total = self.cum_weights[-1] + 0.0
+
+    def sample(self):
+        """Returns a random id chosen according to the weights"""
+        return self.ids[bisect(self.cum_weights, random.random() * self.total)]
+
+    def sampleMany(self, k):
+        """Returns a list of k random ids chosen according to the weights
+
+        Used to draw all of a floor's spawns in one call
+        """
+        cum_weights = self.cum_weights
+        total = self.total
+        ids = self.ids
+        return [ids[bisect(cum_weights, random.random() * total)] for i in range(k)]
+
+
 class Fonts:
+    """Contains the font presets used throughout the game"""
     main_folder = 'fonts'
     
     # Font types
@@ -213,22 +520,96 @@ class Fonts:
              'unispace_ital': os.path.join(unispace_folder, 'unispace it.ttf'),
              'rokkitt': os.path.join(rokkitt_folder, 'Rokkitt-Regular.ttf')}
     
-    presets = dict()
-             
+    # Fonts are created the first time they are looked up. Each spec is (file, size, underline)
+    preset_specs = {'title':        (files['default'],        70,   False),
+                    'main':         (files['unispace'],       28,   False),
+                    'sub_main':     (files['unispace'],       20,   False),
+                    'info_header':  (files['unispace'],       16,   False),
+                    'info':         (files['unispace'],       14,   False),
+                    'info_S':       (files['unispace'],       12,   False),
+                    'message':      (files['rokkitt'],        22,   False),
+                    'log':          (files['rokkitt'],        12,   False),
+                    'inv_title':    (files['unispace_bold'],  16,   False),
+                    'inv_header':   (files['unispace_bold'],  14,   True),
+                    'inv_listing':  (files['unispace'],       12,   False),
+                    'inv_detail':   (files['unispace_ital'],  10,   False)}
+
+    presets = FontPresets(preset_specs)
+
     @classmethod
     def create(cls):
-        cls.presets = {
-                'title':        Font(cls.files['default'], 70),
-                'main':         Font(cls.files['unispace'], 28),
-                'sub_main':     Font(cls.files['unispace'], 20),
-                'info_header':  Font(cls.files['unispace'], 16),
-                'info':         Font(cls.files['unispace'], 14),
-                'info_S':       Font(cls.files['unispace'],12),
-                'message':      Font(cls.files['rokkitt'], 22),
-                'log':          Font(cls.files['rokkitt'], 12),
-                'inv_title':    Font(cls.files['unispace_bold'], 16),
-                'inv_header':   Font(cls.files['unispace_bold'], 14),
-                'inv_listing':  Font(cls.files['unispace'], 12),
-                'inv_detail':   Font(cls.files['unispace_ital'], 10)}
-
-        cls.presets['inv_header'].set_underline(True)
+        """Resets the presets. Each font is created the first time it is used"""
+        cls.presets = FontPresets(cls.preset_specs)
+
+
+class TextCache:
+    """Keeps rendered text surfaces so that text which has not changed is not rendered again on every redraw
+
+    Surfaces are keyed on the font, string and colors. Once the cached surfaces take up more than max_bytes, the least
+    recently used ones are evicted. The surfaces are shared so they must not be drawn on
+
+    Attributes:
+        max_bytes : int : CLASS; memory cap for the pixels of the cached surfaces
+        surfaces : OrderedDict : CLASS; rendered surfaces ordered from least to most recently used
+        bytes_used : int : CLASS; memory used by the pixels of the cached surfaces
+        hits : int : CLASS; number of renders answered from the cache
+        misses : int : CLASS; number of renders which had to be rendered by the font
+    """
+    max_bytes = 4 * 1024 * 1024
+
+    surfaces = OrderedDict()
+    bytes_used = 0
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def render(cls, font, text, color, background=None):
+        """Returns the antialiased text rendered by the font, rendering it only if it is not cached
+
+        Parameters:
+            font : pygame.font.Font
+            text : string
+            color : tuple(int,int,int)
+            background : tuple(int,int,int) or None
+
+        Returns: pygame.Surface
+        """
+        key = (font, text, color, background)
+        try:
+            surface = cls.surfaces[key]
+        except KeyError:
+            cls.misses += 1
+            surface = font.render(text, True, color, background)
+            cls.surfaces[key] = surface
+            cls.bytes_used += cls.getBytes(surface)
+
+            # Evict the least recently used surfaces until under the cap, always keeping the newest
+            while cls.bytes_used > cls.max_bytes and len(cls.surfaces) > 1:
+                old_key, old_surface = cls.surfaces.popitem(last=False)
+                cls.bytes_used -= cls.getBytes(old_surface)
+        else:
+            cls.hits += 1
+            cls.surfaces.move_to_end(key)
+
+        return surface
+
+    @staticmethod
+    def getBytes(surface):
+        """Returns the number of bytes used by the pixels of the surface"""
+        return surface.get_pitch() * surface.get_height()
+
+    @classmethod
+    def getHitRate(cls):
+        """Returns the fraction of renders answered from the cache as a float between 0 and 1"""
+        total = cls.hits + cls.misses
+        if total == 0:
+            return 0.0
+        return cls.hits / total
+
+    @classmethod
+    def clear(cls):
+        """Empties the cache and resets the counters"""
+        cls.surfaces.clear()
+        cls.bytes_used = 0
+        cls.hits = 0
+        cls.misses = 0
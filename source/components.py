@@ -31,6 +31,8 @@ class AI:
         moveNextToEntity(self, target) :
         randomMove(self) : Moves randomly no more than 1 tile
     """
+    __slots__ = ('owner', 'type', 'opponent')
+
     def __init__(self, owner, ai_type):
         self.owner = owner
         assert ai_type in ("basic", "brainless", "ranger", "fencer")
@@ -38,11 +40,8 @@ class AI:
         self.opponent = None
 
     def findPlayer(self):
-        """Searches through the list of entities in the location to find the player"""
-        for entity in self.owner.location.entities:
-            if entity.is_player:
-                return entity
-        return None
+        """Returns the player if they are on the same floor, otherwise None"""
+        return self.owner.location.player
 
     def takeTurn(self):
         """Runs through conditional statements to determine how the AI will act this turn"""
@@ -224,7 +223,11 @@ class Camera:
     Methods:
         update(self) : Updates the center of the camera based on the location of the owner
         getRect(self) : Returns the rectangle representing the camera in pixel dimensions
+        getTileRect(self) : Returns the rectangle representing the camera in tile dimensions
+        getOffset(self) : Returns the pixels added to floor positions to draw them on a camera sized surface
     """
+    __slots__ = ('owner', 'center', 'pixel_width', 'pixel_height', 'pixel_center')
+
     width = 29
     height = 21
 
@@ -263,9 +266,20 @@ class Camera:
         rect.center = self.center
         return rect
 
+    def getOffset(self):
+        """Returns the pixels added to floor positions to draw them on a camera sized surface
+
+        Returns:
+            offset : tuple(int, int)
+        """
+        rect = self.getRect()
+        return (-rect.left, -rect.top)
+
 
 class Inventory:
     ''' Component Class which hold items that a character is carrying'''
+    __slots__ = ('owner', 'contents', 'equipped')
+
     capacity = 10
 
     def __init__(self, owner, inv_type):
@@ -326,8 +340,7 @@ class Inventory:
 
         equipables = []
         for item in self.contents:
-            item_type, num = item.id.rsplit("_")
-            if item_type in equipable_types and item not in self.equipped.values():
+            if item.item_type in equipable_types and item not in self.equipped.values():
                 equipables.append(item)
 
         return equipables
@@ -340,7 +353,7 @@ class Inventory:
                  "batteries":[]}
 
         for item in self.contents:
-            (item_type, num) = item.id.rsplit("_")
+            item_type = item.item_type
             if item_type == "BATTERY":
                 items['batteries'].append(item)
                 continue
@@ -7,13 +7,15 @@ Variables:
     FLOOR_HEIGHT :int
     FLOOR_WIDTH : int
     CELL_SIZE : int
+    MINIMAP_SCALE : int : number of pixels per tile on the minimap
     COLORS : dictionary of 3-item tuples
-    FONTS : dictioanry of pygame.Fonts
+    FONTS : FontPresets : dictionary of pygame.Fonts which are created on first use
     FPS : int
 """
-import pygame
 import os
 
+from source.utilities import FontPresets
+
 WINDOW_WIDTH = 1280
 WINDOW_HEIGHT = 720
 
@@ -22,6 +24,8 @@ FLOOR_HEIGHT = 35
 
 CELL_SIZE = 32
 
+MINIMAP_SCALE = 3
+
 
 #                         R   G   B
 COLORS = {'BLACK':      (  0,  0,  0),
@@ -49,18 +53,17 @@ DRAW_ORDER =    {'CORPSE': 0,
 WEAPONS = {"PISTOL", "RIFLE", "PDW", "CANNON", "KNIFE", "CLUB", "SWORD"}
 REACTORS = {"RECYCLE", "LIGHT", "MEDIUM", "HEAVY", "BRAWLER"}
 
-pygame.font.init()
 FONT_FILES = {'UNISPACE' : os.path.join('fonts', 'unispace_rg.ttf')}
 
-FONTS = {'TITLE':       pygame.font.Font('freesansbold.ttf', 70),
-         'MAIN':        pygame.font.Font('freesansbold.ttf', 28),
-         'SUBMAIN':     pygame.font.Font('freesansbold.ttf', 20),
-         'INFO_HEADER': pygame.font.Font(FONT_FILES['UNISPACE'], 16),
-         'INFO':        pygame.font.Font(FONT_FILES['UNISPACE'], 14),
-         'INFO_S':      pygame.font.Font(FONT_FILES['UNISPACE'], 12),
-         'LOG':         pygame.font.Font('freesansbold.ttf', 12)}
+# Fonts are created the first time they are looked up. Each spec is (file, size, underline)
+FONTS = FontPresets({'TITLE':       ('freesansbold.ttf',      70,   True),
+                     'MAIN':        ('freesansbold.ttf',      28,   False),
+                     'SUBMAIN':     ('freesansbold.ttf',      20,   False),
+                     'INFO_HEADER': (FONT_FILES['UNISPACE'],  16,   False),
+                     'INFO':        (FONT_FILES['UNISPACE'],  14,   False),
+                     'INFO_S':      (FONT_FILES['UNISPACE'],  12,   False),
+                     'LOG':         ('freesansbold.ttf',      12,   False)})
 
-FONTS['TITLE'].set_underline(True)
 FPS = 144
 
 BACKGROUNDS = ("Officer", "Marksman", "Agent", "Pointman", "Gladiator")
\ No newline at end of file
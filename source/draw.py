@@ -7,15 +7,17 @@ Functions:
     drawLogPane(window, log, pane) : Draws the messages in the log pane
     drawGamePane(window, game, pane, target=None, message=None) : Draws on the game surface then blits game surface to the window
     drawFPS(window, fps_clock) : Draws the FPS in the top right of the screen
+    drawPerfOverlay(window) : Draws the frame and turn timings in the top left of the screen
     drawFillBar(window, pane, y_axis, height, fill_percent, fill_color, outline_color=COLORS['WHITE']) : Draws a bar filled to a specified percentage
     drawMessageBox(window, pane, message) : Draw a message box containing a specified message onto the game pane
  """
 
 import pygame
-from source.assets import Fonts, Images
-from source.constants import BACKGROUNDS, COLORS, FONTS, CELL_SIZE, FLOOR_HEIGHT, FLOOR_WIDTH
+from source.assets import Fonts, Images, TextCache
+from source.constants import BACKGROUNDS, COLORS, FONTS, CELL_SIZE, FLOOR_HEIGHT, FLOOR_WIDTH, MINIMAP_SCALE
 from source.formulas import getRangedHitChance, getMeleeHitChance
 from source.utilities import formatFloat, smartSplit
+from source.profiling import FrameProfile
 
 
 
@@ -43,9 +45,9 @@ def drawMainMenu(window, selected_index, choices, gray_out):
 
     for i, choice in enumerate(choices):
         if choice not in gray_out:
-            choice_text = Fonts.presets['main'].render(choice, True, font_color)
+            choice_text = TextCache.render(Fonts.presets['main'], choice, font_color)
         else:
-            choice_text = Fonts.presets['main'].render(choice, True, alt_color)
+            choice_text = TextCache.render(Fonts.presets['main'], choice, alt_color)
         choice_rect = choice_text.get_rect()
         choice_rect.midtop = (window_rect.centerx, choice_top + (i * text_dist))
 
@@ -94,7 +96,7 @@ def drawClassSelect(window, selected_class):
             text_color = COLORS['WHITE']
 
         # Render text for background and get associated rect
-        background_text = main_font.render(background, True, text_color, button_color)
+        background_text = TextCache.render(main_font, background, text_color, button_color)
         background_text_rect = background_text.get_rect()
 
         # Determine horizontal location for rect and create inner and outer
@@ -115,7 +117,8 @@ def drawClassSelect(window, selected_class):
     # The vertical margin for the text
     text_margin = subtext_font.get_linesize()
 
-    choose_prompt = subtext_font.render('Choose Background with arrow keys', True, COLORS['WHITE'], COLORS['BLACK'])
+    choose_prompt = TextCache.render(subtext_font, 'Choose Background with arrow keys', COLORS['WHITE'],
+                                     COLORS['BLACK'])
     choose_rect = choose_prompt.get_rect()
     choose_rect.midtop = (window_rect.centerx, border_rect.bottom + text_margin)
 
@@ -140,7 +143,7 @@ def getPanes(window_rect):
     map_x_margin = 20
 
     # Map scale
-    map_scale = 3
+    map_scale = MINIMAP_SCALE
 
     # Explicit variables for the size of the panes
     bottom_pane_height = window_rect.height / 25
@@ -247,28 +250,28 @@ def drawStatPane(window, player, pane):
     # Dictionary of text surfaces that will be blitted to the screen
     text_surfs = dict()
 
-    text_surfs['name'] = FONTS['INFO'].render(full_name, True, font_color, background_color)
-    text_surfs['floor'] = FONTS['INFO'].render(floor_number, True, font_color, background_color)
-    text_surfs['xp'] = FONTS['INFO'].render(experience, True, font_color, background_color)
-    text_surfs['defense'] = FONTS['INFO'].render(defense, True, font_color, background_color)
-    text_surfs['life'] = FONTS['INFO'].render(life, True, font_color, background_color)
-    text_surfs['energy_key'] = FONTS['INFO'].render("Energy:", True, font_color, background_color)
-    text_surfs['recharge'] = FONTS['INFO'].render(recharge, True, font_color, background_color)
-
-    text_surfs['xp_percent'] = FONTS['INFO_S'].render(xp_percent, True, xp_percent_font_color)
-    text_surfs['energy_value'] = FONTS['INFO_S'].render(energy_value, True, energy_value_font_color)
-
-    text_surfs['ranged'] = FONTS['INFO_HEADER'].render("Ranged", True, font_color, background_color)
-    text_surfs['r_dmg'] = FONTS['INFO'].render(r_dmg, True, font_color, background_color)
-    text_surfs['r_ar'] = FONTS['INFO'].render(r_ar, True, font_color, background_color)
-    text_surfs['r_acc'] = FONTS['INFO'].render(r_acc, True, font_color, background_color)
-    text_surfs['r_rng'] = FONTS['INFO'].render(rng, True, font_color, background_color)
-    text_surfs['r_eps'] = FONTS['INFO'].render(str_eps, True, font_color, background_color)
-
-    text_surfs['melee'] = FONTS['INFO_HEADER'].render("Melee", True, font_color, background_color)
-    text_surfs['m_dmg'] = FONTS['INFO'].render(m_dmg, True, font_color, background_color)
-    text_surfs['m_ar'] = FONTS['INFO'].render(m_ar, True, font_color, background_color)
-    text_surfs['m_acc'] = FONTS['INFO'].render(m_acc, True, font_color, background_color)
+    text_surfs['name'] = TextCache.render(FONTS['INFO'], full_name, font_color, background_color)
+    text_surfs['floor'] = TextCache.render(FONTS['INFO'], floor_number, font_color, background_color)
+    text_surfs['xp'] = TextCache.render(FONTS['INFO'], experience, font_color, background_color)
+    text_surfs['defense'] = TextCache.render(FONTS['INFO'], defense, font_color, background_color)
+    text_surfs['life'] = TextCache.render(FONTS['INFO'], life, font_color, background_color)
+    text_surfs['energy_key'] = TextCache.render(FONTS['INFO'], "Energy:", font_color, background_color)
+    text_surfs['recharge'] = TextCache.render(FONTS['INFO'], recharge, font_color, background_color)
+
+    text_surfs['xp_percent'] = TextCache.render(FONTS['INFO_S'], xp_percent, xp_percent_font_color)
+    text_surfs['energy_value'] = TextCache.render(FONTS['INFO_S'], energy_value, energy_value_font_color)
+
+    text_surfs['ranged'] = TextCache.render(FONTS['INFO_HEADER'], "Ranged", font_color, background_color)
+    text_surfs['r_dmg'] = TextCache.render(FONTS['INFO'], r_dmg, font_color, background_color)
+    text_surfs['r_ar'] = TextCache.render(FONTS['INFO'], r_ar, font_color, background_color)
+    text_surfs['r_acc'] = TextCache.render(FONTS['INFO'], r_acc, font_color, background_color)
+    text_surfs['r_rng'] = TextCache.render(FONTS['INFO'], rng, font_color, background_color)
+    text_surfs['r_eps'] = TextCache.render(FONTS['INFO'], str_eps, font_color, background_color)
+
+    text_surfs['melee'] = TextCache.render(FONTS['INFO_HEADER'], "Melee", font_color, background_color)
+    text_surfs['m_dmg'] = TextCache.render(FONTS['INFO'], m_dmg, font_color, background_color)
+    text_surfs['m_ar'] = TextCache.render(FONTS['INFO'], m_ar, font_color, background_color)
+    text_surfs['m_acc'] = TextCache.render(FONTS['INFO'], m_acc, font_color, background_color)
 
     # Create Dictionary of Rectangle objects for each rect
     text_rects = {surf: text_surfs[surf].get_rect() for surf in text_surfs}
@@ -352,7 +355,8 @@ def drawStatPane(window, player, pane):
 
         # Title text
         # title_top = line_y + CELL_SIZE/2
-        item_text_surfs[slot + '_title'] = FONTS['INFO'].render(slot.capitalize(), True, font_color, background_color)
+        item_text_surfs[slot + '_title'] = TextCache.render(FONTS['INFO'], slot.capitalize(), font_color,
+                                                            background_color)
         item_text_rects[slot + '_title'] = item_text_surfs[slot + '_title'].get_rect()
         item_text_rects[slot + '_title'].midtop = (pane.left + image_interval + (i * 2 * image_interval),
                                                    line_y + line_size)
@@ -362,7 +366,8 @@ def drawStatPane(window, player, pane):
                                          item_text_rects[slot + '_title'].bottom + half_line_size)
 
         # Name text
-        item_text_surfs[slot + '_name'] = FONTS['INFO_S'].render(item_names[slot], True, font_color, background_color)
+        item_text_surfs[slot + '_name'] = TextCache.render(FONTS['INFO_S'], item_names[slot], font_color,
+                                                           background_color)
         item_text_rects[slot + '_name'] = item_text_surfs[slot + '_name'].get_rect()
         item_text_rects[slot + '_name'].midtop = (item_image_rects[slot].centerx,
                                                   item_image_rects[slot].bottom + half_line_size)
@@ -409,7 +414,7 @@ def drawLogPane(window, log, pane):
 
     for line, message in enumerate(messages):
         # Create a surface and rect for each line of messages
-        surf = log_font.render(message, True, COLORS['BLACK'], COLORS['WHITE'])
+        surf = TextCache.render(log_font, message, COLORS['BLACK'], COLORS['WHITE'])
         rect = surf.get_rect()
 
         # Place rect based on line number
@@ -453,10 +458,10 @@ def drawGamePane(window, game, pane, target=None, message=None):
     game_area.center = pane.center
 
     if target:
-        target.drawPath(game.surface)
+        target.drawPath(game.surface, player.camera.getOffset())
 
     # Blit everything on the game surface to the window
-    window.blit(game.surface, game_area, player.camera.getRect())
+    window.blit(game.surface, game_area)
 
     # If there's a message, draw it
     if message:
@@ -468,46 +473,25 @@ def drawAllPanes(window, game, panes, target=None, message=None):
     # Fill in the background of the window with black
     window.fill(COLORS['BLACK'])
 
-    # Draw the side, log and game panes
-    drawGamePane(window, game, panes['main'], target, message)
-    drawStatPane(window, game.player, panes['side'])
-    drawLogPane(window, game.log, panes['log'])
-    drawMapPane(window, game.player, game.player.location, panes['map'])
+    # Draw the side, log and game panes. The time spent on each is recorded for the performance overlay
+    with FrameProfile.section('game pane'):
+        drawGamePane(window, game, panes['main'], target, message)
+    with FrameProfile.section('stat pane'):
+        drawStatPane(window, game.player, panes['side'])
+    with FrameProfile.section('log pane'):
+        drawLogPane(window, game.log, panes['log'])
+    with FrameProfile.section('map pane'):
+        drawMapPane(window, game.player, game.player.location, panes['map'])
     pygame.draw.rect(window, COLORS['DARK GRAY'], panes['bottom'], 0)
 
 
 def drawMapPane(window, player, floor, pane):
     """Draws the translucent map into the map pane"""
-    scale = 3
-    map_surface = pygame.Surface((pane.width, pane.height))
-    map_surface.fill(COLORS['BLACK'])
-
     # Draw Border
     border = (pane.left - 1, pane.top - 1, pane.width + 2, pane.height + 2)
     pygame.draw.rect(window, COLORS['YELLOW'], border, 1)
 
-    for x in range(FLOOR_WIDTH):
-        for y in range(FLOOR_HEIGHT):
-            if x == player.x and y == player.y:
-                pygame.draw.rect(map_surface, COLORS['YELLOW'], (x * scale, y * scale, scale, scale), 0)
-                continue
-
-            if floor.tile_map[x][y].discovered:
-                if x == floor.portals['up'].x and y == floor.portals['up'].y:
-                    pygame.draw.rect(map_surface, COLORS['RED'], (x * scale, y * scale, scale, scale), 0)
-                    continue
-
-                if x == floor.portals['down'].x and y == floor.portals['down'].y:
-                    pygame.draw.rect(map_surface, COLORS['MILD BLUE'], (x * scale, y * scale, scale, scale), 0)
-                    continue
-
-                if floor.map.walkable[y][x]:
-                    pygame.draw.rect(map_surface, COLORS['GRAY'], (x * scale, y * scale, scale, scale), 0)
-                else:
-                    pygame.draw.rect(map_surface, COLORS['WHITE'], (x * scale, y * scale, scale, scale), 0)
-
-    map_surface.set_alpha(160)
-    window.blit(map_surface, pane)
+    window.blit(floor.getMinimap().getFrame(player.x, player.y), pane)
 
 
 def drawFPS(window, fps_clock):
@@ -524,7 +508,7 @@ def drawFPS(window, fps_clock):
     x_margin = 19
     y_margin = 10
 
-    fps_surf = FONTS['SUBMAIN'].render(str(fps), True, COLORS['GRAY'], COLORS['BLACK'])
+    fps_surf = TextCache.render(FONTS['SUBMAIN'], str(fps), COLORS['GRAY'], COLORS['BLACK'])
     fps_rect = fps_surf.get_rect()
     fps_rect.topleft = (window_rect.left + x_margin, window_rect.top + y_margin)
 
@@ -532,6 +516,28 @@ def drawFPS(window, fps_clock):
     window.blit(fps_surf, fps_rect)
 
 
+def drawPerfOverlay(window):
+    """Draws the frame and turn timings in the top left of the screen
+
+    The numbers change every frame, so the lines are rendered directly rather than through the TextCache
+    """
+    font = Fonts.presets['info_S']
+    line_size = font.get_linesize()
+
+    margin = 10
+    padding = 4
+
+    lines = [font.render(line, True, COLORS['WHITE']) for line in FrameProfile.getLines()]
+
+    box = pygame.Rect(margin, margin, max(line.get_width() for line in lines) + padding*2,
+                      line_size*len(lines) + padding*2)
+    pygame.draw.rect(window, COLORS['BLACK'], box, 0)
+    pygame.draw.rect(window, COLORS['GRAY'], box, 1)
+
+    for i, line in enumerate(lines):
+        window.blit(line, (box.left + padding, box.top + padding + i*line_size))
+
+
 def drawFillBar(window, pane, y_axis, height, fill_percent, fill_color, outline_color=COLORS['WHITE']):
     """Draws a bar filled to a specified percentage
     
@@ -590,7 +596,7 @@ def drawMessageBox(window, pane, message):
     line_start = message_box.centery - (line_size/2) * (len(message_lines)-1)
 
     for i, line in enumerate(message_lines):
-        text = font.render(line, True, COLORS['WHITE'], COLORS['BLACK'])
+        text = TextCache.render(font, line, COLORS['WHITE'], COLORS['BLACK'])
         text_rect = text.get_rect()
         text_rect.center = (message_box.centerx, line_start + line_size*i)
         window.blit(text, text_rect)
@@ -628,7 +634,7 @@ def drawInventory(surface, pane, inventory, selected_item):
     title_y_margin = inventory_area.height / 15
 
     # Draw the word "Inventory" at the top of the Inventory area
-    title = header_font.render("Inventory", True, font_color, bg_color)
+    title = TextCache.render(header_font, "Inventory", font_color, bg_color)
     title_rect = title.get_rect()
     title_rect.midtop = (inventory_area.centerx, inventory_area.top + title_y_margin)
     surface.blit(title, title_rect)
@@ -651,7 +657,7 @@ def drawInventory(surface, pane, inventory, selected_item):
 
     for type in item_types:
         # Draw Header
-        header = header_font.render(type.capitalize(), True, font_color, standard_bg_color)
+        header = TextCache.render(header_font, type.capitalize(), font_color, standard_bg_color)
         header_rect = header.get_rect()
         header_rect.topleft = (indent_left, line_top)
         surface.blit(header, header_rect)
@@ -672,7 +678,7 @@ def drawInventory(surface, pane, inventory, selected_item):
                 bg_color = standard_bg_color
 
             # Draw Index
-            index_surf = main_font.render(str(index)[-1] + ".", True, font_color, bg_color)
+            index_surf = TextCache.render(main_font, str(index)[-1] + ".", font_color, bg_color)
             index_rect = index_surf.get_rect()
             index_rect.topleft = (indent_left, line_top)
             surface.blit(index_surf, index_rect)
@@ -726,7 +732,7 @@ def drawItemList(surface, pane, item_list, prompt):
     title_y_margin = header_line_height/2
 
     # Draw the prompt text at the top of the area
-    title = header_font.render(prompt, True, font_color, bg_color)
+    title = TextCache.render(header_font, prompt, font_color, bg_color)
     title_rect = title.get_rect()
     title_rect.midtop = (area.centerx, area.top + title_y_margin)
     surface.blit(title, title_rect)
@@ -740,7 +746,7 @@ def drawItemList(surface, pane, item_list, prompt):
 
     for index, item in enumerate(item_list, 1):
         # Draw Index, str(index)[-1] is the last digit of a number or only digit if 0-9
-        index_surf = main_font.render(str(index)[-1] + ".", True, font_color, bg_color)
+        index_surf = TextCache.render(main_font, str(index)[-1] + ".", font_color, bg_color)
         index_rect = index_surf.get_rect()
         index_rect.topleft = (indent_left, line_top)
         surface.blit(index_surf, index_rect)
@@ -751,7 +757,7 @@ def drawItemList(surface, pane, item_list, prompt):
         # Move Line
         line_top += line_height
 
-    exit_text = small_font.render("Press [ESC] to Exit", True, font_color, bg_color)
+    exit_text = TextCache.render(small_font, "Press [ESC] to Exit", font_color, bg_color)
     exit_rect = exit_text.get_rect()
     exit_rect.midbottom = (area.centerx, area.bottom - border_width)
     surface.blit(exit_text, exit_rect)
@@ -769,7 +775,7 @@ def drawItemListing(surface, item, font, font_color, bg_color, top_left):
     # Space in between left side of image and left side of text
     gap = icon_size * (3 / 2)
 
-    item_name = font.render(item.name, True, font_color, bg_color)
+    item_name = TextCache.render(font, item.name, font_color, bg_color)
     item_name_rect = item_name.get_rect()
     item_name_rect.midleft = (top_left[0] + gap, top_left[1] + icon_size / 2)
     surface.blit(item_name, item_name_rect)
@@ -796,8 +802,7 @@ def drawItemInfo(surface, pane, item):
 
     # Determine height of area description, and stats from item class
     if item.item_class == 'weapon':
-        item_type, num = item.id.rsplit("_")
-        description = "LVL %d %s" % (item.difficulty, item_type.capitalize())
+        description = "LVL %d %s" % (item.difficulty, item.item_type.capitalize())
 
         # Weapon Stats
         if item.is_ranged:
@@ -830,9 +835,8 @@ def drawItemInfo(surface, pane, item):
 
     else:  # item.item_class == 'reactor'
         area_height = pane.height / 3
-        item_type, num = item.id.rsplit("_")
 
-        description = "LVL %d %s %s" % (item.difficulty, item_type.capitalize(), item.item_class.capitalize())
+        description = "LVL %d %s %s" % (item.difficulty, item.item_type.capitalize(), item.item_class.capitalize())
 
         stats.append("Max Charge: %.1f" % item.max_charge)
         stats.append("Recharge Rate: %.1f" % item.recharge_rate)
@@ -864,7 +868,7 @@ def drawItemInfo(surface, pane, item):
     title_y_margin = area.height / 15
 
     # Draw the item name at the top of the Inventory area
-    title = header_font.render(item.name, True, font_color, bg_color)
+    title = TextCache.render(header_font, item.name, font_color, bg_color)
     title_rect = title.get_rect()
     title_rect.midtop = (area.centerx, area.top + title_y_margin)
     surface.blit(title, title_rect)
@@ -875,17 +879,17 @@ def drawItemInfo(surface, pane, item):
     surface.blit(item.image, image_area)
 
     # Render Item Level and class
-    desc_surf = main_font.render(description, True, font_color, bg_color)
+    desc_surf = TextCache.render(main_font, description, font_color, bg_color)
     desc_rect = desc_surf.get_rect()
     desc_rect.midtop = (area.centerx, image_area.bottom + half_line_size)
     surface.blit(desc_surf, desc_rect)
 
     # Create stat surfs and rects
-    stat_surfs = [main_font.render(stat, True, font_color, bg_color) for stat in stats]
+    stat_surfs = [TextCache.render(main_font, stat, font_color, bg_color) for stat in stats]
     stat_rects = [surf.get_rect() for surf in stat_surfs]
 
     # Create actions surfs and rects
-    action_surfs = [action_font.render(action, True, font_color, bg_color) for action in actions]
+    action_surfs = [TextCache.render(action_font, action, font_color, bg_color) for action in actions]
     action_rects = [surf.get_rect() for surf in action_surfs]
 
     # Place Stat Rects
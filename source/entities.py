@@ -13,12 +13,14 @@ Classes:
     Armor(Item)
     Reactor(Item)
     Battery(Item)
+    TemplateAttribute
+    CharacterTemplate
+    ItemTemplate
     
 """
 # Standard Library
 import random
 # Third Party
-import numpy
 import pygame
 # My Modules
 from source import formulas
@@ -30,6 +32,125 @@ from source.assets import Images, Data
 from source.projectile import Projectile
 
 
+class TemplateAttribute:
+    """Descriptor which reads an attribute from the template of the instance it is accessed through
+
+    Raises AttributeError if the template does not have the attribute, just as a missing instance attribute would
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return getattr(instance.template, self.name)
+
+
+class CharacterTemplate:
+    """Static data shared by every character with the same id
+
+    Templates are interned so that each id only has one template. Stats that change during the game, such as level
+    and life, are copied onto the character instead
+
+    Attributes:
+        templates : dict{string : CharacterTemplate} : CLASS; every template created so far
+        id : string
+        innate_ranged : bool : the ranged attributes are only present if this is True
+    """
+    templates = dict()
+
+    def __init__(self, char_id):
+        """Init method for CharacterTemplate. Reads the data for the id from the Data class"""
+        data = Data.getCharacter(char_id)
+
+        self.id = char_id
+        self.name = data['name']
+        self.image_name = data['image']
+        self.melee_verb = data['verb']
+        self.level = data['level']
+        self.xp = data['xp']
+        self.life = data['life']
+        self.base_damage = data['damage']
+        self.base_defense = data['defense']
+        self.base_attack_rate = data['attack_rate']
+        self.innate_ranged = bool(data['innate_ranged'])
+        if self.innate_ranged:
+            self.ranged_verb = data['innate_ranged']['verb']
+            self.ranged_damage = data['innate_ranged']['damage']
+            self.range = data['innate_ranged']['range']
+            self.ranged_attack_rate = data['innate_ranged']['rate']
+            self.projectile = data['innate_ranged']['projectile']
+        self.ai_type = data['ai']
+
+        # Ensure that every character gets an empty inventory instead of no inventory
+        self.inventory_type = data['inventory'] if data['inventory'] is not None else "empty"
+
+    def __reduce__(self):
+        """Saves only the id so that loading a save gets the interned template"""
+        return CharacterTemplate.get, (self.id,)
+
+    @classmethod
+    def get(cls, char_id):
+        """Returns the template for the id, creating it the first time it is asked for"""
+        try:
+            return cls.templates[char_id]
+        except KeyError:
+            template = cls.templates[char_id] = cls(char_id)
+            return template
+
+
+class ItemTemplate:
+    """Static data shared by every item with the same id
+
+    Templates are interned so that each id only has one template. Creating an item binds it to the template
+
+    Attributes:
+        templates : dict{string : ItemTemplate} : CLASS; every template created so far
+        id : string
+        item_type : string : the part of the id before the underscore (e.g. 'PISTOL')
+        item_cls : type : the Item class the id creates
+    """
+    templates = dict()
+
+    def __init__(self, item_id):
+        """Init method for ItemTemplate. Determines the class from the id, then reads the data from the Data class"""
+        self.id = item_id
+
+        # Everything before the underscore is the item type
+        self.item_type = item_id.rsplit("_")[0]
+
+        if self.item_type == "BATTERY":
+            self.item_cls = Battery
+        elif self.item_type == "ARMOR":
+            self.item_cls = Armor
+        elif self.item_type in WEAPONS:
+            self.item_cls = Weapon
+        elif self.item_type in REACTORS:
+            self.item_cls = Reactor
+        else:
+            raise ValueError("%s not recognized as a valid item class" % self.item_type)
+
+        data = Data.getItem(self.item_cls.data_category, item_id)
+
+        self.name = data['name']
+        self.image_name = data['image']
+        self.difficulty = data['difficulty']
+        self.item_cls.readTemplate(self, data)
+
+    def __reduce__(self):
+        """Saves only the id so that loading a save gets the interned template"""
+        return ItemTemplate.get, (self.id,)
+
+    @classmethod
+    def get(cls, item_id):
+        """Returns the template for the id, creating it the first time it is asked for"""
+        try:
+            return cls.templates[item_id]
+        except KeyError:
+            template = cls.templates[item_id] = cls(item_id)
+            return template
+
+
 class Entity:
     """Represents any object that can act and be drawn into the world
     
@@ -66,6 +187,9 @@ class Entity:
             Player(Character)
     """
 
+    __slots__ = ('x', 'y', 'location', 'obstruct', 'discovered', 'last_known_x', 'last_known_y', 'is_player', 'ai',
+                 'inventory', 'image')
+
     # Default image_path value for all entities
     image_dir = None
     image_name = None
@@ -88,12 +212,12 @@ class Entity:
         self.x = x
         self.y = y
         self.location = location
-        self.location.addEntity(self)
-        self.obstruct = obstruct
-
         self.discovered = False
         self.last_known_x = None
         self.last_known_y = None
+        self.location.addEntity(self)
+        self.obstruct = obstruct
+
         if is_player:
             self.is_player = True
         else:
@@ -112,7 +236,7 @@ class Entity:
         self.image = None
         self.setImage()
 
-    def draw(self, surface):
+    def draw(self, surface, offset=(0, 0)):
         """Takes a pygame surface object and blits the object's 'image' to it at the determined x and y coordinates
 
         Requires pygame to be initialized
@@ -120,12 +244,14 @@ class Entity:
         Paramaters:
             surface : pygame.Surface
                 The surface that the image will get written to
+            offset : tuple(int, int)
+                Pixels added to the position, for surfaces which do not start at the top left of the floor
         """
-        surface.blit(self.image, (self.x*CELL_SIZE, self.y*CELL_SIZE))
+        surface.blit(self.image, (self.x*CELL_SIZE + offset[0], self.y*CELL_SIZE + offset[1]))
 
-    def drawAtLastKnown(self, surface):
+    def drawAtLastKnown(self, surface, offset=(0, 0)):
         """Draws the entity at the last known location rather than necessarily the actual location"""
-        surface.blit(self.image, (self.last_known_x*CELL_SIZE, self.last_known_y*CELL_SIZE))
+        surface.blit(self.image, (self.last_known_x*CELL_SIZE + offset[0], self.last_known_y*CELL_SIZE + offset[1]))
 
     def setImage(self):
         """Sets the image. To be used after loading save"""
@@ -134,6 +260,8 @@ class Entity:
 
 class Target(Entity):
     """Represents the player's target when aiming or exploring"""
+    __slots__ = ('origin',)
+
     image_dir = 'Other'
     image_name = 'target'
     draw_order = DRAW_ORDER['TARGET']
@@ -145,8 +273,7 @@ class Target(Entity):
     def move(self, delta_x, delta_y):
         destination = ((self.x+delta_x), (self.y+delta_y))
         if self.validateMove(destination):
-            self.x += delta_x
-            self.y += delta_y
+            self.location.moveEntity(self, *destination)
 
     def remove(self):
         self.location.removeEntity(self)
@@ -165,7 +292,7 @@ class Target(Entity):
         else:
             return False
 
-    def drawPath(self, surface):
+    def drawPath(self, surface, offset=(0, 0)):
         path = self.getPath()
         peak_range = self.origin.getRange()
 
@@ -183,7 +310,7 @@ class Target(Entity):
             surf = pygame.Surface((CELL_SIZE, CELL_SIZE))
             surf.set_alpha(64)
             surf.fill(color)
-            surface.blit(surf, (tile[0]*CELL_SIZE, tile[1]*CELL_SIZE))
+            surface.blit(surf, (tile[0]*CELL_SIZE + offset[0], tile[1]*CELL_SIZE + offset[1]))
     
     def getPath(self):
         if self.location.map.fov[self.y][self.x] and self.location.map.walkable[self.y][self.x]:
@@ -215,12 +342,13 @@ class Target(Entity):
 
     @on_top_of.setter
     def on_top_of(self, entity):
-        self.x = entity.x
-        self.y = entity.y
+        self.location.moveEntity(self, entity.x, entity.y)
 
 
 class Portal(Entity):
     """Entity used to move player between floors"""
+    __slots__ = ('image_name', 'direction')
+
     image_dir = 'Other'
     draw_order = DRAW_ORDER['PORTAL']
 
@@ -252,6 +380,8 @@ class Corpse(Entity):
         inventory : Inventory : INHERITED; the corpse's Inventory component
     """
 
+    __slots__ = ('name',)
+
     image_dir = 'Other'
     image_name = 'headstone'
     draw_order = DRAW_ORDER['CORPSE']
@@ -272,6 +402,8 @@ class Chest(Entity):
     """Entity which holds an item
 
     Child of Entity"""
+    __slots__ = ('image_name', 'item')
+
     image_dir = "Other"
     draw_order = DRAW_ORDER['CHEST']
     name = "chest"
@@ -328,6 +460,7 @@ class Character(Entity):
         base_damage : int : amount of melee damage done with no weapon
         base_defense : int : amount of defense with no armor
         base_attack_rate : int : amount of melee attacks that can be performed
+        template : CharacterTemplate : static stats shared by every character with the same id
         is_dead : bool
 
     Methods:
@@ -356,49 +489,40 @@ class Character(Entity):
     Children:
         Player(Character)"""
         
+    __slots__ = ('template', 'name', 'level', 'xp', 'life', 'base_damage', 'base_defense', 'is_dead')
+
     image_dir = 'Characters'
     draw_order = DRAW_ORDER['ENEMY']
 
+    # Static stats read from the template
+    image_name = TemplateAttribute()
+    melee_verb = TemplateAttribute()
+    base_attack_rate = TemplateAttribute()
+    innate_ranged = TemplateAttribute()
+    ranged_verb = TemplateAttribute()
+    ranged_damage = TemplateAttribute()
+    range = TemplateAttribute()
+    ranged_attack_rate = TemplateAttribute()
+    projectile = TemplateAttribute()
+
     def __init__(self, char_id, floor, x, y, is_player=False):
         """Extends the entity init function
         
-        Uses the char_id to pull data, represented as a dict, from the Data class"""
-
-        # Gets the data from the JSON File
-        data = Data.getCharacter(char_id)
-
-        # Copies the info from the data
-        self.name = data['name']
-        self.level = data['level']
-        self.melee_verb = data['verb']
-        self.xp = data['xp']
-        self.life = data['life']
-        self.base_damage = data['damage']
-        self.base_defense = data['defense']
-        self.base_attack_rate = data['attack_rate']
-        self.innate_ranged = bool(data['innate_ranged'])
-        if self.innate_ranged:
-            self.ranged_verb = data['innate_ranged']['verb']
-            self.ranged_damage = data['innate_ranged']['damage']
-            self.range = data['innate_ranged']['range']
-            self.ranged_attack_rate = data['innate_ranged']['rate']
-            self.projectile = data['innate_ranged']['projectile']
-        
-        # Gets the image
-        self.image_name = data['image']
+        Uses the char_id to get the interned template. Stats which can change are copied from it"""
 
-        # Gets the ai type
-        ai = data['ai']
+        self.template = CharacterTemplate.get(char_id)
 
-        # Gets the inventory type
-        inventory = data['inventory']
-
-        # Ensure that every character gets an empty inventory instead of no inventory
-        if inventory is None:
-            inventory = "empty"
+        # Copies the stats which can change during the game
+        self.name = self.template.name
+        self.level = self.template.level
+        self.xp = self.template.xp
+        self.life = self.template.life
+        self.base_damage = self.template.base_damage
+        self.base_defense = self.template.base_defense
 
         # Runs the Entity init method
-        super().__init__(floor, x, y, ai=ai, inventory=inventory, obstruct=True, is_player=is_player)
+        super().__init__(floor, x, y, ai=self.template.ai_type, inventory=self.template.inventory_type, obstruct=True,
+                         is_player=is_player)
 
         # Set the character to not dead
         self.is_dead = False
@@ -411,8 +535,7 @@ class Character(Entity):
         if self.validateMove(destination):
             entity_at_dest = self.checkEntityObstruct(destination)
             if entity_at_dest is None:
-                self.x += delta_x
-                self.y += delta_y
+                self.location.moveEntity(self, *destination)
                 return True
             elif not peacefully:
                 self.attack(entity_at_dest)
@@ -525,7 +648,8 @@ class Character(Entity):
         using_energy = bool(is_ranged and self.inventory.equipped['weapon'].is_ranged)
         
         # For every strike in the number of attacks...
-        for strike in range(self.getAttackRate(is_ranged)):
+        strikes = self.getAttackRate(is_ranged)
+        for strike in range(strikes):
             if using_energy and self.energy >= self.getEnergyPerShot():
                 # Reduce current energy
                 self.energy -= self.getEnergyPerShot() - self.getRecoilCharge()
@@ -547,7 +671,8 @@ class Character(Entity):
             if is_ranged:
                 # Create Projectile
                 projectile_id = self.getProjectile()
-                Projectile(projectile_id, self.location, (self.x, self.y), (opponent.x, opponent.y), delay=strike*5)
+                Projectile(projectile_id, self.location, (self.x, self.y), (opponent.x, opponent.y),
+                           delay=Projectile.getVolleyDelay(strike, strikes))
 
             # Send a message if the opponent was killed
             if opponent.is_dead:
@@ -601,7 +726,7 @@ class Character(Entity):
 
             # If injured, log message and reduce life by 1
             if injured:
-                self.location.tile_map[self.x][self.y].addSplatter()
+                self.location.addSplatter(self.x, self.y)
                 Log.addToBuffer(self.name + " was weakened")
                 self.life -= 1
 
@@ -752,13 +877,13 @@ class Character(Entity):
         except AttributeError:
             return self.projectile
 
-    def draw(self, surface):
+    def draw(self, surface, offset=(0, 0)):
         """Extends the entity draw function to draw a forcefield if the character has energy"""
-        super().draw(surface)
+        super().draw(surface, offset)
 
         if self.energy > 0:
             force_field = Images.getImage('Other', 'force_field')
-            surface.blit(force_field, (self.x*CELL_SIZE, self.y*CELL_SIZE))
+            surface.blit(force_field, (self.x*CELL_SIZE + offset[0], self.y*CELL_SIZE + offset[1]))
 
     @property
     def energy(self):
@@ -792,8 +917,12 @@ class Player(Character):
     
     Child of Character
     """
+    __slots__ = ('background', 'camera', 'base_image', 'armored_image')
+
     draw_order = DRAW_ORDER['PLAYER']
-    base_image = None
+
+    # Radius of the player's FOV in tiles
+    fov_radius = 8
 
     xp_ceiling = [0, 10, 25, 45, 70, 100]
 
@@ -846,13 +975,15 @@ class Player(Character):
             portal = "up"
 
         self.location.removeEntity(self)
+        self.location.clearSurfaces()
         self.x = new_floor.portals[portal].x
         self.y = new_floor.portals[portal].y
         self.location = new_floor
         self.location.addEntity(self)
 
     def calculateFOV(self):
-        self.location.map.compute_fov(self.x, self.y, radius=8)
+        """Computes the FOV of the floor from the player. Skipped by the floor if nothing changed since last time"""
+        self.location.computeFOV(self.x, self.y, radius=self.fov_radius)
 
     def getFOV(self):
         """Gets the fov object of the map object of the floor object that the player is on
@@ -866,35 +997,16 @@ class Player(Character):
 
         Returns : int
         """
-        count = 0
-        fov_map = self.getFOV()
-
-        # WHY IS THIS REVERSED!?!?
-        for entity in reversed(self.location.entities):
-            if entity is self:
-                continue
-
-            if not isinstance(entity, Character):
-                continue
-
-            if not entity.discovered:
-                continue
-
-            if fov_map[entity.y][entity.x]:
-                count += 1
-
+        count, nearest = self.location.queryFOV(self.location.characters, self.x, self.y, discovered_only=True)
         return count
 
     def discoverTiles(self):
-        fov = numpy.where(self.getFOV())
-        for i in range(len(fov[0])):
-            self.location.tile_map[(fov[1][i])][(fov[0][i])].discovered = True
+        """Discovers the tiles in the FOV which have not been discovered yet"""
+        self.location.discoverVisible()
     
     def lookAround(self):
         """Returns a string indicating observations about the entities around the player
         
-        Utilizes the draw order of the items to look through them in reverse order
-        
         Message Priority
             Enemy(s) in FOV
             Item(s) at Feet
@@ -906,74 +1018,26 @@ class Player(Character):
         
         Returns : string
         """
-    
-        # Number of enemies seen in the player's fov
-        enemy_count = 0
-        enemy = None
-        
-        items_in_view = 0
-        items_at_feet = 0
-        item_at_feet = None
-        item_in_view = None
-        
-        on_down_portal = False
-        on_up_portal = False
-        
-        see_down_portal = False
-        see_up_portal = False
-        
-        corpses_at_feet = 0
-        corpse = None
-            
+        floor = self.location
         fov_map = self.getFOV()
-        
-        # Reversed because characters have higher draw order
-        for entity in reversed(self.location.entities):
-            if entity is self:
-                continue
-             
-            if fov_map[entity.y][entity.x]:
-                if isinstance(entity, Character):
-                    enemy_count += 1
-                    enemy = entity
-                
-                # After characters are counted, break if there was at least one
-                elif enemy_count > 0:
-                    break
-                
-                elif isinstance(entity, Item):
-                    if entity.x == self.x and entity.y == self.y:
-                        items_at_feet += 1
-                        item_at_feet = entity
-                    
-                    else:
-                        items_in_view += 1
-                        item_in_view = entity
-                
-                # Break if items at feet since it takes priority over Portals
-                elif items_at_feet:
-                    break
-                
-                # Is only broken if directly on Portal, otherwise tracks and keep going to corpses
-                elif isinstance(entity, Portal):
-                    if entity.x == self.x and entity.y == self.y:
-                        if entity.direction == "down":
-                            on_down_portal = True
-                            break
-                        else:
-                            on_up_portal = True
-                            break
-                    else:
-                        if entity.direction == "down":
-                            see_down_portal = True
-                        else:
-                            see_up_portal = True
-
-                elif isinstance(entity, Corpse):
-                    if entity.x == self.x and entity.y == self.y:
-                        corpses_at_feet += 1
-                        corpse = entity
-                        
+
+        # Number of enemies seen in the player's fov and the nearest of them
+        enemy_count, enemy = floor.queryFOV(floor.characters, self.x, self.y)
+
+        items = self.getItemsAtFeet()
+        items_at_feet = len(items)
+        item_at_feet = items[0] if items else None
+        items_in_view, item_in_view = floor.queryFOV(floor.items, self.x, self.y, exclude_origin=True)
+
+        on_down_portal = floor.portals['down'].x == self.x and floor.portals['down'].y == self.y
+        on_up_portal = floor.portals['up'].x == self.x and floor.portals['up'].y == self.y
+        see_down_portal = bool(fov_map[floor.portals['down'].y][floor.portals['down'].x])
+        see_up_portal = bool(fov_map[floor.portals['up'].y][floor.portals['up'].x])
+
+        corpses = [corpse for corpse in floor.corpses if corpse.x == self.x and corpse.y == self.y]
+        corpses_at_feet = len(corpses)
+        corpse = corpses[0] if corpses else None
+
         # After searching, return proper string
         if enemy_count > 1:
             return "I better be careful. There are %d enemies around" % enemy_count
@@ -1024,14 +1088,7 @@ class Player(Character):
 
     def getItemsAtFeet(self):
         """Returns a list of items which match the player's x and y coordinates"""
-        items = list()
-        for entity in self.location.entities:
-            if not entity.draw_order == DRAW_ORDER['ITEM']:
-                continue
-            if entity.x == self.x and entity.y == self.y:
-                items.append(entity)
-
-        return items
+        return [item for item in self.location.items if item.x == self.x and item.y == self.y]
 
     def collectXP(self, enemy):
         """Collects the XP that the enemy has
@@ -1095,19 +1152,23 @@ class Player(Character):
 
     @property
     def image(self):
-        try:
-            if self.inventory.equipped['armor'].image is not Images.missing_image:
-                self.base_image.blit(self.inventory.equipped['armor'].image, (0, 0))
-        except AttributeError:
-            # Player does not have armor equipped
-            pass
+        """The base image with the equipped armor drawn over it. The result is kept until the armor changes"""
+        armor = self.inventory.equipped['armor']
+        if armor is None or armor.image is Images.missing_image or self.base_image is None:
+            return self.base_image
+
+        if self.armored_image is None or self.armored_image[0] is not armor.image:
+            armored_image = self.base_image.copy()
+            armored_image.blit(armor.image, (0, 0))
+            self.armored_image = (armor.image, armored_image)
 
-        return self.base_image
+        return self.armored_image[1]
 
     @image.setter
     def image(self, image):
         """Setting the players image actually sets a base image attribute"""
         self.base_image = image
+        self.armored_image = None
 
 
 class Item(Entity):
@@ -1122,15 +1183,28 @@ class Item(Entity):
         drop(self) : Item is moved from inventory to floor
         pickUp(self) : Item is moved from floor to specified Inventory
     """
+    __slots__ = ('template',)
+
     image_dir = "Items"
     draw_order = DRAW_ORDER['ITEM']
 
-    def __init__(self, item_id, data, location, x, y):
+    # Static stats read from the template
+    id = TemplateAttribute()
+    item_type = TemplateAttribute()
+    name = TemplateAttribute()
+    image_name = TemplateAttribute()
+    difficulty = TemplateAttribute()
 
-        self.id = item_id
-        self.name = data['name']
-        self.image_name = data['image']
-        self.difficulty = data['difficulty']
+    def __init__(self, template, location, x, y):
+        """Init method for Item. Binds the item to its template
+
+        Parameters:
+            template : ItemTemplate
+            location : Floor, Inventory or Chest
+            x : int or None
+            y : int or None
+        """
+        self.template = template
 
         super().__init__(location, x, y)
 
@@ -1162,22 +1236,8 @@ class Item(Entity):
     @staticmethod
     def createItem(item_id, location, x=None, y=None):
         """Creates an item based on the type of ID"""
-        # Everything before the underscore is the item class
-        split_id = item_id.rsplit("_")
-        item_class = split_id[0]
-
-        if item_class == "BATTERY":
-            item = Battery(item_id, location, x, y)
-        elif item_class == "ARMOR":
-            item = Armor(item_id, location, x, y)
-        elif item_class in WEAPONS:
-            item = Weapon(item_id, location, x, y)
-        elif item_class in REACTORS:
-            item = Reactor(item_id, location, x, y)
-        else:
-            raise ValueError("%s not recognized as a valid item class" % item_class)
-
-        return item
+        template = ItemTemplate.get(item_id)
+        return template.item_cls(template, location, x, y)
 
 
 class Weapon(Item):
@@ -1186,25 +1246,38 @@ class Weapon(Item):
     Child of Item, Entity
 
     """
-    def __init__(self, item_id, location, x=None, y=None):
-        self.item_class = 'weapon'
-
-        data = Data.getItem("WEAPONS", item_id)
-
-        self.melee_verb = data['melee_verb']
-        self.melee_damage = data['melee_damage']
-        self.melee_speed = data['melee_speed']
-        self.is_quick_draw = data['quick_draw']
-        self.is_ranged = bool(data['ranged'])
-        if self.is_ranged:
-            self.ranged_verb = data['ranged']['verb']
-            self.ranged_damage = data['ranged']['damage']
-            self.energy_per_shot = data['ranged']['energy']
-            self.fire_rate = data['ranged']['fire_rate']
-            self.range = data['ranged']['range']
-            self.projectile = data['ranged']['projectile']
-
-        super().__init__(item_id, data, location, x, y)
+    __slots__ = ()
+
+    item_class = 'weapon'
+    data_category = "WEAPONS"
+
+    melee_verb = TemplateAttribute()
+    melee_damage = TemplateAttribute()
+    melee_speed = TemplateAttribute()
+    is_quick_draw = TemplateAttribute()
+    is_ranged = TemplateAttribute()
+    ranged_verb = TemplateAttribute()
+    ranged_damage = TemplateAttribute()
+    energy_per_shot = TemplateAttribute()
+    fire_rate = TemplateAttribute()
+    range = TemplateAttribute()
+    projectile = TemplateAttribute()
+
+    @staticmethod
+    def readTemplate(template, data):
+        """Copies the weapon stats from the data onto the template. Ranged stats are only present if ranged"""
+        template.melee_verb = data['melee_verb']
+        template.melee_damage = data['melee_damage']
+        template.melee_speed = data['melee_speed']
+        template.is_quick_draw = data['quick_draw']
+        template.is_ranged = bool(data['ranged'])
+        if template.is_ranged:
+            template.ranged_verb = data['ranged']['verb']
+            template.ranged_damage = data['ranged']['damage']
+            template.energy_per_shot = data['ranged']['energy']
+            template.fire_rate = data['ranged']['fire_rate']
+            template.range = data['ranged']['range']
+            template.projectile = data['ranged']['projectile']
 
     def equip(self):
         self.location.equipped['weapon'] = self
@@ -1220,13 +1293,17 @@ class Armor(Item):
 
 
     """
-    def __init__(self, item_id, location, x=None, y=None):
-        self.item_class = 'armor'
-        data = Data.getItem("ARMOR", item_id)
+    __slots__ = ()
+
+    item_class = 'armor'
+    data_category = "ARMOR"
 
-        self.defense = data['defense']
+    defense = TemplateAttribute()
 
-        super().__init__(item_id, data, location, x, y)
+    @staticmethod
+    def readTemplate(template, data):
+        """Copies the armor stats from the data onto the template"""
+        template.defense = data['defense']
 
     def equip(self):
         self.location.equipped['armor'] = self
@@ -1254,22 +1331,33 @@ class Reactor(Item):
         current_charge : float
     """
 
-    def __init__(self, item_id, location, x=None, y=None):
-        self.item_class = 'reactor'
-        data = Data.getItem("REACTORS", item_id)
+    __slots__ = ('hit_this_turn', 'recovered', 'current_charge')
+
+    item_class = 'reactor'
+    data_category = "REACTORS"
 
-        self.max_charge = data['max_charge']
-        self.recharge_rate = data['recharge_rate']
-        self.recovery_time = data['recovery']
-        self.recoil_charge = data['recoil_charge']
+    max_charge = TemplateAttribute()
+    recharge_rate = TemplateAttribute()
+    recovery_time = TemplateAttribute()
+    recoil_charge = TemplateAttribute()
 
+    def __init__(self, template, location, x=None, y=None):
+        """Extends the Item init method"""
         self.hit_this_turn = False
         self.recovered = 0
 
         # Current Charge Starts at 0
         self.current_charge = 0.0
 
-        super().__init__(item_id, data, location, x, y)
+        super().__init__(template, location, x, y)
+
+    @staticmethod
+    def readTemplate(template, data):
+        """Copies the reactor stats from the data onto the template"""
+        template.max_charge = data['max_charge']
+        template.recharge_rate = data['recharge_rate']
+        template.recovery_time = data['recovery']
+        template.recoil_charge = data['recoil_charge']
 
     def equip(self):
         """Puts the reactor in the equipped reactor slot and reduces the current charge to 0"""
@@ -1332,14 +1420,17 @@ class Battery(Item):
 
     """
 
-    def __init__(self, item_id, location, x=None, y=None):
-        """Extends the Entity init method"""
-        self.item_class = "battery"
+    __slots__ = ()
 
-        data = Data.getItem("BATTERIES", item_id)
-        self.power = data['power']
+    item_class = "battery"
+    data_category = "BATTERIES"
 
-        super().__init__(item_id, data, location, x, y)
+    power = TemplateAttribute()
+
+    @staticmethod
+    def readTemplate(template, data):
+        """Copies the battery stats from the data onto the template"""
+        template.power = data['power']
 
     def use(self):
         """Uses the battery, which increases the amount of charge in the reactor"""
@@ -2,43 +2,97 @@
 
 Classes:
     Floor
+    Chunk
+    SpatialIndex
     Tile
+    Minimap
 """
 # Standard Library
+import math
 import random
 import queue
+from operator import attrgetter
 # Third Party
+import numpy
 import pygame
 import tcod
 # My Modules
 from source.entities import Portal, Item, Character, Chest
-from source.constants import CELL_SIZE, FLOOR_HEIGHT, FLOOR_WIDTH, COLORS
+from source.constants import CELL_SIZE, FLOOR_HEIGHT, FLOOR_WIDTH, COLORS, MINIMAP_SCALE, DRAW_ORDER
 from source.assets import Images, Data
+from source.utilities import getDistanceBetweenEntities
+from source.profiling import FrameProfile
 
 
 class Floor:
     width = FLOOR_WIDTH
     height = FLOOR_HEIGHT
-    
-    def __init__(self, floor_number):
+
+    # Below this many entities a plain loop is faster than the NumPy call overhead in queryFOV
+    vectorize_threshold = 256
+
+    # Discovered tiles out of the FOV are covered with this color and alpha
+    fog_color = COLORS['DARK GRAY'] + (128,)
+
+    # Floors from this number on are generated at the large size. None keeps every floor at the normal size
+    large_floor_start = None
+    large_width = 256
+    large_height = 256
+
+    # Most chunks which keep their background and fog surfaces. The camera never covers more than 9 chunks
+    max_cached_chunks = 16
+
+    def __init__(self, floor_number, width=None, height=None):
         """Init method for the Floor class
 
         Parameters:
             floor_number : int
+            width : int or None : tiles across. Chosen by the floor number if None
+            height : int or None : tiles down. Chosen by the floor number if None
         """
+        if width is None or height is None:
+            width, height = self.getSize(floor_number)
+        self.width = width
+        self.height = height
+
         self.map = tcod.map.Map(self.width, self.height)
-        self.tile_map = [[Tile(self.map, x, y) for y in range(self.height)] for x in range(self.width)]
         self.number = floor_number
 
+        # Tiles, decals and surfaces are kept in chunks, which are only created once one of their tiles is discovered
+        self.chunks = dict()
+        self.cached_chunks = []
+
+        # Row major, like the arrays of the map. Mirrors the discovered attribute of the tiles
+        self.discovered = numpy.zeros((self.height, self.width), dtype=bool)
+
+        # The FOV is only recomputed when the origin, radius or transparency differ from the last computation
+        self.transparency_version = 0
+        self.fov_key = None
+        self.discovered_key = None
+
+        # Entities are kept in one layer per draw order, so drawing the layers in order draws them correctly.
+        # The named buckets are the same lists as the matching layers
+        self.layers = [[] for order in range(len(DRAW_ORDER))]
+        self.corpses = self.layers[DRAW_ORDER['CORPSE']]
+        self.chests = self.layers[DRAW_ORDER['CHEST']]
+        self.items = self.layers[DRAW_ORDER['ITEM']]
+        self.characters = self.layers[DRAW_ORDER['ENEMY']]
+        self.player = None
+
+        # Spatial indexes of each layer, so drawing only visits the entities within the camera. One holds every entity
+        # by its position, the other the discovered entities by the position they were last seen at
+        self.positions = [SpatialIndex(attrgetter('x', 'y')) for order in range(len(DRAW_ORDER))]
+        self.remembered = [SpatialIndex(attrgetter('last_known_x', 'last_known_y')) for order in range(len(DRAW_ORDER))]
+
         # Initialize empty variables
-        self.entities = []
         self.chest = None
-        self.sort_entities = False
         self.projectiles = []
         self.rooms = []
         self.portals = {'up': None, 'down': None}
         self.landing_room = None
-        
+
+        self.minimap = None
+
         # Random Generation of Floor
         self.generateLayout()
         self.updateTiles()
@@ -53,7 +107,15 @@ class Floor:
     def generateLayout(self):
         """Uses Binary Space Partition to generate the layout of the dungeon"""
         bsp = tcod.bsp.BSP(0, 0, self.width-1, self.height-1)
-        bsp.split_recursive(depth=5, min_width=3, min_height=3, max_horizontal_ratio=2, max_vertical_ratio=2)
+
+        # Larger floors are split deeper, so their rooms are the same size as on a normal floor
+        area_ratio = self.width * self.height / (FLOOR_WIDTH * FLOOR_HEIGHT)
+        depth = 5 + max(0, round(math.log2(area_ratio)))
+
+        # Seeded from the random module so that seeding it also reproduces the layout
+        seed = tcod.random.Random(tcod.random.MERSENNE_TWISTER, random.getrandbits(31))
+        bsp.split_recursive(depth=depth, min_width=3, min_height=3, max_horizontal_ratio=2, max_vertical_ratio=2,
+                            seed=seed)
         for node in bsp.pre_order():
             if node.children:
                 self.makeHallway(node)
@@ -88,10 +150,8 @@ class Floor:
         width = node.width - 1
         height = node.height - 1
 
-        for a in range(height):
-            for b in range(width):
-                self.map.transparent[y+a][x+b] = True
-                self.map.walkable[y+a][x+b] = True
+        self.map.transparent[y:y+height, x:x+width] = True
+        self.map.walkable[y:y+height, x:x+width] = True
 
         self.rooms.append({"x": x, "y": y, "w": width, "h": height})
 
@@ -126,20 +186,18 @@ class Floor:
         chance_per_room = .5
         leveled_list = Data.getLeveledList("ENEMIES", self.number)
 
-        for room in self.rooms:
-            if room is self.landing_room:
-                continue
-            roll = random.random()
-            if roll < chance_per_room:
-                # Find location in room
-                x = random.randrange(room['x'], room['x']+room['w'])
-                y = random.randrange(room['y'], room['y']+room['h'])
+        # Roll for every room, then pick the enemies for all of the rooms that got one in a single call
+        spawn_rooms = [room for room in self.rooms
+                       if room is not self.landing_room and random.random() < chance_per_room]
+        char_ids = leveled_list.sampleMany(len(spawn_rooms))
 
-                # Get random char_id from leveled list
-                char_id = random.choices(list(leveled_list.keys()), list(leveled_list.values()))[0]
+        for room, char_id in zip(spawn_rooms, char_ids):
+            # Find location in room
+            x = random.randrange(room['x'], room['x']+room['w'])
+            y = random.randrange(room['y'], room['y']+room['h'])
 
-                # Create Character
-                Character(char_id, self, x, y)
+            # Create Character
+            Character(char_id, self, x, y)
 
     # todo make items never be ones in the player's starting inventory
     def generateChest(self):
@@ -165,7 +223,7 @@ class Floor:
                     break
 
         # Gets the item from the leveled_list
-        item_id = random.choices(list(leveled_list.keys()), list(leveled_list.values()))[0]
+        item_id = leveled_list.sample()
 
         # Creates the chest
         self.chest = Chest(self, x, y)
@@ -180,23 +238,84 @@ class Floor:
         # Get leveled list
         leveled_list = Data.getLeveledList("CONSUMABLES", self.number)
 
+        # Gets the items from the leveled_list
+        item_ids = leveled_list.sampleMany(num_of_batteries)
+
         # For each battery in the number of batteries...
-        for i in range(num_of_batteries):
+        for item_id in item_ids:
             room = random.choice(self.rooms)
             x = random.randrange(room['x'], room['x'] + room['w'])
             y = random.randrange(room['y'], room['y'] + room['h'])
 
-            # Gets the item from the leveled_list
-            item_id = random.choices(list(leveled_list.keys()), list(leveled_list.values()))[0]
-
             # Create the item
             Item.createItem(item_id, self, x, y)
         
     def updateTiles(self):
-        """Runs the update method on every tile in the tile_map"""
-        for xtile in range(self.width):
-            for ytile in range(self.height):
-                self.tile_map[xtile][ytile].update(self.map)
+        """Runs the update method on every tile created so far. Chunks update their tiles when they are created"""
+        for tile in self.getTiles():
+            tile.update(self.map)
+
+        # The transparency may have changed, so the FOV needs to be computed again
+        self.transparency_version += 1
+
+    def computeFOV(self, x, y, radius):
+        """Computes the FOV from (x, y) and updates the fog by the tiles which changed visibility
+
+        Nothing is done if the FOV was last computed from the same place with the same radius and transparency
+
+        Returns: bool : whether the FOV was computed again
+        """
+        key = (x, y, radius, self.transparency_version)
+        if key == self.fov_key:
+            return False
+
+        # Only the tiles which the previous or the new FOV can reach may change visibility
+        left, top, right, bottom = self.getFOVBounds(self.fov_key, key)
+        previous = self.map.fov[top:bottom, left:right].copy()
+        self.map.compute_fov(x, y, radius=radius)
+        self.fov_key = key
+
+        if self.cached_chunks:
+            fov = self.map.fov[top:bottom, left:right]
+            discovered = self.discovered[top:bottom, left:right]
+            for fog_y, fog_x in zip(*numpy.nonzero(fov & ~previous)):
+                self.drawFog(left + fog_x, top + fog_y, False)
+            for fog_y, fog_x in zip(*numpy.nonzero(previous & ~fov & discovered)):
+                self.drawFog(left + fog_x, top + fog_y, True)
+
+        return True
+
+    def getFOVBounds(self, *keys):
+        """Returns the area of the floor which the FOVs computed with the given keys can reach
+
+        Parameters:
+            keys : tuple(int, int, int, int) or None : keys of computeFOV. None is an unknown FOV
+
+        Returns: tuple(int, int, int, int) : left, top, right and bottom tiles. Right and bottom are excluded
+        """
+        left, top, right, bottom = self.width, self.height, 0, 0
+        for key in keys:
+            # A radius of 0 is unlimited
+            if key is None or not key[2]:
+                return 0, 0, self.width, self.height
+            x, y, radius = key[:3]
+            left = min(left, x - radius)
+            top = min(top, y - radius)
+            right = max(right, x + radius + 1)
+            bottom = max(bottom, y + radius + 1)
+
+        return max(0, left), max(0, top), min(self.width, right), min(self.height, bottom)
+
+    def discoverVisible(self):
+        """Discovers every tile in the FOV which has not been discovered yet. Skipped if the FOV has not changed"""
+        if self.discovered_key == self.fov_key:
+            return
+        self.discovered_key = self.fov_key
+
+        left, top, right, bottom = self.getFOVBounds(self.fov_key)
+        undiscovered = self.map.fov[top:bottom, left:right] & ~self.discovered[top:bottom, left:right]
+        for y, x in zip(*numpy.nonzero(undiscovered)):
+            self.discoverTile(int(left + x), int(top + y))
 
     def draw(self, surface, camera):
         """Draws all of the tiles, entities, and the finally the fog
@@ -206,65 +325,265 @@ class Floor:
             camera : source.components.Camera 
         """
 
-        area = camera.getTileRect()
-
-        # Draw the tile map
-        for xtile in range(area.left, area.right):
-            # ignore x out of range
-            if xtile >= len(self.tile_map) or xtile < 0: continue
-
-            for ytile in range(area.top, area.bottom):
-                # ignore y out of range
-                if ytile >= len(self.tile_map[xtile]) or ytile < 0: continue
-                self.tile_map[xtile][ytile].draw(surface)
-
-        # Sort entities if needed
-        if self.sort_entities:
-            self.entities.sort(key=lambda entity: entity.draw_order)
-            self.sort_entities = False
-           
-        # Draw the entities in the map
-        for entity in self.entities:
-            if self.map.fov[entity.y][entity.x]:
-                # If the entity is in fov, mark as discovered, update last known coordinates, and draw
-                entity.discovered = True
-                entity.last_known_x = entity.x
-                entity.last_known_y = entity.y
-                entity.draw(surface)
-            elif entity.discovered and not self.map.fov[entity.last_known_y][entity.last_known_x]:
-                # If the entity is not in fov but is discovered, draw at last known coordinates...
-                # unless the last known coordinates are in FOV
-                entity.drawAtLastKnown(surface)
-        
-        # Draw the fog over the area not in the fov
-        for x in range(area.left, area.right):
-            # Ignore x out of range
-            if x >= len(self.tile_map) or x < 0: continue
-            
-            for y in range(area.top, area.bottom):
-                # Ignore y out of range
-                if y >= len(self.tile_map[x] or y < 0): continue
-                
-                # Draw fog if discovered but no longer in fov
-                if self.tile_map[x][y].discovered and not self.map.fov[y][x]:
-                    self.tile_map[x][y].drawFog(surface)
+        FrameProfile.count('entities', sum(len(layer) for layer in self.layers))
+        FrameProfile.count('projectiles', len(self.projectiles))
+
+        # The surface is the size of the camera, so everything is drawn offset by the camera's top left corner
+        offset = camera.getOffset()
+        tile_area = camera.getTileRect()
+        fov = self.map.fov
+
+        # Only the discovered chunks within the camera are drawn. Their surfaces are kept for the next frames
+        chunks = list(self.getChunksIn(tile_area))
+        self.keepSurfaces(chunks)
+
+        # Draw the discovered tiles and decals from the cached backgrounds
+        for chunk in chunks:
+            surface.blit(chunk.getBackground(), (chunk.left*CELL_SIZE + offset[0], chunk.top*CELL_SIZE + offset[1]))
+
+        # Draw the entities within the camera, one layer at a time. The FOV always fits within the camera
+        for positions, remembered in zip(self.positions, self.remembered):
+            for entity in positions.query(tile_area):
+                if fov[entity.y][entity.x]:
+                    # If the entity is in fov, mark as discovered, update last known coordinates, and draw
+                    self.remember(entity)
+                    entity.draw(surface, offset)
+
+            for entity in remembered.query(tile_area):
+                if not fov[entity.y][entity.x] and not fov[entity.last_known_y][entity.last_known_x]:
+                    # If the entity is not in fov but is discovered, draw at last known coordinates...
+                    # unless the last known coordinates are in FOV
+                    entity.drawAtLastKnown(surface, offset)
+
+        # Draw the fog over the discovered area not in the fov
+        for chunk in chunks:
+            surface.blit(chunk.getFog(), (chunk.left*CELL_SIZE + offset[0], chunk.top*CELL_SIZE + offset[1]))
 
         for projectile in self.projectiles:
-            projectile.drawNextStep(surface)
+            projectile.draw(surface, offset)
+
+    def remember(self, entity):
+        """Marks the entity as discovered and remembers its position as the last place it was seen"""
+        remembered = self.remembered[entity.draw_order]
+        if not entity.discovered:
+            entity.discovered = True
+        elif (entity.last_known_x, entity.last_known_y) == (entity.x, entity.y):
+            return
+        elif entity.last_known_x is not None:
+            remembered.remove(entity, entity.last_known_x, entity.last_known_y)
+
+        entity.last_known_x = entity.x
+        entity.last_known_y = entity.y
+        remembered.add(entity)
+
+    def warmUp(self, x, y, radius, area, stop):
+        """Does the work of the first turn and frame on the floor ahead of time. Computes the FOV from (x, y), discovers
+        the tiles in it, then builds the surfaces of the chunks within the area and the minimap
+
+        The results are the same as when the player arrives at (x, y), so warming up does not change the game
+
+        Parameters:
+            x : int : where the player will arrive
+            y : int
+            radius : int : radius of the player's FOV
+            area : pygame.Rect : the tiles the camera will show, centered on (x, y)
+            stop : threading.Event : once set, the remaining surfaces are left to be built when first drawn
+        """
+        self.computeFOV(x, y, radius)
+        self.discoverVisible()
+
+        chunks = list(self.getChunksIn(area))
+        self.keepSurfaces(chunks)
+        for chunk in chunks:
+            if stop.is_set():
+                return
+            chunk.getBackground()
+            chunk.getFog()
+
+        if not stop.is_set():
+            self.getMinimap().getFrame(x, y)
+
+    def getChunk(self, x, y):
+        """Returns the chunk holding the tile at the given location, creating it if needed
+
+        Returns: Chunk
+        """
+        key = (x // Chunk.size, y // Chunk.size)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = Chunk(self, key[0] * Chunk.size, key[1] * Chunk.size)
+
+        return chunk
+
+    def getChunksIn(self, rect):
+        """Yields every discovered chunk which overlaps the rectangle
 
+        Parameters:
+            rect : pygame.Rect : in tiles
+        """
+        size = Chunk.size
+        for chunk_x in range(max(0, rect.left) // size, (min(rect.right, self.width) - 1) // size + 1):
+            for chunk_y in range(max(0, rect.top) // size, (min(rect.bottom, self.height) - 1) // size + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is not None and chunk.discovered:
+                    yield chunk
+
+    def getTiles(self):
+        """Yields every tile created so far"""
+        for chunk in self.chunks.values():
+            for column in chunk.tiles:
+                yield from column
+
+    def keepSurfaces(self, chunks):
+        """Marks the chunks as the latest drawn and frees the surfaces of the chunks drawn longest ago
+
+        Parameters:
+            chunks : List[Chunk] : no more than max_cached_chunks
+        """
+        for chunk in chunks:
+            if chunk in self.cached_chunks:
+                self.cached_chunks.remove(chunk)
+            self.cached_chunks.append(chunk)
+
+        while len(self.cached_chunks) > self.max_cached_chunks:
+            self.cached_chunks.pop(0).clearSurfaces()
+
+    def getMinimap(self):
+        """Returns the minimap of the floor, building it if needed
+
+        Returns: Minimap
+        """
+        if self.minimap is None:
+            self.minimap = Minimap(self)
+
+        return self.minimap
+
+    def drawFog(self, x, y, fogged):
+        """Covers or uncovers a tile on the fog of its chunk, if the chunk's fog has been built"""
+        chunk = self.chunks.get((x // Chunk.size, y // Chunk.size))
+        if chunk is not None and chunk.fog is not None:
+            chunk.drawFog(x, y, fogged)
+
+    def clearSurfaces(self):
+        """Frees the background, fog and minimap surfaces. They are rebuilt from the tiles when next needed"""
+        for chunk in self.cached_chunks:
+            chunk.clearSurfaces()
+        self.cached_chunks.clear()
+        self.minimap = None
+
+    def discoverTile(self, x, y):
+        """Marks the tile as discovered and paints it and its decals onto its chunk's background if it exists"""
+        chunk = self.getChunk(x, y)
+        tile = chunk.getTile(x, y)
+        if tile.discovered:
+            return
+
+        tile.discovered = True
+        self.discovered[y, x] = True
+        chunk.discovered = True
+        chunk.dirty = True
+        if chunk.background is not None:
+            chunk.drawTile(tile)
+
+    def addSplatter(self, x, y):
+        """Adds a random blood splatter decal to the tile at the given location"""
+        chunk = self.getChunk(x, y)
+        decal = (x, y, Images.getRandomSplatterId())
+        chunk.decals.append(decal)
+
+        if chunk.background is not None:
+            chunk.drawDecal(decal)
+
+    def queryFOV(self, entities, x, y, discovered_only=False, exclude_origin=False):
+        """Finds which of the entities are in the FOV and which of those is nearest to (x, y)
+
+        Large lists are masked against the FOV in one NumPy operation
+
+        Parameters:
+            entities : List[Entity] : typically one of the buckets, such as characters or items
+            x : int : x of the point to measure distance from, typically the player
+            y : int
+            discovered_only : bool : only count entities which have been discovered
+            exclude_origin : bool : do not count entities standing on (x, y)
+
+        Returns: tuple(int, Entity or None) : the number of entities in the FOV and the nearest of them
+        """
+        if not entities:
+            return 0, None
+
+        if discovered_only:
+            entities = [entity for entity in entities if entity.discovered]
+            if not entities:
+                return 0, None
+
+        if len(entities) < self.vectorize_threshold:
+            fov = self.map.fov
+            visible = [entity for entity in entities
+                       if fov[entity.y, entity.x] and not (exclude_origin and entity.x == x and entity.y == y)]
+            if not visible:
+                return 0, None
+            nearest = min(visible, key=lambda entity: getDistanceBetweenEntities((entity.x, entity.y), (x, y)))
+            return len(visible), nearest
+
+        # Gather the positions as indices into the flattened FOV
+        indices = numpy.fromiter([entity.y * self.width + entity.x for entity in entities], numpy.intp, len(entities))
+        visible = self.map.fov.ravel()[indices]
+
+        ys, xs = numpy.divmod(indices, self.width)
+        if exclude_origin:
+            visible &= (xs != x) | (ys != y)
+
+        visible_count = int(numpy.count_nonzero(visible))
+        if not visible_count:
+            return 0, None
+
+        # Diagonal distance counts as 1, as in getDistanceBetweenEntities
+        distances = numpy.maximum(numpy.abs(xs - x), numpy.abs(ys - y))
+        nearest = int(numpy.argmin(numpy.where(visible, distances, distances.max() + 1)))
+        return visible_count, entities[nearest]
+
+    @property
+    def entities(self):
+        """Every entity on the floor in draw order
+
+        Returns: List[Entity]
+        """
+        return [entity for layer in self.layers for entity in layer]
 
     def addEntity(self, entity):
-        """Adds an entity to the entities list attribute
+        """Adds an entity to the layer for its draw order
 
         Parameters:
             entity : Entity
         """
-        self.entities.append(entity)
-        self.sort_entities = True
-        
+        self.layers[entity.draw_order].append(entity)
+        self.positions[entity.draw_order].add(entity)
+        if entity.discovered and entity.last_known_x is not None:
+            self.remembered[entity.draw_order].add(entity)
+        if entity.draw_order == DRAW_ORDER['PLAYER']:
+            self.player = entity
+
     def removeEntity(self, entity):
-        """Removes an entity from the entities list attribute"""
-        self.entities.remove(entity)
+        """Removes an entity from the layer for its draw order"""
+        self.layers[entity.draw_order].remove(entity)
+        self.positions[entity.draw_order].remove(entity, entity.x, entity.y)
+        if entity.discovered and entity.last_known_x is not None:
+            self.remembered[entity.draw_order].remove(entity, entity.last_known_x, entity.last_known_y)
+        if entity is self.player:
+            self.player = None
+
+    def moveEntity(self, entity, x, y):
+        """Moves an entity on the floor, keeping the spatial index up to date
+
+        Parameters:
+            entity : Entity
+            x : int
+            y : int
+        """
+        self.positions[entity.draw_order].remove(entity, entity.x, entity.y)
+        entity.x = x
+        entity.y = y
+        self.positions[entity.draw_order].add(entity)
     
     def addProjectile(self, projectile):
         """Adds a projectile to the projectiles list"""
@@ -274,6 +593,29 @@ class Floor:
         """Removes the projectile from the projectiles list"""
         self.projectiles.remove(projectile)
 
+    def updateProjectiles(self, seconds):
+        """Moves every projectile by the time passed. Projectiles which have arrived remove themselves
+
+        Parameters:
+            seconds : float : time passed since the last update
+        """
+        for projectile in list(self.projectiles):
+            projectile.update(seconds)
+
+    def clearProjectiles(self):
+        """Removes every projectile, skipping the rest of their animations"""
+        self.projectiles.clear()
+
+    @classmethod
+    def getSize(cls, floor_number):
+        """Returns the width and height in tiles of the floor with the given number
+
+        Returns: tuple(int, int)
+        """
+        if cls.large_floor_start is not None and floor_number >= cls.large_floor_start:
+            return cls.large_width, cls.large_height
+        return FLOOR_WIDTH, FLOOR_HEIGHT
+
     @staticmethod
     def generateDungeon(num_of_floors):
         """Returns a list of a specified number of floors
@@ -304,7 +646,182 @@ class Floor:
                 print("Finished floor %d" % number)
 
 
+class Chunk:
+    """A square of tiles of a floor. Created once one of its tiles is discovered or splattered
+
+    The tiles, decals and surfaces of a floor are kept per chunk, so the memory and time they take grow with the
+    explored and visible parts of the floor rather than with its size
+
+    Attributes:
+        size : int : CLASS; width and height of a chunk in tiles
+        floor : Floor
+        left : int : x of the chunk's top left tile
+        top : int : y of the chunk's top left tile
+        width : int : tiles across, fewer than size at the right edge of the floor
+        height : int : tiles down, fewer than size at the bottom edge of the floor
+        tiles : List[List[Tile]] : indexed [x][y] from the chunk's top left tile
+        decals : List[tuple(int, int, string)] : blood splatters as (x, y, splatter image name) records
+        discovered : bool : whether any of the tiles has been discovered
+        dirty : bool : whether tiles were discovered since the chunk was last drawn on the minimap
+        background : pygame.Surface or None : the discovered tiles and their decals. Built when first drawn
+        fog : pygame.Surface or None : covers the discovered tiles which are not in the FOV. Built when first drawn
+    """
+    __slots__ = ('floor', 'left', 'top', 'width', 'height', 'tiles', 'decals', 'discovered', 'dirty', 'background',
+                 'fog')
+
+    size = 16
+
+    def __init__(self, floor, left, top):
+        """Init method for Chunk. Creates the tiles
+
+        Parameters:
+            floor : Floor
+            left : int : x of the top left tile, a multiple of size
+            top : int : y of the top left tile, a multiple of size
+        """
+        self.floor = floor
+        self.left = left
+        self.top = top
+        self.width = min(self.size, floor.width - left)
+        self.height = min(self.size, floor.height - top)
+
+        self.tiles = [[Tile(floor.map, x, y) for y in range(top, top + self.height)]
+                      for x in range(left, left + self.width)]
+        for column in self.tiles:
+            for tile in column:
+                tile.update(floor.map)
+
+        self.decals = []
+        self.discovered = False
+        self.dirty = False
+        self.background = None
+        self.fog = None
+
+    def getTile(self, x, y):
+        """Returns the tile at the given location on the floor
+
+        Returns: Tile
+        """
+        return self.tiles[x - self.left][y - self.top]
+
+    def getBackground(self):
+        """Returns the surface holding the discovered tiles and their decals, building it if needed
+
+        Returns: pygame.Surface
+        """
+        if self.background is None:
+            self.background = pygame.Surface((self.width*CELL_SIZE, self.height*CELL_SIZE))
+            self.background.fill(COLORS['BLACK'])
+
+            offset = (-self.left*CELL_SIZE, -self.top*CELL_SIZE)
+            for column in self.tiles:
+                for tile in column:
+                    tile.draw(self.background, offset)
+
+            for decal in self.decals:
+                self.drawDecal(decal)
+
+        return self.background
+
+    def getFog(self):
+        """Returns the surface covering the discovered tiles which are not in the FOV, building it if needed
+
+        Returns: pygame.Surface
+        """
+        if self.fog is None:
+            self.fog = pygame.Surface((self.width*CELL_SIZE, self.height*CELL_SIZE), pygame.SRCALPHA)
+
+            area = (slice(self.top, self.top + self.height), slice(self.left, self.left + self.width))
+            for y, x in zip(*numpy.nonzero(self.floor.discovered[area] & ~self.floor.map.fov[area])):
+                self.drawFog(self.left + x, self.top + y, True)
+
+        return self.fog
+
+    def drawFog(self, x, y, fogged):
+        """Covers or uncovers the tile at the given floor location on the fog surface"""
+        color = self.floor.fog_color if fogged else (0, 0, 0, 0)
+        self.fog.fill(color, ((x - self.left)*CELL_SIZE, (y - self.top)*CELL_SIZE, CELL_SIZE, CELL_SIZE))
+
+    def drawTile(self, tile):
+        """Paints a newly discovered tile and its decals onto the background"""
+        tile.draw(self.background, (-self.left*CELL_SIZE, -self.top*CELL_SIZE))
+        for decal in self.decals:
+            if decal[0] == tile.x and decal[1] == tile.y:
+                self.drawDecal(decal)
+
+    def drawDecal(self, decal):
+        """Blits a decal record onto the background if the tile under it has been discovered
+
+        Parameters:
+            decal : tuple(int, int, string) : x, y and name of the splatter image
+        """
+        x, y, splatter = decal
+        if self.getTile(x, y).discovered:
+            self.background.blit(Images.getImage('Splatters', splatter),
+                                 ((x - self.left)*CELL_SIZE, (y - self.top)*CELL_SIZE))
+
+    def clearSurfaces(self):
+        """Frees the background and fog surfaces"""
+        self.background = None
+        self.fog = None
+
+
+class SpatialIndex:
+    """Finds the entities within a rectangle of tiles without visiting the rest of the floor
+
+    Entities are kept in square buckets of tiles by the position returned by the position function. An entity must be
+    removed with the position it was added at before that position changes
+
+    Attributes:
+        bucket_size : int : CLASS; width and height of a bucket in tiles
+        position : function : returns the (x, y) an entity is indexed at
+        buckets : dict{tuple(int, int) : List[Entity]} : entities by the bucket they are in
+    """
+    bucket_size = 8
+
+    def __init__(self, position):
+        """Init method for SpatialIndex
+
+        Parameters:
+            position : function : takes an entity and returns its (x, y)
+        """
+        self.position = position
+        self.buckets = dict()
+
+    def add(self, entity):
+        """Adds the entity at its current position"""
+        x, y = self.position(entity)
+        self.buckets.setdefault((x // self.bucket_size, y // self.bucket_size), []).append(entity)
+
+    def remove(self, entity, x, y):
+        """Removes the entity, which was added at the given position"""
+        key = (x // self.bucket_size, y // self.bucket_size)
+        bucket = self.buckets[key]
+        bucket.remove(entity)
+        if not bucket:
+            del self.buckets[key]
+
+    def query(self, rect):
+        """Yields every entity within the rectangle
+
+        Parameters:
+            rect : pygame.Rect : in tiles
+        """
+        size = self.bucket_size
+        for bucket_x in range(rect.left // size, (rect.right - 1) // size + 1):
+            for bucket_y in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                bucket = self.buckets.get((bucket_x, bucket_y))
+                if bucket is None:
+                    continue
+                for entity in bucket:
+                    x, y = self.position(entity)
+                    if rect.left <= x < rect.right and rect.top <= y < rect.bottom:
+                        yield entity
+
+
 class Tile:
+    __slots__ = ('walkable', 'transparent', 'x', 'y', 'discovered', 'pixel_x', 'pixel_y', 'image_name', 'image')
+
     CELL_SIZE = CELL_SIZE
     image_dir = "Tiles"
 
@@ -320,11 +837,16 @@ class Tile:
         self.image_name = None
         self.image = None
 
-    def draw(self, surface):
-        """Blits the tile to the screen if it has been discovered"""
+    def draw(self, surface, offset=(0, 0)):
+        """Blits the tile to the surface if it has been discovered
 
+        Parameters:
+            surface : pygame.Surface
+            offset : tuple(int, int) : pixels added to the position, for surfaces which do not start at the top left of
+                the floor
+        """
         if self.discovered:
-            surface.blit(self.image, (self.pixel_x, self.pixel_y))
+            surface.blit(self.image, (self.pixel_x + offset[0], self.pixel_y + offset[1]))
 
     def getDraw(self):
         """Returns a tuple with image and location. Perhaps used for mass blitting"""
@@ -345,14 +867,6 @@ class Tile:
         
         self.setImage()
 
-    def drawFog(self, surface):
-        """Covers the tile in a translucent gray surface"""
-
-        surf = pygame.Surface((self.CELL_SIZE, self.CELL_SIZE))
-        surf.set_alpha(128)
-        surf.fill(COLORS['DARK GRAY'])
-        surface.blit(surf, (self.pixel_x, self.pixel_y))
-
     def getRect(self):
         """Returns a rect representing the area and location of the tile"""
         left = self.x*self.CELL_SIZE
@@ -360,9 +874,96 @@ class Tile:
         width = self.CELL_SIZE
         height = self.CELL_SIZE
         return pygame.Rect(left, top, width, height)
-    
-    def addSplatter(self):
-        """Copies the images and adds a blood splatter to it"""
-        self.image = self.image.copy()
-        splatter = Images.getRandomSplatter()
-        self.image.blit(splatter, (0,0))
+
+
+class Minimap:
+    """Small map of the discovered tiles of a floor. On floors larger than the map pane, shows the area around the player
+
+    Each chunk is drawn onto a surface of its own, and drawn again when tiles were discovered in it since
+
+    Attributes:
+        scale : int : CLASS; number of pixels per tile
+        alpha : int : CLASS; alpha of the map when drawn over the game
+        view_width : int : CLASS; most tiles shown across
+        view_height : int : CLASS; most tiles shown down
+        floor : Floor
+        width : int : tiles shown across
+        height : int : tiles shown down
+        chunks : dict{tuple(int, int) : pygame.Surface} : the drawn chunks by the location of their top left tile
+        frame : pygame.Surface : the tiles in view with the player drawn on top. Reused every redraw
+        frame_position : tuple(int, int) or None : where the player was when the frame was last drawn
+    """
+    scale = MINIMAP_SCALE
+    alpha = 160
+    view_width = FLOOR_WIDTH
+    view_height = FLOOR_HEIGHT
+
+    def __init__(self, floor):
+        """Init method for Minimap. The chunks are drawn when they are first in view
+
+        Parameters:
+            floor : Floor
+        """
+        self.floor = floor
+        self.width = min(self.view_width, floor.width)
+        self.height = min(self.view_height, floor.height)
+        self.chunks = dict()
+
+        self.frame = pygame.Surface((self.width * self.scale, self.height * self.scale))
+        self.frame.set_alpha(self.alpha)
+        self.frame_position = None
+
+    def drawChunk(self, chunk):
+        """Draws every discovered tile of the chunk onto a new surface for it
+
+        The tiles are colored one pixel each in a NumPy array, which is then scaled up to the size of the map
+
+        Returns: pygame.Surface
+        """
+        area = (slice(chunk.top, chunk.top + chunk.height), slice(chunk.left, chunk.left + chunk.width))
+        discovered = self.floor.discovered[area]
+        walkable = self.floor.map.walkable[area]
+
+        colors = numpy.zeros((chunk.height, chunk.width, 3), dtype=numpy.uint8)
+        colors[discovered & walkable] = COLORS['GRAY']
+        colors[discovered & ~walkable] = COLORS['WHITE']
+        for direction, color in (('up', COLORS['RED']), ('down', COLORS['MILD BLUE'])):
+            portal = self.floor.portals[direction]
+            x, y = portal.x - chunk.left, portal.y - chunk.top
+            if 0 <= x < chunk.width and 0 <= y < chunk.height and discovered[y, x]:
+                colors[y, x] = color
+
+        # Surfaces are indexed [x][y]
+        tiles = pygame.surfarray.make_surface(colors.swapaxes(0, 1))
+        surface = pygame.transform.scale(tiles, (chunk.width * self.scale, chunk.height * self.scale))
+        self.chunks[(chunk.left, chunk.top)] = surface
+
+        chunk.dirty = False
+        return surface
+
+    def getFrame(self, player_x, player_y):
+        """Returns the map of the area around the player with the player marker drawn on top. The last frame is
+        returned again if the player has not moved and no tiles in view were discovered since
+
+        Returns: pygame.Surface
+        """
+        view = pygame.Rect(0, 0, self.width, self.height)
+        view.center = (player_x, player_y)
+        view.clamp_ip(pygame.Rect(0, 0, self.floor.width, self.floor.height))
+
+        chunks = list(self.floor.getChunksIn(view))
+        if (player_x, player_y) == self.frame_position and not any(chunk.dirty for chunk in chunks):
+            return self.frame
+        self.frame_position = (player_x, player_y)
+
+        self.frame.fill(COLORS['BLACK'])
+        for chunk in chunks:
+            surface = self.chunks.get((chunk.left, chunk.top))
+            if surface is None or chunk.dirty:
+                surface = self.drawChunk(chunk)
+            self.frame.blit(surface, ((chunk.left - view.left) * self.scale, (chunk.top - view.top) * self.scale))
+
+        pygame.draw.rect(self.frame, COLORS['YELLOW'],
+                         ((player_x - view.left) * self.scale, (player_y - view.top) * self.scale,
+                          self.scale, self.scale), 0)
+        return self.frame
@@ -6,12 +6,16 @@ Classes:
 """
 # Standard Library
 import os
-from collections import Counter
+import time
+from collections import Counter, deque
 # Third-Party
 import pygame
 # My Modules
-from source.constants import CELL_SIZE, FLOOR_WIDTH, FLOOR_HEIGHT
+from source.constants import CELL_SIZE
+from source.components import Camera
 from source.utilities import smartSplit
+from source.profiling import FrameProfile
+from source.prefetch import FloorPrefetcher
 
 
 
@@ -24,7 +28,13 @@ class Game:
         log: Log
             Keeps track of things that happen in the game; created in the init method
         surface : pygame.Surface
-            Objects in the game are drawn to here, then this is blitted to the main window
+            The part of the floor within the player's camera is drawn here, then this is blitted to the main window
+
+    Methods:
+        simulateTurn(self) : Every AI on the player's floor takes a turn and every equipped reactor recharges
+        endTurn(self) : Updates what the player can see and writes the turn's messages to the log
+        removeSurfaces(self) : Removes all images so that the game can be pickled (saved)
+        setSurfaces(self) : Gets the surfaces back after loading the save
     """
     def __init__(self, dungeon, player):
         """Init method for Game
@@ -36,23 +46,64 @@ class Game:
         self.dungeon = dungeon
         self.player = player
         self.log = Log(self)
-        self.surface = pygame.Surface((FLOOR_WIDTH*CELL_SIZE, FLOOR_HEIGHT*CELL_SIZE))
+        self.surface = pygame.Surface((Camera.width*CELL_SIZE, Camera.height*CELL_SIZE))
+
+    def simulateTurn(self):
+        """Every AI on the player's floor takes a turn and every equipped reactor recharges
+
+        The time spent on AI and on recharging is recorded separately for the performance overlay
+        """
+        ai_time = 0.0
+        recharge_time = 0.0
+
+        for entity in self.player.location.entities:
+            #  every entity with an AI takes a turn
+            if entity.ai:
+                start = time.perf_counter()
+                entity.ai.takeTurn()
+                ai_time += time.perf_counter() - start
+            # Recharge all equipped reactors
+            if entity.inventory and entity.inventory.equipped['reactor']:
+                start = time.perf_counter()
+                entity.inventory.equipped['reactor'].recharge()
+                entity.inventory.equipped['reactor'].hit_this_turn = False
+                recharge_time += time.perf_counter() - start
+
+        FrameProfile.record('ai', ai_time)
+        FrameProfile.record('recharge', recharge_time)
+
+    def endTurn(self):
+        """Updates what the player can see and writes the turn's messages to the log"""
+        with FrameProfile.section('fov'):
+            self.player.calculateFOV()
+            self.player.discoverTiles()
+
+        # Write whats in the log's buffer and add an underscore
+        with FrameProfile.section('log'):
+            self.log.write()
+            self.log.addEOTUnderscore()
 
     def removeSurfaces(self):
         """Removes all images so that the game can be pickled (saved)"""
+        # A floor being warmed up would otherwise keep changing while it is saved
+        FloorPrefetcher.cancel()
+
         for floor in self.dungeon:
             for entity in floor.entities:
                 entity.image = None
                 if entity.inventory:
                     for item in entity.inventory.contents:
                         item.image = None
-            for x in range(FLOOR_WIDTH):
-                for y in range(FLOOR_HEIGHT):
-                    floor.tile_map[x][y].image = None
+            for tile in floor.getTiles():
+                tile.image = None
 
             if floor.chest.item:
                 floor.chest.item.image = None
 
+            # Projectiles are only for show and hold their images, so any still flying are dropped
+            floor.clearProjectiles()
+            floor.clearSurfaces()
+
         self.surface = None
 
     def setSurfaces(self):
@@ -63,14 +114,13 @@ class Game:
                 if entity.inventory:
                     for item in entity.inventory.contents:
                         item.setImage()
-            for x in range(FLOOR_WIDTH):
-                for y in range(FLOOR_HEIGHT):
-                    floor.tile_map[x][y].setImage()
+            for tile in floor.getTiles():
+                tile.setImage()
 
             if floor.chest.item:
                 floor.chest.item.setImage()
 
-        self.surface = pygame.Surface((FLOOR_WIDTH*CELL_SIZE, FLOOR_HEIGHT*CELL_SIZE))
+        self.surface = pygame.Surface((Camera.width*CELL_SIZE, Camera.height*CELL_SIZE))
 class Log:
     """Keeps track of game information. Is used to print output to the screen
 
@@ -79,8 +129,12 @@ class Log:
             CLASS; stores the current instance in the class so that access to the class grants access to the instance
         game : Game
             The current Game
-        messages : List of strings
-            Stores  messages to be drawn to the screen
+        max_messages : int
+            CLASS; number of messages kept in memory. Older messages are dropped, or spilled to the archive
+        archive_path : string or None
+            CLASS; file that dropped messages are appended to. Messages are discarded if None
+        messages : deque of strings
+            Stores the most recent messages to be drawn to the screen
     Methods:
         getLastMessage(self, lines) : Gets a specified number of messages from the end of the messages list
         addEOTUnderscore(self) : Adds an underscore to the last message of the turn
@@ -89,6 +143,8 @@ class Log:
         addMessage(cls, message) : CLASS; Used by external functions to add messages to the current instance
         """
     instance = None
+    max_messages = 100
+    archive_path = None
 
     def __init__(self, game):
         """Init method for Log
@@ -99,7 +155,7 @@ class Log:
         """
         self.game = game
         # Starts off with a welcome message
-        self.messages = ["Welcome to the Dungeon, " + self.game.player.name]
+        self.messages = deque(["Welcome to the Dungeon, " + self.game.player.name], maxlen=self.max_messages)
         self.buffer = []
         self.setInstance(self)
 
@@ -112,15 +168,32 @@ class Log:
 
         Returns: List[string]
         """
-        last_messages = []
-
-        for message in self.messages[-lines:]:
-            if len(message) > max_length:
-                last_messages.extend(smartSplit(message, max_length))
-            else:
-                last_messages.append(message)
-
-        return last_messages[-lines:]
+        last_lines = []
+
+        # Work back from the newest message until there are enough lines. smartSplit remembers each message's lines
+        for message in reversed(self.messages):
+            last_lines[:0] = smartSplit(message, max_length)
+            if len(last_lines) >= lines:
+                break
+
+        return last_lines[-lines:]
+
+    def append(self, message):
+        """Adds a message, spilling the oldest message to the archive if the log is full"""
+        if len(self.messages) == self.messages.maxlen and self.archive_path is not None:
+            self.archive([self.messages[0]])
+        self.messages.append(message)
+
+    def archive(self, messages):
+        """Appends the messages to the archive file. Failing to write only loses the dropped messages"""
+        try:
+            folder = os.path.dirname(self.archive_path)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+            with open(self.archive_path, 'a') as file:
+                file.writelines(message + "\n" for message in messages)
+        except OSError:
+            pass
 
     def addEOTUnderscore(self):
         """Adds an underscore to the last message of the turn"""
@@ -141,7 +214,7 @@ class Log:
                 message += " x%d" % buffer_counter[message]
             
             # Add the message to the list of messages
-            self.messages.append(message)
+            self.append(message)
         
         # Clear the buffer
         self.buffer = []
@@ -159,4 +232,4 @@ class Log:
     @classmethod
     def addMessage(cls, message):
         """Used by external functions to add messages to the current instance"""
-        cls.instance.messages.append(message)
+        cls.instance.append(message)
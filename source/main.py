@@ -12,14 +12,21 @@ from source.game import Game, Log
 from source.screens import mainGameScreen, titleScreen, playerCreateScreen, generateDungeonScreen, mainMenuScreen
 from source.assets import loadAssets
 from source.quit import terminateGame, loadSave
+from source.profiling import StartupProfile
+from source.replay import Input, FastClock
 
 
 def main():
     """The main function of the program
     
     Initializes pygame. Setups Game, Runs the game, finally presents game over screen before repeating loop"""
-    window, fps_clock = initializePygame()
-    loadAssets()
+    with StartupProfile.stage("initializePygame"):
+        window, fps_clock = initializePygame()
+    # Replays run as fast as possible
+    if Input.isReplaying():
+        fps_clock = FastClock()
+    with StartupProfile.stage("loadAssets"):
+        loadAssets()
     titleScreen(window, fps_clock)
     while True:
         choice = mainMenuScreen(window, fps_clock)
@@ -30,7 +37,9 @@ def main():
                 mainGameScreen(window, fps_clock, game)
 
         elif choice == "Load Game":
-            game = loadSave()
+            with StartupProfile.stage("loadSave"):
+                game = loadSave()
+            StartupProfile.report()
             Log.instance = game.log
             mainGameScreen(window, fps_clock, game)
 
@@ -79,7 +88,8 @@ def setupGame(window, fps_clock, name, background):
     """
 
     # Shows loading screen for generating dungeon
-    dungeon = generateDungeonScreen(window)
+    with StartupProfile.stage("generation"):
+        dungeon = generateDungeonScreen(window)
 
     # Player starts on the first floor at the location of the up portal
     player_start_x = dungeon[0].portals['up'].x
@@ -91,4 +101,6 @@ def setupGame(window, fps_clock, name, background):
     # Creates game from player and dungeon
     game = Game(dungeon, player)
 
+    StartupProfile.report()
+
     return game
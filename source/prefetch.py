@@ -0,0 +1,121 @@
+"""Contains the warming up of the next floor while the player approaches its portal
+
+The first frame on a floor computes its FOV, creates the chunks around the portal and builds their surfaces and the
+minimap. FloorPrefetcher does that work on a worker thread once the player is near the down portal, so the frame after
+the portal key only has to draw.
+
+Classes:
+    FloorPrefetcher : Warms up the next floor on a worker thread and times the portal transitions
+"""
+# Standard Library
+import threading
+import time
+from collections import deque
+
+# Third Party
+import pygame
+
+# My Modules
+from source.components import Camera
+from source.profiling import FrameProfile
+from source.utilities import getDistanceBetweenEntities
+
+
+class FloorPrefetcher:
+    """Warms up the next floor on a worker thread and times the portal transitions
+
+    Warming up gives the same results as arriving on the floor, and no other code touches the floor being warmed until
+    the transition, which stops the worker and waits for it first. The worker only stops between chunks, so the
+    transition never waits for more than the FOV, the discovered tiles and the surfaces of one chunk
+
+    Attributes:
+        warm_distance : int : CLASS; the next floor is warmed once the player is this many tiles from the down portal
+        history : int : CLASS; number of transitions kept
+        floor : Floor or None : CLASS; the floor warmed, or being warmed, since the last transition
+        thread : threading.Thread or None : CLASS; the worker warming the floor
+        stop : threading.Event : CLASS; set to stop the worker after its current chunk
+        transition_start : float or None : CLASS; perf_counter when the transition being timed began
+        transition_times : deque(float) : CLASS; milliseconds from each portal key to the end of the next frame
+
+    Methods:
+        update(cls, game) : CLASS; Starts warming the next floor if the player is near the down portal
+        start(cls, floor, radius) : CLASS; Starts warming the floor on a worker thread
+        cancel(cls) : CLASS; Stops the worker and waits for it
+        beginTransition(cls) : CLASS; Stops the worker and starts timing the transition
+        endTransition(cls) : CLASS; Records the time since beginTransition, once the frame has been presented
+    """
+    warm_distance = 10
+    history = 100
+
+    floor = None
+    thread = None
+    stop = threading.Event()
+
+    transition_start = None
+    transition_times = deque(maxlen=history)
+
+    @classmethod
+    def update(cls, game):
+        """Starts warming the next floor if the player is near the down portal and it has not been warmed yet
+
+        Parameters:
+            game : source.game.Game
+        """
+        player = game.player
+        floor = player.location
+        if floor.number >= len(game.dungeon):
+            return
+
+        next_floor = game.dungeon[floor.number]
+        if next_floor is cls.floor:
+            return
+
+        portal = floor.portals['down']
+        if getDistanceBetweenEntities((player.x, player.y), (portal.x, portal.y)) <= cls.warm_distance:
+            cls.start(next_floor, player.fov_radius)
+
+    @classmethod
+    def start(cls, floor, radius):
+        """Starts warming the floor on a worker thread, for a player arriving on its up portal
+
+        Parameters:
+            floor : source.floors.Floor
+            radius : int : radius of the player's FOV
+        """
+        cls.cancel()
+
+        arrival = floor.portals['up']
+        area = pygame.Rect(0, 0, Camera.width, Camera.height)
+        area.center = (arrival.x, arrival.y)
+
+        cls.floor = floor
+        cls.stop = threading.Event()
+        cls.thread = threading.Thread(target=floor.warmUp, args=(arrival.x, arrival.y, radius, area, cls.stop),
+                                      name="floor prefetch", daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def cancel(cls):
+        """Stops the worker and waits for it. The floor is warmed again when the player next approaches its portal"""
+        if cls.thread is not None:
+            cls.stop.set()
+            cls.thread.join()
+            cls.thread = None
+        cls.floor = None
+
+    @classmethod
+    def beginTransition(cls):
+        """Stops the worker and starts timing the transition. Must be called before the player changes floors"""
+        cls.transition_start = time.perf_counter()
+        cls.cancel()
+
+    @classmethod
+    def endTransition(cls):
+        """Records the time since beginTransition. Called after every frame, does nothing unless a transition began"""
+        if cls.transition_start is None:
+            return
+
+        seconds = time.perf_counter() - cls.transition_start
+        cls.transition_start = None
+        cls.transition_times.append(seconds * 1000)
+        FrameProfile.record('transition', seconds)
@@ -0,0 +1,554 @@
+"""Contains tools for measuring the performance of the game
+
+Classes:
+    StartupProfile : Records how long each stage of starting the game takes
+    FrameProfile : Collects frame, pane and turn timings for the performance overlay and trace files
+    StageHooks : Calls the hooks registered to the stages of the game loop
+    StageProfiler : Base class of the profilers which can be attached to stages
+    CProfileProfiler : Profiles the attached stages with cProfile
+    TracemallocProfiler : Records the memory allocated during the attached stages
+    SamplingProfiler : Samples the call stack at a fixed interval during the attached stages
+"""
+# Standard Library
+import abc
+import atexit
+import cProfile
+import csv
+import io
+import json
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Records how long each stage of starting the game takes and reports it against a budget
+
+    Attributes:
+        enabled : bool : CLASS; stages are only recorded when enabled
+        budget : float : CLASS; number of seconds the recorded stages should fit in
+        stages : List[tuple(string, float)] : CLASS; name and duration in seconds of every recorded stage
+        reported : bool : CLASS; whether the report has already been printed
+
+    Methods:
+        enable(cls, budget) : CLASS; Starts recording stages
+        stage(cls, name) : CLASS; Context manager which records the time spent inside it
+        report(cls) : CLASS; Prints the time spent in each stage and whether the total is within the budget
+    """
+    default_budget = 3.0
+
+    enabled = False
+    budget = default_budget
+    stages = []
+    reported = False
+
+    @classmethod
+    def enable(cls, budget=None):
+        """Starts recording stages
+
+        Parameters:
+            budget : float or None : seconds the startup should fit in. None uses the default budget
+        """
+        cls.enabled = True
+        if budget is not None:
+            cls.budget = budget
+
+    @classmethod
+    @contextmanager
+    def stage(cls, name):
+        """Records the time spent inside the with block under the given name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if cls.enabled:
+                cls.stages.append((name, time.perf_counter() - start))
+
+    @classmethod
+    def report(cls):
+        """Prints the time spent in each stage and whether the total is within the budget. Only reports once
+
+        Returns: bool : whether the startup was within the budget
+        """
+        total = sum(duration for name, duration in cls.stages)
+        within_budget = total <= cls.budget
+
+        if not cls.enabled or cls.reported:
+            return within_budget
+        cls.reported = True
+
+        print("Startup Profile")
+        for name, duration in cls.stages:
+            print("  %-20s %8.1f ms" % (name, duration * 1000))
+        print("  %-20s %8.1f ms" % ("Total", total * 1000))
+
+        if within_budget:
+            print("Within budget of %.1f ms" % (cls.budget * 1000))
+        else:
+            print("Over budget of %.1f ms by %.1f ms" % (cls.budget * 1000, (total - cls.budget) * 1000))
+
+        return within_budget
+
+
+class FrameProfile:
+    """Collects frame, pane and turn timings for the performance overlay and trace files
+
+    Timings are always collected since they are cheap. The overlay only shows them, and the trace only stores them,
+    when turned on. The screens present frames without waiting while nothing is animating, so the trace only stores the
+    frames in which a section ran, such as drawing a pane or resolving a turn. Otherwise it would grow by thousands of
+    rows a second while the game waits for a key
+
+    Attributes:
+        shown : bool : CLASS; whether the overlay is drawn
+        history : int : CLASS; number of frames the percentiles are taken over
+        frame_times : deque(float) : CLASS; duration in seconds of the most recent frames
+        sections : dict{string : float} : CLASS; most recent duration in seconds of each named section
+        counts : dict{string : int} : CLASS; most recent value of each counter, such as the number of entities
+        frame_sections : dict{string : float} : CLASS; time spent in each section during the current frame
+        trace_path : string or None : CLASS; the trace is written here at exit. CSV unless the name ends in .json
+        trace : List[dict] : CLASS; one row per frame in which a section ran, while tracing
+
+    Methods:
+        toggle(cls) : CLASS; Shows or hides the overlay
+        section(cls, name) : CLASS; Context manager which records the time spent inside it
+        record(cls, name, seconds) : CLASS; Records the duration of a section
+        count(cls, name, value) : CLASS; Records the value of a counter
+        frame(cls) : CLASS; Marks the end of a frame
+        getLines(cls) : CLASS; Returns the lines of text shown in the overlay
+        startTrace(cls, path) : CLASS; Stores a row for every frame in which a section ran and writes them at exit
+    """
+    shown = False
+    history = 300
+
+    frame_times = deque(maxlen=history)
+    last_frame = None
+    frame_number = 0
+    sections = dict()
+    counts = dict()
+    frame_sections = dict()
+
+    trace_path = None
+    trace = []
+    trace_start = None
+
+    # Sections shown in the overlay, grouped by line
+    pane_sections = ('game pane', 'stat pane', 'log pane', 'map pane')
+    turn_sections = ('ai', 'recharge', 'fov', 'log')
+
+    @classmethod
+    def toggle(cls):
+        """Shows or hides the overlay"""
+        cls.shown = not cls.shown
+
+    @classmethod
+    @contextmanager
+    def section(cls, name):
+        """Records the time spent inside the with block under the given name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            cls.record(name, time.perf_counter() - start)
+
+    @classmethod
+    def record(cls, name, seconds):
+        """Records the duration of a section. Sections repeated within a frame are added together for the trace"""
+        cls.sections[name] = seconds
+        cls.frame_sections[name] = cls.frame_sections.get(name, 0.0) + seconds
+
+    @classmethod
+    def count(cls, name, value):
+        """Records the value of a counter"""
+        cls.counts[name] = value
+
+    @classmethod
+    def frame(cls):
+        """Marks the end of a frame. Records its duration and, if tracing and a section ran, stores a row for it"""
+        now = time.perf_counter()
+        if cls.last_frame is not None:
+            frame_time = now - cls.last_frame
+            cls.frame_times.append(frame_time)
+
+            if cls.trace_path is not None and cls.frame_sections:
+                row = {'frame': cls.frame_number, 'time': now - cls.trace_start, 'frame_ms': frame_time * 1000}
+                for name, seconds in cls.frame_sections.items():
+                    row[name.replace(' ', '_') + '_ms'] = seconds * 1000
+                row.update(cls.counts)
+                cls.trace.append(row)
+
+        cls.last_frame = now
+        cls.frame_number += 1
+        cls.frame_sections = dict()
+
+    @classmethod
+    def getPercentile(cls, percent):
+        """Returns the frame time in seconds that the given percent of recent frames were at or under
+
+        Returns: float
+        """
+        if not cls.frame_times:
+            return 0.0
+        ordered = sorted(cls.frame_times)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+    @classmethod
+    def getLines(cls):
+        """Returns the lines of text shown in the overlay
+
+        Returns: List[string]
+        """
+        def formatSections(names):
+            return "  ".join("%s %.2f" % (name.split()[0], cls.sections.get(name, 0.0) * 1000) for name in names)
+
+        lines = ["Frame  p50 %.1f  p95 %.1f  p99 %.1f ms" % tuple(cls.getPercentile(percent) * 1000
+                                                                for percent in (50, 95, 99)),
+                 "Panes  %s ms" % formatSections(cls.pane_sections),
+                 "Turn  %s ms" % formatSections(cls.turn_sections),
+                 "Entities %d  Projectiles %d" % (cls.counts.get('entities', 0), cls.counts.get('projectiles', 0))]
+        if 'transition' in cls.sections:
+            lines.append("Last floor transition %.1f ms" % (cls.sections['transition'] * 1000))
+        return lines
+
+    @classmethod
+    def startTrace(cls, path):
+        """Stores a row for every frame in which a section ran from now on and writes them to the path at exit
+
+        Parameters:
+            path : string : written as JSON if it ends in .json, otherwise as CSV
+        """
+        cls.trace_path = path
+        cls.trace = []
+        cls.trace_start = time.perf_counter()
+        atexit.register(cls.writeTrace)
+
+    @classmethod
+    def writeTrace(cls):
+        """Writes the stored rows to the trace path"""
+        if cls.trace_path is None:
+            return
+
+        if cls.trace_path.endswith('.json'):
+            with open(cls.trace_path, 'w') as file:
+                json.dump(cls.trace, file, indent=1)
+            return
+
+        # Rows only have the sections which ran during their frame, so the columns are gathered from every row
+        fieldnames = []
+        for row in cls.trace:
+            fieldnames.extend(name for name in row if name not in fieldnames)
+
+        with open(cls.trace_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(cls.trace)
+
+
+class StageHooks:
+    """Calls the hooks registered to the stages of the game loop
+
+    The screens mark where each stage begins and ends. A hook is any object with before(stage, turn) and
+    after(stage, turn) methods. Stages without hooks cost a single dict lookup.
+
+    Stages:
+        input : handling a key press, including any screen the key opens and any resting it starts. The stages those
+            run nest inside it
+        simulate : resolving a turn; every AI acts, reactors recharge and the FOV and log are updated
+        render : drawing the panes
+        present : drawing the overlay and updating the display
+
+    Attributes:
+        stages : tuple(string) : CLASS; names of the stages
+        hooks : dict{string : List[object]} : CLASS; hooks registered to each stage
+        turn : int : CLASS; number of turns simulated so far. It goes up when the simulate stage begins, so a stage
+            belongs to the latest turn that began before it
+
+    Methods:
+        register(cls, stage, hook) : CLASS; Calls the hook before and after the stage from now on
+        unregister(cls, stage, hook) : CLASS; Stops calling the hook
+        begin(cls, stage) : CLASS; Marks the beginning of a stage
+        end(cls, stage) : CLASS; Marks the end of a stage
+        stage(cls, stage) : CLASS; Context manager which marks the beginning and end of a stage
+    """
+    stages = ('input', 'simulate', 'render', 'present')
+    hooks = {stage: [] for stage in stages}
+    turn = 0
+
+    @classmethod
+    def register(cls, stage, hook):
+        """Calls the hook before and after the stage from now on"""
+        cls.hooks[stage].append(hook)
+
+    @classmethod
+    def unregister(cls, stage, hook):
+        """Stops calling the hook"""
+        cls.hooks[stage].remove(hook)
+
+    @classmethod
+    def begin(cls, stage):
+        """Marks the beginning of a stage"""
+        if stage == 'simulate':
+            cls.turn += 1
+        for hook in cls.hooks[stage]:
+            hook.before(stage, cls.turn)
+
+    @classmethod
+    def end(cls, stage):
+        """Marks the end of a stage. Hooks are called in the reverse order of begin"""
+        for hook in reversed(cls.hooks[stage]):
+            hook.after(stage, cls.turn)
+
+    @classmethod
+    @contextmanager
+    def stage(cls, stage):
+        """Marks the beginning and end of the stage around the with block"""
+        cls.begin(stage)
+        try:
+            yield
+        finally:
+            cls.end(stage)
+
+
+class StageProfiler(abc.ABC):
+    """Base class of the profilers which can be attached to stages
+
+    Stages can nest, such as the target screen drawing while the main screen handles the fire key, so a profiler
+    only starts at the outermost stage it is attached to and stops when that stage ends
+
+    Attributes:
+        first_turn, last_turn : int or None : only stages belonging to these turns are profiled. None is unbounded
+        path : string or None : the report is written here. It is printed if None
+        depth : int : number of attached stages currently running
+        running : bool : whether the profiler was started by the outermost running stage
+
+    Methods:
+        attach(self, stages) : Registers the profiler to the stages and reports it when the program exits
+        before(self, stage, turn) : Starts profiling if this is the outermost stage and the turn is chosen
+        after(self, stage, turn) : Stops profiling when the outermost stage ends
+        start(self) : ABSTRACT; Starts profiling
+        stop(self) : ABSTRACT; Stops profiling
+        getReport(self) : ABSTRACT; Returns the report as a string
+        report(self) : Writes or prints the report
+    """
+    # Number of lines shown in the reports
+    top = 30
+
+    def __init__(self, first_turn=None, last_turn=None, path=None):
+        self.first_turn = first_turn
+        self.last_turn = last_turn
+        self.path = path
+        self.depth = 0
+        self.running = False
+
+    def attach(self, stages):
+        """Registers the profiler to the stages and reports it when the program exits"""
+        for stage in stages:
+            StageHooks.register(stage, self)
+        atexit.register(self.report)
+
+    def before(self, stage, turn):
+        """Starts profiling if this is the outermost stage and the turn is chosen"""
+        self.depth += 1
+        if self.depth == 1 and (self.first_turn is None or turn >= self.first_turn) and \
+                (self.last_turn is None or turn <= self.last_turn):
+            self.running = True
+            self.start()
+
+    def after(self, stage, turn):
+        """Stops profiling when the outermost stage ends"""
+        self.depth -= 1
+        if self.depth == 0 and self.running:
+            self.running = False
+            self.stop()
+
+    @abc.abstractmethod
+    def start(self):
+        """Starts profiling"""
+
+    @abc.abstractmethod
+    def stop(self):
+        """Stops profiling"""
+
+    @abc.abstractmethod
+    def getReport(self):
+        """Returns the report
+
+        Returns: string
+        """
+
+    def report(self):
+        """Writes the report to the path, or prints it if there is no path"""
+        if self.path is None:
+            print(self.getReport())
+        else:
+            with open(self.path, 'w') as file:
+                file.write(self.getReport())
+
+
+class CProfileProfiler(StageProfiler):
+    """Profiles the attached stages with cProfile
+
+    If there is a path, the statistics are dumped there in the pstats format rather than written as text, so they
+    can be loaded by pstats or other viewers
+    """
+    def __init__(self, first_turn=None, last_turn=None, path=None):
+        super().__init__(first_turn, last_turn, path)
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def getReport(self):
+        stream = io.StringIO()
+        try:
+            pstats.Stats(self.profile, stream=stream).sort_stats('cumulative').print_stats(self.top)
+        except TypeError:
+            # pstats can not read a profile which never ran
+            return "Nothing was profiled"
+        return stream.getvalue()
+
+    def report(self):
+        if self.path is None:
+            print(self.getReport())
+        else:
+            self.profile.dump_stats(self.path)
+
+
+class TracemallocProfiler(StageProfiler):
+    """Records the memory allocated and freed during the attached stages, by the line that allocated it
+
+    Attributes:
+        snapshot : tracemalloc.Snapshot : taken when profiling starts
+        sizes : Counter{string : int} : bytes still allocated at the end of the stages, by line
+        counts : Counter{string : int} : number of blocks still allocated at the end of the stages, by line
+    """
+    # Allocations made by tracemalloc and the profilers are left out
+    filters = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+
+    def __init__(self, first_turn=None, last_turn=None, path=None):
+        super().__init__(first_turn, last_turn, path)
+        self.snapshot = None
+        self.sizes = Counter()
+        self.counts = Counter()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+
+    def stop(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        for statistic in snapshot.compare_to(self.snapshot, 'lineno'):
+            if statistic.size_diff or statistic.count_diff:
+                line = str(statistic.traceback[0])
+                self.sizes[line] += statistic.size_diff
+                self.counts[line] += statistic.count_diff
+        self.snapshot = None
+
+    def getReport(self):
+        lines = ["Memory still allocated after the profiled stages, by line"]
+        for line, size in sorted(self.sizes.items(), key=lambda item: abs(item[1]), reverse=True)[:self.top]:
+            lines.append("%+12.1f KiB %+8d blocks  %s" % (size / 1024, self.counts[line], line))
+        lines.append("%+12.1f KiB in total" % (sum(self.sizes.values()) / 1024))
+        return "\n".join(lines)
+
+
+class SamplingProfiler(StageProfiler):
+    """Samples the call stack of the game at a fixed interval of CPU time during the attached stages
+
+    Sampling barely slows the game down, so the timings of the profiled stages stay close to those of a normal game.
+    Samples are taken by a SIGPROF timer where there is one, which only runs while a profiled stage runs. Elsewhere,
+    such as on Windows, a thread samples the stack of the game instead, which misses more samples since it has to wait
+    for the game to release the GIL
+
+    Attributes:
+        interval : float : seconds between samples
+        samples : int : number of stacks sampled
+        own : Counter{string : int} : samples where each function was running
+        total : Counter{string : int} : samples where each function was running or on the stack
+    """
+    use_timer = hasattr(signal, 'setitimer')
+
+    def __init__(self, first_turn=None, last_turn=None, path=None, interval=0.001):
+        super().__init__(first_turn, last_turn, path)
+        self.interval = interval
+        self.samples = 0
+        self.own = Counter()
+        self.total = Counter()
+        self.thread_id = threading.get_ident()
+        self.sampler = None
+
+    def start(self):
+        # The handler or thread is installed once. The timer is armed for every profiled stage and disarmed when it
+        # ends, so it does not interrupt the rest of the game. The thread only samples while running is True
+        if self.use_timer:
+            if self.sampler is None:
+                self.sampler = signal.signal(signal.SIGPROF, self.handleSignal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        elif self.sampler is None:
+            self.sampler = threading.Thread(target=self.sampleThread, daemon=True)
+            self.sampler.start()
+
+    def stop(self):
+        if self.use_timer:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+    def report(self):
+        # The timer has to be stopped before exiting, since the default action of SIGPROF ends the process. A stage
+        # may still be running if the game exits from inside it
+        if self.use_timer and self.sampler is not None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        super().report()
+
+    def handleSignal(self, signum, frame):
+        """Called by the SIGPROF timer with the frame that was running"""
+        if self.running:
+            self.sample(frame)
+
+    def sampleThread(self):
+        """Runs in the sampling thread. Samples the game's stack while profiling"""
+        while True:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            if self.running and frame is not None:
+                self.sample(frame)
+
+    def sample(self, frame):
+        """Counts the function of the frame as running and every function on its stack"""
+        self.samples += 1
+        self.own[self.getName(frame)] += 1
+        names = set()
+        while frame is not None:
+            names.add(self.getName(frame))
+            frame = frame.f_back
+        self.total.update(names)
+
+    @staticmethod
+    def getName(frame):
+        """Returns the function, file and line of a frame"""
+        code = frame.f_code
+        return "%s (%s:%d)" % (code.co_name, code.co_filename, code.co_firstlineno)
+
+    def getReport(self):
+        if not self.samples:
+            return "Nothing was sampled"
+        lines = ["%d samples, %.1f ms of CPU time apart" % (self.samples, self.interval * 1000),
+                 "%8s %8s  function" % ("own", "total")]
+        for name, count in self.total.most_common(self.top):
+            lines.append("%7.1f%% %7.1f%%  %s" % (self.own[name] / self.samples * 100,
+                                                  count / self.samples * 100, name))
+        return "\n".join(lines)
+
+
+# Names of the profilers which can be chosen from the command line
+stage_profilers = {'cprofile': CProfileProfiler,
+                   'tracemalloc': TracemallocProfiler,
+                   'sampling': SamplingProfiler}
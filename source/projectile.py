@@ -1,8 +1,6 @@
 """Projectile class"""
 # Standard Library
 import math
-# Third Party
-import pygame
 # My Modules
 from source.assets import Images
 from source.constants import CELL_SIZE
@@ -11,95 +9,111 @@ from source.utilities import getDistanceBetweenEntities
 # todo figure out a way to draw Projectiles so their animation completes before corpses are drawn
 class Projectile:
     """Projectiles are images which are blitted to the screen to show that a ranged attack occurred
-    
+
+    They are only for show; the attack is resolved when they are created. They move by the time passed rather than by
+    frames, so they travel at the same speed whatever the frame rate, and the game keeps handling input while they fly
+
     Attributes:
         image_dir : string : CLASS; directory in the Images assets class
-        frames_per_tile : int : CLASS; Used to calculate the total number of frames in the animation
-        pixelx : int : current x location on the game surface in pixels
-        pixely : int : current y location on the game surface in pixels
-        dest_pixelx : int : destination x
-        dest_pixely : int : destination y
-        frames_on_screen : int : total number of frames in the animation
-        x_step : float : x amount projectile moves per frame
-        y_step : float : y amount projectile moves per frame
-        location : source.floors.Floor 
-        steps_taken : int : number of frames displayed so far
-        delay : int : number of frames left before starting animation
-        image : pygame.Surface 
-    
-    Methods: 
-        drawNextStep(self, surface) : draws and moves the projectile
+        tiles_per_second : float : CLASS; speed of every projectile
+        strike_delay : float : CLASS; seconds between the projectiles of consecutive strikes
+        max_volley_time : float : CLASS; the strikes of long volleys are closer together so they all start within this
+        max_step : float : CLASS; most seconds a projectile moves by in one update
+        source_pixelx, source_pixely : int : starting location on the floor in pixels
+        x_difference, y_difference : int : distance to the destination in pixels
+        duration : float : seconds the projectile takes to reach its destination
+        delay : float : seconds to wait before starting to move
+        elapsed : float : seconds since the projectile was created
+        pixelx : float : current x location on the floor in pixels
+        pixely : float : current y location on the floor in pixels
+        location : source.floors.Floor
+        image : pygame.Surface
+
+    Methods:
+        getVolleyDelay(cls, strike, strikes) : CLASS; Returns the delay of the projectile of a strike in a volley
+        update(self, seconds) : Moves the projectile and removes it once it has arrived
+        draw(self, surface) : Draws the projectile at its current location once it has started moving
     """
+    __slots__ = ('source_pixelx', 'source_pixely', 'x_difference', 'y_difference', 'duration', 'delay', 'elapsed',
+                 'pixelx', 'pixely', 'location', 'image')
+
     image_dir = 'Projectiles'
-    frames_per_tile = 2
+    tiles_per_second = 72
+    strike_delay = 0.035
+    max_volley_time = 0.35
+
+    # A long frame, such as the one which resolved the turn that fired the projectile, only moves it this far
+    max_step = 1 / 30
 
-    def __init__(self, proj_id, location, source, destination, delay):
+    def __init__(self, proj_id, location, source, destination, delay=0.0):
         """Init method for Projectile
-        
-        Parameters: 
+
+        Parameters:
             proj_id : string : associated with the name of the image from the Image assets class
-            location : source.floor.Floor 
+            location : source.floor.Floor
             source : tuple(int,int) : Starting x and y position
             destination : tuple(int, int) : Ending x and y position
-            delay : int : number of frames to wait before starting the animation
+            delay : float : number of seconds to wait before starting the animation
         """
-        
-        # Determines current position
-        self.pixelx = source[0] * CELL_SIZE
-        self.pixely = source[1] * CELL_SIZE
-        
-        # Determines destination
-        self.dest_pixelx = destination[0] * CELL_SIZE
-        self.dest_pixely = destination[1] * CELL_SIZE
-
-        # Gets the difference between current position and destination
-        x_difference = self.dest_pixelx - self.pixelx
-        y_difference = self.dest_pixely - self.pixely
-
-        # Determines the number of frames it will take to complete the animation based on the distance between source
-        # and Destination
-        self.frames_on_screen = self.frames_per_tile * getDistanceBetweenEntities(source, destination)
-        
-        # Divides the difference into steps based on the number of frames_on_screen
-        self.x_step = x_difference / self.frames_on_screen
-        self.y_step = y_difference / self.frames_on_screen
-        
+        # Determines starting position
+        self.source_pixelx = source[0] * CELL_SIZE
+        self.source_pixely = source[1] * CELL_SIZE
+        self.pixelx = self.source_pixelx
+        self.pixely = self.source_pixely
+
+        # Gets the difference between the starting position and destination
+        self.x_difference = destination[0] * CELL_SIZE - self.source_pixelx
+        self.y_difference = destination[1] * CELL_SIZE - self.source_pixely
+
+        # Determines how long the animation takes based on the distance between source and destination
+        self.duration = getDistanceBetweenEntities(source, destination) / self.tiles_per_second
+        self.delay = delay
+        self.elapsed = 0.0
+
         # Adds the Projectile to the location
         self.location = location
         self.location.addProjectile(self)
 
-        # Initializes steps taken at 0. This represents the number of frames shown
-        self.steps_taken = 0
-        
-        # Stores delay
-        self.delay = delay
-        
-        # Determines the angle of the projectile image using the arc tangent of "y/x"
-        angle = math.degrees(math.atan2(y_difference, x_difference))
-        
-        # Gets the image and rotates. pygame.transform.rotate rotates clockwise unlike math.atan2
-        self.image = pygame.transform.rotate(Images.getImage(self.image_dir, proj_id), -angle)
-        
-    def drawNextStep(self, surface):
-        """Draws the projectile image at its current location, then moves it and increments the steps taken"""
-        # If delay, decrement delay
-        assert(self.steps_taken <= self.frames_on_screen)
-
-        if self.delay:
-            self.delay -= 1
-            return
-
-        elif self.steps_taken == self.frames_on_screen:
+        # Determines the angle of the projectile image using the arc tangent of "y/x". The y axis of the screen
+        # points down, so the angle is negated to rotate counterclockwise. The rotated images are cached by Images
+        angle = math.degrees(math.atan2(self.y_difference, self.x_difference))
+        self.image = Images.getRotatedImage(self.image_dir, proj_id, -angle)
+
+    @classmethod
+    def getVolleyDelay(cls, strike, strikes):
+        """Returns the delay in seconds of the projectile of a strike, so that every strike of a volley starts within
+        max_volley_time
+
+        Parameters:
+            strike : int : index of the strike in the volley
+            strikes : int : number of strikes in the volley
+
+        Returns: float
+        """
+        return strike * min(cls.strike_delay, cls.max_volley_time / strikes)
+
+    def update(self, seconds):
+        """Moves the projectile by the time passed and removes it from its location once it has arrived
+
+        Parameters:
+            seconds : float : time passed since the last update
+        """
+        self.elapsed += min(seconds, self.max_step)
+        progress = (self.elapsed - self.delay) / self.duration if self.duration else 1.0
+
+        if progress >= 1:
             self.location.removeProjectile(self)
+        elif progress > 0:
+            self.pixelx = self.source_pixelx + self.x_difference * progress
+            self.pixely = self.source_pixely + self.y_difference * progress
 
-        else:
-            # Draws the projectile
-            surface.blit(self.image, (self.pixelx, self.pixely))
-            
-            # Moves the projectile
-            self.pixely += self.y_step
-            self.pixelx += self.x_step
-            
-            # Increments steps taken
-            self.steps_taken += 1
+    def draw(self, surface, offset=(0, 0)):
+        """Draws the projectile at its current location, unless it is still waiting for its delay
 
+        Parameters:
+            surface : pygame.Surface
+            offset : tuple(int, int) : pixels added to the location, for surfaces which do not start at the top left of
+                the floor
+        """
+        if self.elapsed >= self.delay:
+            surface.blit(self.image, (self.pixelx + offset[0], self.pixely + offset[1]))
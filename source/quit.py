@@ -9,32 +9,38 @@ from pygame.constants import QUIT
 
 SAVE_LOCATION = os.path.join('saves', 'totos.save')
 
-def loadSave():
+def loadSave(path=SAVE_LOCATION):
     """Loads the save from the save location then sets the surfaces"""
-    with open(SAVE_LOCATION, 'rb') as file:
+    with open(path, 'rb') as file:
         game = pickle.load(file)
 
     game.setSurfaces()
     return game
 
 
-def terminateGame(game=None, remove=[]):
-    """Quits the program"""
-    if game is not None:  # Save the game
-        # Remove any passed entities
-        for entity in remove:
-            entity.location.removeEntity(entity)
+def saveGame(game, remove=[], path=SAVE_LOCATION):
+    """Strips the game of its surfaces and saves it. The game can not be drawn again until setSurfaces is called"""
+    # Remove any passed entities
+    for entity in remove:
+        entity.location.removeEntity(entity)
+
+    # Strip the game of surfaces
+    game.removeSurfaces()
 
-        # Strip the game of surfaces
-        game.removeSurfaces()
+    # Create Folder if it doesn't exit
+    folder = os.path.dirname(path)
+    if folder and not os.path.exists(folder):
+        os.makedirs(folder)
 
-        # Create Folder if it doesn't exit
-        if not os.path.exists('saves'):
-            os.makedirs('saves')
+    # Pickle dump the game
+    with open(path, 'wb') as file:
+        pickle.dump(game, file)
 
-        # Pickle dump the game
-        with open(SAVE_LOCATION, 'wb') as file:
-            pickle.dump(game, file)
+
+def terminateGame(game=None, remove=[]):
+    """Quits the program"""
+    if game is not None:  # Save the game
+        saveGame(game, remove)
 
     pygame.quit()
     sys.exit()
@@ -0,0 +1,241 @@
+"""Contains the recording and replaying of the player's key presses
+
+A recording holds the seed of the random module and every batch of key presses the screens received, in order.
+Every random choice in the game goes through the random module and the game only changes when a screen handles a key
+press, so feeding the same batches back to the same revision plays the exact same game. Replays skip the frames
+where nothing was pressed and never wait for the clock, so they run as fast as the game can be drawn.
+
+Classes:
+    Input : Gives the screens their events, recording them or replaying them from a file
+    FastClock : Stands in for pygame.time.Clock during replays. Never waits
+    ReplayTimer : Records the duration of every turn and frame of a replay, and reports the floor transitions
+"""
+# Standard Library
+import atexit
+import json
+import random
+import sys
+import time
+from collections import deque
+
+# Third Party
+import pygame
+from pygame.constants import KEYDOWN
+
+# My Modules
+from source.profiling import StageHooks
+from source.prefetch import FloorPrefetcher
+
+
+class Input:
+    """Gives the screens their events, recording them or replaying them from a file
+
+    Attributes:
+        mode : string or None : CLASS; 'record', 'replay' or None when playing normally
+        path : string : CLASS; file the recording is written to or read from
+        seed : int : CLASS; seed of the random module for the recorded game
+        batches : List[List[tuple]] or deque : CLASS; key presses as (key, mod, unicode), grouped as they were received
+        timer : ReplayTimer : CLASS; times the turns and frames of a replay
+        report_path : string or None : CLASS; the replay's timings are written here as JSON when it ends
+
+    Methods:
+        startRecording(cls, path, seed=None) : CLASS; Seeds the random module and records every key press
+        startReplay(cls, path, report_path=None) : CLASS; Seeds the random module as recorded and replays the key presses
+        isReplaying(cls) : CLASS; Returns whether a recording is being replayed
+        getEvents(cls, *types) : CLASS; Returns the events for a screen to handle, like pygame.event.get
+        writeRecording(cls) : CLASS; Writes the seed and the key presses to the recording file
+        finishReplay(cls) : CLASS; Reports the timings of the replay and exits without saving
+    """
+    version = 1
+
+    mode = None
+    path = None
+    seed = None
+    batches = []
+    timer = None
+    report_path = None
+
+    @classmethod
+    def startRecording(cls, path, seed=None):
+        """Seeds the random module and records every key press. The recording is written when the program exits
+
+        Parameters:
+            path : string
+            seed : int or None : a random seed is chosen if None
+        """
+        cls.mode = 'record'
+        cls.path = path
+        cls.seed = seed if seed is not None else random.randrange(2**32)
+        cls.batches = []
+        random.seed(cls.seed)
+        atexit.register(cls.writeRecording)
+
+    @classmethod
+    def startReplay(cls, path, report_path=None):
+        """Seeds the random module as it was recorded and replays the key presses
+
+        Parameters:
+            path : string : a file written while recording
+            report_path : string or None : the timings are also written here as JSON
+        """
+        with open(path) as file:
+            recording = json.load(file)
+
+        cls.mode = 'replay'
+        cls.path = path
+        cls.seed = recording['seed']
+        cls.batches = deque(recording['batches'])
+        cls.report_path = report_path
+        cls.timer = ReplayTimer()
+        cls.timer.attach()
+        random.seed(cls.seed)
+
+    @classmethod
+    def isReplaying(cls):
+        """Returns whether a recording is being replayed
+
+        Returns: bool
+        """
+        return cls.mode == 'replay'
+
+    @classmethod
+    def getEvents(cls, *types):
+        """Returns the events for a screen to handle, like pygame.event.get
+
+        While replaying, each call returns the next recorded batch of key presses and the replay finishes when there
+        are none left. Other events are still taken from the queue so that it does not fill up
+
+        Parameters:
+            types : int : only events of these types are returned, or every event if none are given
+
+        Returns: List[pygame.event.Event]
+        """
+        events = pygame.event.get(*types)
+
+        if cls.mode == 'replay':
+            if not cls.batches:
+                cls.finishReplay()
+            return [pygame.event.Event(KEYDOWN, key=key, mod=mod, unicode=unicode)
+                    for key, mod, unicode in cls.batches.popleft()]
+
+        if cls.mode == 'record':
+            batch = [(event.key, event.mod, event.unicode) for event in events if event.type == KEYDOWN]
+            if batch:
+                cls.batches.append(batch)
+
+        return events
+
+    @classmethod
+    def writeRecording(cls):
+        """Writes the seed and the key presses to the recording file"""
+        with open(cls.path, 'w') as file:
+            json.dump({'version': cls.version, 'seed': cls.seed, 'batches': cls.batches}, file)
+
+    @classmethod
+    def finishReplay(cls):
+        """Reports the timings of the replay and exits. The game is not saved"""
+        summary = cls.timer.summarize()
+        cls.timer.printSummary(summary)
+
+        if cls.report_path is not None:
+            with open(cls.report_path, 'w') as file:
+                json.dump({'recording': cls.path, 'seed': cls.seed, 'summary': summary,
+                           'turn_ms': cls.timer.turn_times, 'frame_ms': cls.timer.frame_times,
+                           'transition_ms': list(FloorPrefetcher.transition_times)}, file, indent=1)
+
+        pygame.quit()
+        sys.exit()
+
+
+class FastClock:
+    """Stands in for pygame.time.Clock during replays. Never waits, whatever the frame rate
+
+    Methods:
+        tick(self, framerate=0) : Returns the milliseconds since the last tick
+        get_fps(self) : Returns the frame rate of the last tick
+    """
+    def __init__(self):
+        self.last_tick = time.perf_counter()
+        self.fps = 0.0
+
+    def tick(self, framerate=0):
+        """Returns the milliseconds since the last tick
+
+        Returns: int
+        """
+        now = time.perf_counter()
+        elapsed = now - self.last_tick
+        self.last_tick = now
+        self.fps = 1 / elapsed if elapsed > 0 else 0.0
+        return int(elapsed * 1000)
+
+    def get_fps(self):
+        """Returns the frame rate of the last tick
+
+        Returns: float
+        """
+        return self.fps
+
+
+class ReplayTimer:
+    """Records the duration of every turn and frame of a replay. Registered as a hook to the simulate and present stages
+
+    A turn is timed from the beginning to the end of the simulate stage. A frame is timed from the end of one present
+    stage to the end of the next. Floor transitions are timed by FloorPrefetcher and only summarized here
+
+    Attributes:
+        turn_times : List[float] : milliseconds spent resolving each turn
+        frame_times : List[float] : milliseconds between the ends of consecutive frames
+    """
+    percentiles = (50, 95, 99)
+
+    def __init__(self):
+        self.turn_times = []
+        self.frame_times = []
+        self.turn_start = None
+        self.last_frame = None
+        self.start = time.perf_counter()
+
+    def attach(self):
+        """Registers the timer to the simulate and present stages"""
+        StageHooks.register('simulate', self)
+        StageHooks.register('present', self)
+
+    def before(self, stage, turn):
+        if stage == 'simulate':
+            self.turn_start = time.perf_counter()
+
+    def after(self, stage, turn):
+        now = time.perf_counter()
+        if stage == 'simulate':
+            self.turn_times.append((now - self.turn_start) * 1000)
+        else:
+            if self.last_frame is not None:
+                self.frame_times.append((now - self.last_frame) * 1000)
+            self.last_frame = now
+
+    def summarize(self):
+        """Returns a dict of the statistics of the turns and frames"""
+        summary = {'total_s': time.perf_counter() - self.start,
+                   'turns': len(self.turn_times),
+                   'frames': len(self.frame_times),
+                   'transitions': len(FloorPrefetcher.transition_times),
+                   'transition_max_ms': max(FloorPrefetcher.transition_times, default=0.0)}
+        for name, timings in (('turn', self.turn_times), ('frame', self.frame_times)):
+            ordered = sorted(timings)
+            for percentile in self.percentiles:
+                index = min(len(ordered) - 1, len(ordered) * percentile // 100)
+                summary['%s_p%d_ms' % (name, percentile)] = ordered[index] if ordered else 0.0
+            summary['%s_max_ms' % name] = ordered[-1] if ordered else 0.0
+        return summary
+
+    def printSummary(self, summary):
+        """Prints the statistics of the turns and frames"""
+        print("Replayed %d turns and %d frames in %.2f s" % (summary['turns'], summary['frames'], summary['total_s']))
+        for name in ('turn', 'frame'):
+            spread = "  ".join("p%d %8.3f" % (percentile, summary['%s_p%d_ms' % (name, percentile)])
+                               for percentile in self.percentiles)
+            print("  %-6s %s  max %8.3f ms" % (name, spread, summary['%s_max_ms' % name]))
+        if summary['transitions']:
+            print("  %d floor transitions, the slowest took %.3f ms" % (summary['transitions'],
+                                                                       summary['transition_max_ms']))
@@ -7,6 +7,7 @@ Functions:
     gameOverScreen(window, fps_clock)
     targetScreen(window, fps_clock, game, panes)
     inventoryScreen(window, fps_clock, game, panes)
+    present(window, fps_clock, framerate=0)
 """
 
 # Standard Library
@@ -19,11 +20,14 @@ from pygame.constants import *
 # My Modules
 from source.constants import COLORS, FONTS, FPS, BACKGROUNDS
 from source.draw import drawClassSelect, getPanes, drawMapPane, drawGamePane, drawFPS, drawInventory, \
-                        drawAllPanes, drawItemInfo, drawMainMenu, drawItemList
+                        drawAllPanes, drawItemInfo, drawMainMenu, drawItemList, drawPerfOverlay
 from source.quit import checkForQuit, SAVE_LOCATION
 from source.entities import Target
 from source.floors import Floor
 from source.assets import Images, Fonts
+from source.profiling import FrameProfile, StageHooks
+from source.replay import Input
+from source.prefetch import FloorPrefetcher
 
 
 def titleScreen(window, fps_clock):
@@ -67,7 +71,7 @@ def titleScreen(window, fps_clock):
     while show_title:
 
         checkForQuit()
-        for event in pygame.event.get():
+        for event in Input.getEvents():
             if event.type == KEYDOWN and event.key == K_RETURN:
                 show_title = False
 
@@ -110,7 +114,7 @@ def mainMenuScreen(window, fps_clock):
     while not option_chosen:
         drawMainMenu(window, selected_index, choices, grey_out)
         checkForQuit()
-        for event in pygame.event.get():
+        for event in Input.getEvents():
             if event.type == KEYDOWN:
                 if event.key in (K_KP2, K_DOWN) and selected_index < (len(choices)-1):
                     selected_index += 1
@@ -205,7 +209,7 @@ def playerCreateScreen(window, fps_clock):
         window.blit(bg_image, window_rect)
 
         checkForQuit()
-        for event in pygame.event.get():
+        for event in Input.getEvents():
             if event.type == KEYDOWN:
                 # If Return, and valid name, keep name
                 if event.key == K_RETURN:
@@ -317,13 +321,16 @@ def mainGameScreen(window, fps_clock, game):
     # Initial draw to screen
     drawAllPanes(window, game, panes)
 
+    # Seconds between the last two frames. Projectiles move by it
+    frame_time = 0
+
     # game loop
     run_game = True
     while run_game:
 
         # Event Handler
         checkForQuit(game)
-        for event in pygame.event.get():
+        for event in Input.getEvents():
 
             # Determine what to do with Key Presses
             if event.type == KEYDOWN:
@@ -333,200 +340,197 @@ def mainGameScreen(window, fps_clock, game):
                 # Clears the message
                 message = None
 
-                # Movement Keys
-                if event.key == K_UP or event.key == K_KP8:
-                    player.move(0, -1)
-                elif event.key == K_DOWN or event.key == K_KP2:
-                    player.move(0, 1)
-                elif event.key == K_LEFT or event.key == K_KP4:
-                    player.move(-1, 0)
-                elif event.key == K_RIGHT or event.key == K_KP6:
-                    player.move(1, 0)
-                elif event.key == K_KP7:
-                    player.move(-1, -1)
-                elif event.key == K_KP9:
-                    player.move(1, -1)
-                elif event.key == K_KP1:
-                    player.move(-1, 1)
-                elif event.key == K_KP3:
-                    player.move(1, 1)
-
-                # Wait Key
-                elif event.key == K_KP5:
-                    pass
-
-                # Rest Key
-                elif event.key == K_KP0:
-                    while not player.getEnemiesinFOV() and player.energy < player.max_energy:
-                        for entity in player.location.entities:
-                            #  every entity with an AI takes a turn
-                            if entity.ai:
-                                entity.ai.takeTurn()
-                            # Recharge all equipped reactors
-                            if entity.inventory and entity.inventory.equipped['reactor']:
-                                entity.inventory.equipped['reactor'].recharge()
-                                entity.inventory.equipped['reactor'].hit_this_turn = False
-
-                        drawAllPanes(window, game, panes, message=message)
-                        pygame.display.update()
-                        fps_clock.tick(FPS)
-
-                # Down Portal Key
-                elif event.unicode == ">":
-                    # Check if player is on down portal
-                    if player.x == player.location.portals['down'].x and player.y == player.location.portals['down'].y:
-
-                        # If the player is on the last floor, game won
-                        if player.location.number == len(game.dungeon):
-                            # todo make Game won screen
-                            pass
-                        else:
-                            new_floor = game.dungeon[player.location.number]
-                            player.changeFloors(new_floor, "down")
-
-                    # If the player does not move, turn is not taken
-                    else:
-                        turn_taken = False
-
-                # Up Portal Key
-                elif event.unicode == "<":
-                    # Check if player is on up portal
-                    if player.x == player.location.portals['up'].x and player.y == player.location.portals['up'].y:
+                # Projectiles are only for show, so a key press skips whatever is left of their animation
+                player.location.clearProjectiles()
+
+                # Input includes the screens and the resting a key starts, so the stages they run nest inside it
+                with StageHooks.stage('input'):
+                    # Movement Keys
+                    if event.key == K_UP or event.key == K_KP8:
+                        player.move(0, -1)
+                    elif event.key == K_DOWN or event.key == K_KP2:
+                        player.move(0, 1)
+                    elif event.key == K_LEFT or event.key == K_KP4:
+                        player.move(-1, 0)
+                    elif event.key == K_RIGHT or event.key == K_KP6:
+                        player.move(1, 0)
+                    elif event.key == K_KP7:
+                        player.move(-1, -1)
+                    elif event.key == K_KP9:
+                        player.move(1, -1)
+                    elif event.key == K_KP1:
+                        player.move(-1, 1)
+                    elif event.key == K_KP3:
+                        player.move(1, 1)
+
+                    # Wait Key
+                    elif event.key == K_KP5:
+                        pass
 
-                        # If the player is on the first floor, game over
-                        if player.location.number == 1:
-                            run_game = False
+                    # Rest Key
+                    elif event.key == K_KP0:
+                        while not player.getEnemiesinFOV() and player.energy < player.max_energy:
+                            with StageHooks.stage('simulate'):
+                                game.simulateTurn()
+
+                            with StageHooks.stage('render'):
+                                drawAllPanes(window, game, panes, message=message)
+                            present(window, fps_clock, FPS)
+
+                    # Down Portal Key
+                    elif event.unicode == ">":
+                        # Check if player is on down portal
+                        down_portal = player.location.portals['down']
+                        if player.x == down_portal.x and player.y == down_portal.y:
+
+                            # If the player is on the last floor, game won
+                            if player.location.number == len(game.dungeon):
+                                # todo make Game won screen
+                                pass
+                            else:
+                                # The next floor may still be warming up, which has to stop before the player arrives
+                                FloorPrefetcher.beginTransition()
+                                new_floor = game.dungeon[player.location.number]
+                                player.changeFloors(new_floor, "down")
 
-                        # Otherwise, move the player to the previous floor
+                        # If the player does not move, turn is not taken
                         else:
-                            new_floor = game.dungeon[player.location.number-2]
-                            player.changeFloors(new_floor, "up")
-
-                    # If the player does not move, turn is not taken
-                    else:
-                        turn_taken = False
+                            turn_taken = False
 
-                # Inventory Key
-                elif event.key == K_i:
-                    turn_taken = inventoryScreen(window, fps_clock, game, panes)
+                    # Up Portal Key
+                    elif event.unicode == "<":
+                        # Check if player is on up portal
+                        if player.x == player.location.portals['up'].x and player.y == player.location.portals['up'].y:
 
-                # Fire Key
-                elif event.key == K_f:
-                    if not player.getEnergyPerShot() > player.energy:
-                        turn_taken = targetScreen(window, fps_clock, game, panes)
-                    else:
-                        game.log.addMessage("Not enough energy")
-                        turn_taken = False
+                            # If the player is on the first floor, game over
+                            if player.location.number == 1:
+                                run_game = False
 
-                # Pick Up Key
-                elif event.key == K_g:
-                    # If inventory is not full...
-                    if len(player.inventory.contents) < player.inventory.capacity:
-                        items = player.getItemsAtFeet()
-                        if items:
-                            # If there is only 1 item, choose it, otherwise have player choose from itemActionScreen
-                            if len(items) == 1:
-                                item = items[0]
+                            # Otherwise, move the player to the previous floor
                             else:
-                                item = itemActionScreen(window, game, panes['main'], items, "Pick up")
+                                new_floor = game.dungeon[player.location.number-2]
+                                player.changeFloors(new_floor, "up")
 
-                            if item is not None:
-                                item.pickUp(player.inventory)
-                                game.log.addMessage("%s picked up a %s" % (player.name, items[0].name))
+                        # If the player does not move, turn is not taken
+                        else:
+                            turn_taken = False
+
+                    # Inventory Key
+                    elif event.key == K_i:
+                        turn_taken = inventoryScreen(window, fps_clock, game, panes)
 
-                            # If player canceled item pick up
+                    # Fire Key
+                    elif event.key == K_f:
+                        if not player.getEnergyPerShot() > player.energy:
+                            turn_taken = targetScreen(window, fps_clock, game, panes)
+                        else:
+                            game.log.addMessage("Not enough energy")
+                            turn_taken = False
+
+                    # Pick Up Key
+                    elif event.key == K_g:
+                        # If inventory is not full...
+                        if len(player.inventory.contents) < player.inventory.capacity:
+                            items = player.getItemsAtFeet()
+                            if items:
+                                # If there is only 1 item, choose it, otherwise have player choose from itemActionScreen
+                                if len(items) == 1:
+                                    item = items[0]
+                                else:
+                                    item = itemActionScreen(window, game, panes['main'], items, "Pick up")
+
+                                if item is not None:
+                                    item.pickUp(player.inventory)
+                                    game.log.addMessage("%s picked up a %s" % (player.name, items[0].name))
+
+                                # If player canceled item pick up
+                                else:
+                                    turn_taken = False
+                            # If there are no items at feet
                             else:
+                                game.log.addMessage("Nothing to pick up here")
                                 turn_taken = False
-                        # If there are no items at feet
+                        # If Inventory is full
                         else:
-                            game.log.addMessage("Nothing to pick up here")
+                            game.log.addMessage("Inventory is Full")
                             turn_taken = False
-                    # If Inventory is full
-                    else:
-                        game.log.addMessage("Inventory is Full")
-                        turn_taken = False
-                # END IF G KEY IS PRESSED
+                    # END IF G KEY IS PRESSED
 
-                # Explore Key
-                elif event.key == K_x:
-                    # todo write explore screen
-                    turn_taken = False
+                    # Explore Key
+                    elif event.key == K_x:
+                        # todo write explore screen
+                        turn_taken = False
                 
-                # Look Key
-                elif event.key == K_l:
-                    if message:
-                        message = None
-                    else:
-                        message = player.lookAround()
-                    turn_taken = False
-
-                # Drop Key
-                elif event.key == K_d:
-                    item = itemActionScreen(window, game, panes['main'], player.inventory.contents, "Drop")
-                    if item is not None:
-                        item.drop()
-
-                # Equip Key
-                elif event.key == K_e:
-                    equipable_items = player.inventory.getEquipable()
-                    if equipable_items:
-                        item = itemActionScreen(window, game, panes['main'], equipable_items, "Equip")
+                    # Look Key
+                    elif event.key == K_l:
+                        if message:
+                            message = None
+                        else:
+                            message = player.lookAround()
+                        turn_taken = False
+
+                    # Drop Key
+                    elif event.key == K_d:
+                        item = itemActionScreen(window, game, panes['main'], player.inventory.contents, "Drop")
                         if item is not None:
-                            item.equip()
-                            if item.is_quick_draw:
+                            item.drop()
+
+                    # Equip Key
+                    elif event.key == K_e:
+                        equipable_items = player.inventory.getEquipable()
+                        if equipable_items:
+                            item = itemActionScreen(window, game, panes['main'], equipable_items, "Equip")
+                            if item is not None:
+                                item.equip()
+                                if item.is_quick_draw:
+                                    turn_taken = False
+                            # item equip cancelled
+                            else:
                                 turn_taken = False
-                        # item equip cancelled
+                        # No Items to Equip
                         else:
+                            game.log.addMessage("Nothing in inventory to equip")
                             turn_taken = False
-                    # No Items to Equip
-                    else:
-                        game.log.addMessage("Nothing in inventory to equip")
-                        turn_taken = False
 
-                # UN
+                    # UN
 
-                # Recharge Key
-                elif event.key == K_r:
-                    batteries = player.inventory.getItemsByType()['batteries']
+                    # Recharge Key
+                    elif event.key == K_r:
+                        batteries = player.inventory.getItemsByType()['batteries']
 
-                    if batteries:
-                        # If all batteries share one id, set first in list to item
-                        if len({item.id for item in batteries}) == 1:
-                            item = batteries[0]
-                        # Otherwise, give the player a choice
-                        else:
-                            item = itemActionScreen(window, game, panes['main'], batteries, "Recharge with")
-                        if item is not None:
-                            item.use()
+                        if batteries:
+                            # If all batteries share one id, set first in list to item
+                            if len({item.id for item in batteries}) == 1:
+                                item = batteries[0]
+                            # Otherwise, give the player a choice
+                            else:
+                                item = itemActionScreen(window, game, panes['main'], batteries, "Recharge with")
+                            if item is not None:
+                                item.use()
+                            else:
+                                turn_taken = False
                         else:
+                            game.log.addMessage("No batteries to recharge with")
                             turn_taken = False
-                    else:
-                        game.log.addMessage("No batteries to recharge with")
+
+                    # Performance Overlay Key
+                    elif event.key == K_F3:
+                        FrameProfile.toggle()
                         turn_taken = False
 
-                # All other Keys
-                else:
-                    turn_taken = False
+                    # All other Keys
+                    else:
+                        turn_taken = False
 
                 # If turn was taken...
                 if turn_taken:
-                    # iterate through all entities in the entities list
-                    for entity in player.location.entities:
-                        #  every entity with an AI takes a turn
-                        if entity.ai:
-                            entity.ai.takeTurn()
-                        # Recharge all equipped reactors
-                        if entity.inventory and entity.inventory.equipped['reactor']:
-                            entity.inventory.equipped['reactor'].recharge()
-                            entity.inventory.equipped['reactor'].hit_this_turn = False
-
-                    # See what the player can see
-                    player.calculateFOV()
-                    player.discoverTiles()
-
-                    # Write whats in the log's buffer and add an underscore
-                    game.log.write()
-                    game.log.addEOTUnderscore()
+                    # Every AI takes a turn, then see what the player can see and write the log
+                    with StageHooks.stage('simulate'):
+                        game.simulateTurn()
+                        game.endTurn()
+
+                    # Warm up the next floor in the background once the player nears the down portal
+                    FloorPrefetcher.update(game)
 
                     if player.is_dead:
                         run_game = False
@@ -535,38 +539,36 @@ def mainGameScreen(window, fps_clock, game):
 
                 # END IF TURN TAKEN
 
-                drawAllPanes(window, game, panes, message=message)
+                with StageHooks.stage('render'):
+                    drawAllPanes(window, game, panes, message=message)
 
             # END FOR KEYDOWN EVENT LOOP
         # END FOR EVENT LOOP
 
-        # If there are projectiles, draw their animation until there there are no projectiles
-        if player.location.projectiles:
-            while player.location.projectiles:
+        # If there are projectiles, move them by the time passed and redraw. Once the last one has arrived, the redraw
+        # clears it from the screen
+        animating = bool(player.location.projectiles)
+        if animating:
+            player.location.updateProjectiles(frame_time)
+            with StageHooks.stage('render'):
                 pygame.draw.rect(window, COLORS['BLACK'], panes['main'])
                 drawGamePane(window, game, panes['main'])
                 drawMapPane(window, player, player.location, panes['map'])
-                pygame.display.update()
-                fps_clock.tick(FPS)
-            # Draw one more time to clear the projectile
-            pygame.draw.rect(window, COLORS['BLACK'], panes['main'])
-            drawGamePane(window, game, panes['main'])
-            drawMapPane(window, player, player.location, panes['map'])
-        
-        # Update the screen and wait for clock to tick; repeat the while loop
-        pygame.display.update()
-        fps_clock.tick()
+
+        # Update the screen and wait for clock to tick; repeat the while loop. Animations are drawn at the frame rate
+        frame_time = present(window, fps_clock, FPS if animating else 0) / 1000
+        FloorPrefetcher.endTransition()
 
     # END WHILE RUN GAME
-    # Delete the save
-    if os.path.exists(SAVE_LOCATION):
+    # Delete the save, unless this is a replay which never saved it
+    if os.path.exists(SAVE_LOCATION) and not Input.isReplaying():
         os.remove(SAVE_LOCATION)
 
     # Stop until player hit enter key
     show_screen = True
     while show_screen:
         checkForQuit()
-        for event in pygame.event.get(KEYDOWN):
+        for event in Input.getEvents(KEYDOWN):
             if event.key == K_RETURN:
                 show_screen = False
 
@@ -593,48 +595,47 @@ def targetScreen(window, fps_clock, game, panes):
 
         # Event Handler
         checkForQuit(game, remove=[target])
-        for event in pygame.event.get():
+        for event in Input.getEvents():
 
             # Determine what to do with Key Presses
             if event.type == KEYDOWN:
-
-                # Movement Keys
-                if event.key == K_UP or event.key == K_KP8:
-                    target.move(0, -1)
-                elif event.key == K_DOWN or event.key == K_KP2:
-                    target.move(0, 1)
-                elif event.key == K_LEFT or event.key == K_KP4:
-                    target.move(-1, 0)
-                elif event.key == K_RIGHT or event.key == K_KP6:
-                    target.move(1, 0)
-                elif event.key == K_KP7:
-                    target.move(-1, -1)
-                elif event.key == K_KP9:
-                    target.move(1, -1)
-                elif event.key == K_KP1:
-                    target.move(-1, 1)
-                elif event.key == K_KP3:
-                    target.move(1, 1)
-
-                # Exit targeting
-                elif event.key == K_ESCAPE:
-                    target_mode = False
-
-                # Shoot
-                elif event.key in (K_f, K_RETURN):
-                    if target.getFirstInPath() is not None:
-                        player.attack(target.getFirstInPath(), is_ranged=True)
+                with StageHooks.stage('input'):
+                    # Movement Keys
+                    if event.key == K_UP or event.key == K_KP8:
+                        target.move(0, -1)
+                    elif event.key == K_DOWN or event.key == K_KP2:
+                        target.move(0, 1)
+                    elif event.key == K_LEFT or event.key == K_KP4:
+                        target.move(-1, 0)
+                    elif event.key == K_RIGHT or event.key == K_KP6:
+                        target.move(1, 0)
+                    elif event.key == K_KP7:
+                        target.move(-1, -1)
+                    elif event.key == K_KP9:
+                        target.move(1, -1)
+                    elif event.key == K_KP1:
+                        target.move(-1, 1)
+                    elif event.key == K_KP3:
+                        target.move(1, 1)
+
+                    # Exit targeting
+                    elif event.key == K_ESCAPE:
                         target_mode = False
-                        turn_taken = True
-                    else:
-                        game.log.addMessage("Not A Valid Target")
 
-            drawAllPanes(window, game, panes, target=target)
+                    # Shoot
+                    elif event.key in (K_f, K_RETURN):
+                        if target.getFirstInPath() is not None:
+                            player.attack(target.getFirstInPath(), is_ranged=True)
+                            target_mode = False
+                            turn_taken = True
+                        else:
+                            game.log.addMessage("Not A Valid Target")
+
+            with StageHooks.stage('render'):
+                drawAllPanes(window, game, panes, target=target)
 
-        # drawFPS(window, fps_clock)
         # Update the screen and wait for clock to tick; repeat the while loop
-        pygame.display.update()
-        fps_clock.tick()
+        present(window, fps_clock)
 
     # Clean up target after no longer used
     target.remove()
@@ -662,82 +663,83 @@ def inventoryScreen(window, fps_clock, game, panes):
 
         # Event Handler
         checkForQuit(game)
-        for event in pygame.event.get():
+        for event in Input.getEvents():
 
             # Determine what to do with Key Presses
             if event.type == KEYDOWN:
+                with StageHooks.stage('input'):
+                    if event.key in (K_ESCAPE, K_i):
+                        show_inventory = False
 
-                if event.key in (K_ESCAPE, K_i):
-                    show_inventory = False
-
-                # If a Number key was pressed
-                elif event.key in range(K_0, K_9+1):
-                    # Converts the key pressed to an index 0-9
-                    if event.key == K_0:
-                        index = 9
-                    else:
-                        index = event.key - K_1
-
-                    # If the number pressed is valid
-                    if index < len(item_order):
-                        # If the key corresponds to the item selected, deselect it
-                        if selected_item is item_order[index]:
-                            selected_item = None
+                    # If a Number key was pressed
+                    elif event.key in range(K_0, K_9+1):
+                        # Converts the key pressed to an index 0-9
+                        if event.key == K_0:
+                            index = 9
                         else:
-                            selected_item = item_order[index]
-
-                        # Redraw Screen
-                        drawAllPanes(window, game, panes)
-                        drawInventory(window, panes['main'], player.inventory, selected_item)
-
-                    # END IF INDEX LESS THAN LENGTH OF ITEM ORDER
-
-                # Item Actions:
-                if selected_item is not None:
-                    # It item is unequipped, no turn taken
-                    if event.key == K_u:
-                        if selected_item in player.inventory.equipped.values():
-                            selected_item.unequip()
-                            show_inventory = False
-                            turn_taken = False
-                            break
+                            index = event.key - K_1
 
-                    # If item is equipped, turn taken unless the item is quick draw
-                    elif event.key == K_e:
-                        if selected_item.item_class != "battery" and \
-                                selected_item not in player.inventory.equipped.values():
-                            selected_item.equip()
-                            show_inventory = False
-                            if selected_item.item_class == 'weapon' and selected_item.is_quick_draw:
-                                turn_taken = False
+                        # If the number pressed is valid
+                        if index < len(item_order):
+                            # If the key corresponds to the item selected, deselect it
+                            if selected_item is item_order[index]:
+                                selected_item = None
                             else:
+                                selected_item = item_order[index]
+
+                            # Redraw Screen
+                            with StageHooks.stage('render'):
+                                drawAllPanes(window, game, panes)
+                                drawInventory(window, panes['main'], player.inventory, selected_item)
+
+                        # END IF INDEX LESS THAN LENGTH OF ITEM ORDER
+
+                    # Item Actions:
+                    if selected_item is not None:
+                        # It item is unequipped, no turn taken
+                        if event.key == K_u:
+                            if selected_item in player.inventory.equipped.values():
+                                selected_item.unequip()
+                                show_inventory = False
+                                turn_taken = False
+                                break
+
+                        # If item is equipped, turn taken unless the item is quick draw
+                        elif event.key == K_e:
+                            if selected_item.item_class != "battery" and \
+                                    selected_item not in player.inventory.equipped.values():
+                                selected_item.equip()
+                                show_inventory = False
+                                if selected_item.item_class == 'weapon' and selected_item.is_quick_draw:
+                                    turn_taken = False
+                                else:
+                                    turn_taken = True
+                                break
+
+                        # If battery is used, turn taken
+                        elif event.key == K_r:
+                            if selected_item.item_class == "battery":
+                                selected_item.use()
+                                show_inventory = False
                                 turn_taken = True
-                            break
+                                break
 
-                    # If battery is used, turn taken
-                    elif event.key == K_r:
-                        if selected_item.item_class == "battery":
-                            selected_item.use()
+                        # If item is dropped, no turn taken
+                        elif event.key == K_d:
+                            selected_item.drop()
                             show_inventory = False
-                            turn_taken = True
+                            turn_taken = False
                             break
 
-                    # If item is dropped, no turn taken
-                    elif event.key == K_d:
-                        selected_item.drop()
-                        show_inventory = False
-                        turn_taken = False
-                        break
-
                 # If Item selected, draw its info
                 if selected_item:
-                    drawItemInfo(window, panes['main'], selected_item)
+                    with StageHooks.stage('render'):
+                        drawItemInfo(window, panes['main'], selected_item)
 
             # END IF KEYDOWN EVENT
 
         # END FOR EVENT LOOP
-        pygame.display.update()
-        fps_clock.tick()
+        present(window, fps_clock)
 
     # END WHILE SHOW INVENTORY
     return turn_taken
@@ -756,7 +758,7 @@ def itemActionScreen(window, game, main_pane,  item_list, action):
     # Runs until return in called
     while True:
         checkForQuit(game)
-        for event in pygame.event.get():
+        for event in Input.getEvents():
             if event.type == KEYDOWN:
                 # Escape to quit
                 if event.key == K_ESCAPE:
@@ -797,9 +799,28 @@ def gameOverScreen(window, fps_clock):
 
     while show_game_over:
         checkForQuit()
-        for event in pygame.event.get():
+        for event in Input.getEvents():
             if event.type == KEYDOWN and event.key == K_RETURN:
                 show_game_over = False
 
         pygame.display.flip()
         fps_clock.tick(FPS)
+
+
+def present(window, fps_clock, framerate=0):
+    """Draws the performance overlay if it is shown, updates the display and waits for the clock to tick
+
+    Parameters:
+        window : pygame.Surface
+        fps_clock : pygame.Clock
+        framerate : int : the frame rate to wait for. 0 does not wait
+
+    Returns: int : milliseconds since the previous frame
+    """
+    with StageHooks.stage('present'):
+        if FrameProfile.shown:
+            drawPerfOverlay(window)
+        pygame.display.update()
+    milliseconds = fps_clock.tick(framerate)
+    FrameProfile.frame()
+    return milliseconds
@@ -3,14 +3,21 @@
 Functions:
     readINI(config_path) : Takes the location of the config and returns a ConfigParser object containg the contents
     loadJson(json_path) : Takes the location of the json file and returns a dictionary containing the contents
+    hashFiles(paths) : Returns a hex digest of the contents of the files at the given paths
     getItemById(json_path, id, category=None) : Returns a dictionary containing the particular information from the json file
     getDistanceBetweenEntities(coordsA, coordsB) : Takes two coordinates and returns the distance between them
     terminateGame() : Quits the program
     checkForQuit() : Terminates the game if the QUIT event is present or the Escape key has been pressed
+
+Classes:
+    FontPresets : Dictionary of pygame Fonts which creates each font the first time it is looked up
 """
 
 
-import configparser, json
+import configparser, hashlib, json
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
 
 
 def readINI(config_path):
@@ -42,6 +49,24 @@ def loadJson(json_path):
         return json.load(json_file)
 
 
+def hashFiles(paths):
+    """Returns a hex digest of the contents of the files at the given paths
+
+    Used to tell if cached data built from the files is out of date
+
+    Parameters:
+        paths : iterable of strings
+
+    Returns: string
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode())
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
 def getDistanceBetweenEntities(coordsA, coordsB):
     """Gets the distance betweeen two points on a map
     
@@ -83,29 +108,63 @@ def getLineBetweenEntities(coordsA, coordsB):
     return path
 
 
-def smartSplit(string, max_length):
-    """Takes a string and returns a list of strings that are less than the given max_length"""
+# Characters that a string can be split after by smartSplit. They are all mapped to a space before searching
+split_chars = (".", ",", " ", ";")
+split_table = str.maketrans({char: " " for char in split_chars})
 
-    split_chars = (".", ",", " ", ";")
 
-    strings = [string]
+@lru_cache(maxsize=1024)
+def smartSplit(string, max_length, font=None):
+    """Takes a string and returns a tuple of strings that are less than the given max_length
 
-    for i, string in enumerate(strings):
-        if len(string) > max_length:
-            found_split = False
-            index = max_length
-            while not found_split:
-                if string[index] in split_chars:
-                    strings.remove(string)
-                    strings.insert(i, string[index+1:])
-                    strings.insert(i, string[:index+1])
-                    found_split = True
-                else:
-                    index -= 1
-                    if index < 0:
-                        break
+    Each line ends after the last split character that fits. The character just past max_length may be used, as it is
+    usually a space. If there is no split character the line is broken at max_length. Results are memoized by the
+    arguments
 
-    return strings
+    Parameters:
+        string : string
+        max_length : int : number of characters, or width in pixels if a font is given
+        font : pygame.font.Font or None : measures the width of the characters using its metrics
+
+    Returns: tuple(string)
+    """
+    if font is None:
+        if len(string) <= max_length:
+            return (string,)
+        widths = None
+    else:
+        # widths[i] is the width of the first i characters
+        widths = list(accumulate((metric[4] if metric else 0 for metric in font.metrics(string)), initial=0))
+        if widths[-1] <= max_length:
+            return (string,)
+
+    # One pass maps every split character to a space, so each line needs a single search
+    searchable = string.translate(split_table)
+
+    lines = []
+    start = 0
+    while True:
+        if widths is None:
+            if len(string) - start <= max_length:
+                break
+            # Index of the last character which can end the line, and where to break if there is no split character
+            last = start + max_length
+            hard_break = start + max_length
+        else:
+            if widths[-1] - widths[start] <= max_length:
+                break
+            # At least one character is put on each line, even if it does not fit
+            hard_break = max(bisect_right(widths, widths[start] + max_length) - 1, start + 1)
+            last = hard_break - 1
+
+        split = searchable.rfind(" ", start, last + 1)
+        end = split + 1 if split >= start else hard_break
+
+        lines.append(string[start:end])
+        start = end
+
+    lines.append(string[start:])
+    return tuple(lines)
 
 
 def formatFloat(formatter, val):
@@ -117,4 +176,34 @@ def formatFloat(formatter, val):
         return output[1:]
     if output.startswith("-0."):
         return "-" + output[2:]
-    return output
\ No newline at end of file
+    return output
+
+
+class FontPresets(dict):
+    """Dictionary of pygame Fonts which creates each font the first time it is looked up
+
+    Keeps modules which only need constants or data from paying for pygame and the font files at import time
+    """
+    def __init__(self, specs):
+        """Init method for FontPresets
+
+        Parameters:
+            specs : dict{string : tuple(string, int, bool)} : font file, size and whether the font is underlined
+        """
+        super().__init__()
+        self.specs = specs
+
+    def __missing__(self, key):
+        """Creates the font for the key, stores it and returns it"""
+        # Imported here so that importing this module does not import pygame
+        import pygame.font
+
+        if not pygame.font.get_init():
+            pygame.font.init()
+
+        file, size, underline = self.specs[key]
+        font = pygame.font.Font(file, size)
+        font.set_underline(underline)
+
+        self[key] = font
+        return font
@@ -7,5 +7,90 @@ Run this file to start the game
 import os
 os.chdir(os.path.dirname(os.path.realpath(__file__)))
 
-from source.main import main
+import argparse
+from source.profiling import StartupProfile, FrameProfile, StageHooks, stage_profilers
+
+
+def parseTurns(text):
+    """Returns the first and last turn of a range like 10-20, or of a single turn like 10"""
+    first, separator, last = text.partition('-')
+    try:
+        return int(first), int(last) if separator else int(first)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected a turn like 10 or a range of turns like 10-20")
+
+
+def parseArguments():
+    """Returns the command line arguments"""
+    parser = argparse.ArgumentParser(description="Trial of the Outer Spiral")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="report the time spent in each stage of starting the game")
+    parser.add_argument('--startup-budget', type=float, default=None, metavar='SECONDS',
+                        help="startup time to report against (default: %.1f)" % StartupProfile.default_budget)
+    parser.add_argument('--large-floors', type=int, default=None, metavar='FLOOR',
+                        help="generate the floors from this number on at the large size")
+    parser.add_argument('--large-floor-size', type=int, default=None, metavar='TILES',
+                        help="width and height of the large floors in tiles (default: 256)")
+    parser.add_argument('--log-archive', default=None, metavar='FILE',
+                        help="append log messages to this file once they are too old to be kept in memory")
+    parser.add_argument('--perf-overlay', action='store_true',
+                        help="show frame and turn timings when the game starts. F3 toggles them in game")
+    parser.add_argument('--perf-trace', default=None, metavar='FILE',
+                        help="write the timings of every frame that draws or runs a turn to this file at exit, "
+                             "as JSON if it ends in .json, otherwise as CSV")
+    parser.add_argument('--profile-stages', nargs='+', choices=StageHooks.stages, default=None, metavar='STAGE',
+                        help="profile these stages of the game loop: %s" % ", ".join(StageHooks.stages))
+    parser.add_argument('--profiler', choices=sorted(stage_profilers), default='cprofile',
+                        help="profiler attached to the stages (default: cprofile)")
+    parser.add_argument('--profile-turns', type=parseTurns, default=(None, None), metavar='FIRST[-LAST]',
+                        help="only profile the stages of these turns (default: every turn)")
+    parser.add_argument('--profile-output', default=None, metavar='FILE',
+                        help="write the profile here at exit instead of printing it. cProfile writes pstats data")
+    parser.add_argument('--record', default=None, metavar='FILE',
+                        help="record the seed and every key press to this file")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="seed for the random module while recording (default: a random seed)")
+    parser.add_argument('--replay', default=None, metavar='FILE',
+                        help="replay a recording as fast as possible without a window, then report the time per turn "
+                             "and per frame")
+    parser.add_argument('--replay-window', action='store_true',
+                        help="show the window while replaying")
+    parser.add_argument('--replay-report', default=None, metavar='FILE',
+                        help="also write the replay's timings to this file as JSON")
+    arguments = parser.parse_args()
+    if arguments.record and arguments.replay:
+        parser.error("--record and --replay can not be used together")
+    return arguments
+
+
+arguments = parseArguments()
+# Replays draw to SDL's dummy driver unless asked for the window. It is read when pygame initializes
+if arguments.replay and not arguments.replay_window:
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+if arguments.profile_startup:
+    StartupProfile.enable(arguments.startup_budget)
+
+with StartupProfile.stage("imports"):
+    from source.main import main
+    from source.game import Log
+    from source.replay import Input
+    from source.floors import Floor
+
+Log.archive_path = arguments.log_archive
+Floor.large_floor_start = arguments.large_floors
+if arguments.large_floor_size:
+    Floor.large_width = Floor.large_height = arguments.large_floor_size
+FrameProfile.shown = arguments.perf_overlay
+if arguments.perf_trace:
+    FrameProfile.startTrace(arguments.perf_trace)
+if arguments.profile_stages:
+    first_turn, last_turn = arguments.profile_turns
+    profiler = stage_profilers[arguments.profiler](first_turn, last_turn, arguments.profile_output)
+    profiler.attach(arguments.profile_stages)
+if arguments.record:
+    Input.startRecording(arguments.record, arguments.seed)
+if arguments.replay:
+    Input.startReplay(arguments.replay, arguments.replay_report)
 main()
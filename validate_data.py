@@ -1,10 +1,24 @@
-"""Validates the information contained in the JSON files in the Data Folder"""
-from source.utilities import loadJson
-from source.constants import WEAPONS, REACTORS
+"""Validates the information contained in the JSON files in the Data Folder
+
+Every file is validated and every error is reported with its path in the JSON. Files are loaded and validated
+concurrently. A file is only validated again when its contents, the contents of a file it depends on, or this script
+have changed since the last run where it passed.
+
+Usage:
+    python validate_data.py [--force] [--processes]
+"""
+import argparse
+import json
+import os.path
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from json.decoder import JSONDecodeError
-from voluptuous import Schema, Any, Maybe, In
+
+from voluptuous import Schema, All, Any, Length, Match, Maybe, In, Range
 import voluptuous.error
-import os.path
+
+from source.constants import WEAPONS, REACTORS
+from source.utilities import loadJson, hashFiles
 
 data_folder = 'data'
 
@@ -13,87 +27,294 @@ items_json = os.path.join(data_folder, 'items.json')
 leveled_lists_json = os.path.join(data_folder, 'leveled_lists.json')
 inventories_json = os.path.join(data_folder, 'inventories.json')
 
+# Files whose ids are referenced by each file. A file is validated again when any of these change
+dependencies = {items_json: (),
+                inventories_json: (items_json,),
+                characters_json: (inventories_json,),
+                leveled_lists_json: (items_json, characters_json)}
+
+# Stores the hashes of the files from the last run where each file passed
+cache_folder = 'cache'
+validation_cache = os.path.join(cache_folder, 'validation.json')
+
+# Schemas that do not depend on ids from other files are compiled once
+armor_schema = Schema({
+    'name': str,
+    'image': Maybe(str),
+    'defense': int,
+    'difficulty': int
+}, required=True)
+
+weapon_schema = Schema({
+    'name': str,
+    'image': Any(None, str),
+    'melee_verb': str,
+    'melee_damage': Any(int, float),
+    'melee_speed': int,
+    'quick_draw': bool,
+    'difficulty': int,
+    'ranged': Any(None, {
+        'verb': str,
+        'damage': Any(int, float),
+        'energy': Any(int, float),
+        'fire_rate': int,
+        'range': int,
+        'projectile': str
+    }, required=True)
+}, required=True)
+
+reactor_schema = Schema({
+    'name': str,
+    'image': Any(None, str),
+    'max_charge': int,
+    'recharge_rate': float,
+    'recovery': int,
+    'recoil_charge': Any(int, float),
+    'difficulty': int
+}, required=True)
+
+battery_schema = Schema({
+    'name': str,
+    'image': Maybe(str),
+    'power': Any(int, float),
+    'difficulty': int
+}, required=True)
+
+# Every category maps LEVEL_<int> keys onto weight tables, and LevelIndex requires LEVEL_1
+leveled_category_schema = All({Match(r'^LEVEL_\d+$', msg="key must be in the form LEVEL_<int>"): dict},
+                              Schema({'LEVEL_1': dict}, extra=True, required=True))
+
+leveled_lists_schema = Schema({
+    'ENEMIES': leveled_category_schema,
+    'ITEMS': leveled_category_schema,
+    'CONSUMABLES': leveled_category_schema
+}, required=True)
+
+# Item categories: category key, schema and test for the class part of the id
+item_categories = (('BATTERIES', battery_schema, lambda item_class: item_class == "BATTERY"),
+                   ('ARMOR', armor_schema, lambda item_class: item_class == "ARMOR"),
+                   ('WEAPONS', weapon_schema, lambda item_class: item_class in WEAPONS),
+                   ('REACTORS', reactor_schema, lambda item_class: item_class in REACTORS))
+
+
 def main():
-    """First confirm all files are present and can be loaded,
-    Then load and verify Items and put items into items list
-    Then load and verify inventory using items list and put inventories into inventory list
-    Then load and verify characters using inventory list and put characters into character list
-    Finally load and verify leveled_lists using characters and items lists"""
-    
+    """Validates the files and prints every error. Exits with a status of 1 if validation failed"""
+    parser = argparse.ArgumentParser(description="Validates the JSON files in the data folder")
+    parser.add_argument('--force', action='store_true', help="validate every file even if it has not changed")
+    parser.add_argument('--processes', action='store_true',
+                        help="validate in separate processes rather than threads")
+    arguments = parser.parse_args()
+
     print()
     print("Validating Files... \n")
-    
-    validation_succeeded = runValidation()
-    
+
+    validation_succeeded = runValidation(force=arguments.force, use_processes=arguments.processes)
+
     # Print Success if there were not failures
     if validation_succeeded:
         print("Validation Completed Successfully!")
     else:
         print("Validation Failed")
-    input()
+        sys.exit(1)
+
 
-def runValidation():
+def runValidation(force=False, use_processes=False):
     """Runs all validation
-    
+
+    Parameters:
+        force : bool : validate files even if they passed with the same contents last time
+        use_processes : bool : validate in a process pool rather than a thread pool
+
     Returns: bool
     """
-    
-    
     # Files are present
-    valid = validatePresent()
-    if not valid:
-        print("Error: Missing File(s) \n")
-        return False
-   
-    # Items JSON file
-    valid, item_names = validateItems()
-    if not valid:
-        print("Error in %s \n" % items_json)
+    missing = [path for path in dependencies if not os.path.exists(path)]
+    if missing:
+        for path in missing:
+            print("Error: Missing File %s" % path)
         return False
 
-    
-    valid, inventory_list = validateInventories(item_names)
-    if not valid:
-        print("Error in %s \n" % inventories_json)
-        return False
+    # Load the files concurrently
+    with ThreadPoolExecutor() as executor:
+        loaded = dict(zip(dependencies, executor.map(loadFile, dependencies)))
+
+    errors = {path: [] for path in dependencies}
+    data = dict()
+    for path, (contents, error) in loaded.items():
+        if error is not None:
+            errors[path].append(error)
+        else:
+            data[path] = contents
+
+    # Every file's hash combined with the hashes of the files it depends on and of this script, so that changing a
+    # schema or a check validates every file again
+    hashes = {path: hashFiles([path]) for path in dependencies}
+    validator_hash = hashFiles([os.path.realpath(__file__)])
+    keys = {path: ":".join([validator_hash] + [hashes[dependency] for dependency in (path,) + dependencies[path]])
+            for path in dependencies}
+
+    passed = dict() if force else readValidationCache()
+
+    # Ids referenced across files. They are taken from the raw data so that every file can be validated at once
+    item_names = getItemNames(data.get(items_json, {}))
+    inventory_list = list(data.get(inventories_json, {}))
+    character_names = list(data.get(characters_json, {}))
+
+    validators = {items_json: (validateItems, ()),
+                  inventories_json: (validateInventories, (item_names,)),
+                  characters_json: (validateCharacters, (inventory_list,)),
+                  leveled_lists_json: (validateLeveledList, (item_names, character_names))}
+
+    to_validate = []
+    for path in dependencies:
+        if path not in data:
+            continue
+        if any(dependency not in data for dependency in dependencies[path]):
+            errors[path].append("Not validated because a file it depends on could not be loaded")
+            continue
+        if passed.get(path) == keys[path]:
+            print("Skipping %s (unchanged)" % path)
+            continue
+        to_validate.append(path)
+
+    # Validate the changed files concurrently
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class() as executor:
+        futures = {path: executor.submit(validators[path][0], data[path], *validators[path][1])
+                   for path in to_validate}
+        for path, future in futures.items():
+            file_errors, warnings = future.result()
+            errors[path].extend(file_errors)
+            for warning in warnings:
+                print("Warning in %s: %s" % (path, warning))
+
+    # Report every error
+    for path in dependencies:
+        for error in errors[path]:
+            print("Error in %s: %s" % (path, error))
+
+    # Remember the files which passed
+    for path in to_validate:
+        if errors[path]:
+            passed.pop(path, None)
+        else:
+            passed[path] = keys[path]
+    writeValidationCache(passed)
 
-    # Characters JSON file
-    valid, character_names = validateCharacters(inventory_list)
-    if not valid:
-        print("Error(s) in %s \n" % characters_json)
-        return False
+    print()
 
-    # todo validate leveled_lists JSONs
-    valid = validateLeveledList(item_names, character_names)
-    if not valid:
-        print("Error(s) in %s \n" % leveled_lists_json)
-        return False
+    return not any(errors.values())
+
+
+def loadFile(path):
+    """Loads a JSON file
+
+    Returns: tuple(object, string) : the contents and None, or None and a description of the error
+    """
+    try:
+        return loadJson(path), None
+    except JSONDecodeError as e:
+        return None, "Could not load the file: %s" % e
+
+
+def readValidationCache():
+    """Returns a dict of the file paths to the hashes they passed validation with"""
+    try:
+        with open(validation_cache) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return dict()
+
+
+def writeValidationCache(passed):
+    """Saves the file paths and the hashes they passed validation with"""
+    try:
+        if not os.path.exists(cache_folder):
+            os.makedirs(cache_folder)
+        with open(validation_cache, 'w') as file:
+            json.dump(passed, file, indent=2)
+    except OSError:
+        pass
 
-    print()
-    
-    return True
-
-def validatePresent():
-    """Determines if the files are present"""
-    assert(os.path.exists(characters_json))
-    assert(os.path.exists(items_json))
-    assert(os.path.exists(leveled_lists_json))
-    assert(os.path.exists(inventories_json))
-    
-    return True
-    
-        
-def validateCharacters(inventory_list):
-    """Validate the characters json
 
-    Returns: bool, list
+def formatPath(path):
+    """Formats a list of keys and indices as a path into a JSON file
+
+    Returns: string
+    """
+    return "".join("[%d]" % key if isinstance(key, int) else "." + str(key) for key in path).lstrip(".")
+
+
+def checkSchema(schema, data, path):
+    """Validates the data against the schema
+
+    Parameters:
+        schema : voluptuous.Schema
+        data : object
+        path : list : location of the data in the file
+
+    Returns: List[string] : every error found, prefixed with its path
     """
     try:
-        data = loadJson(characters_json)
-    except JSONDecodeError:
-        print("Error loading %s" %characters_json)
-        return False, []
-    
+        schema(data)
+    except voluptuous.error.MultipleInvalid as e:
+        return ["%s: %s" % (formatPath(path + error.path), error.msg) for error in e.errors]
+    except voluptuous.error.Invalid as e:
+        return ["%s: %s" % (formatPath(path + e.path), e.msg)]
+    return []
+
+
+def getItemNames(data):
+    """Returns a list of the ids of every item in the items data"""
+    return [item_id for category, schema, test in item_categories for item_id in data.get(category, {})]
+
+
+def validateItems(data):
+    """Validate Items File
+
+    Returns: List[string], List[string] : errors and warnings
+    """
+    errors = []
+
+    for category, schema, is_valid_class in item_categories:
+        # Get the Category of items
+        if category not in data:
+            errors.append("%s: Missing Category" % category)
+            continue
+
+        for item_id, item in data[category].items():
+            if not is_valid_class(item_id.split("_")[0]):
+                errors.append("%s: Invalid %s name" % (formatPath([category, item_id]), category.lower()))
+            errors.extend(checkSchema(schema, item, [category, item_id]))
+
+    return errors, []
+
+
+def validateInventories(data, item_names):
+    """Validates the inventories JSON
+
+    Returns: List[string], List[string] : errors and warnings
+    """
+    inventory_schema = Schema({
+        "weapon": Maybe(In(item_names)),
+        "armor": Maybe(In(item_names)),
+        "reactor": Maybe(In(item_names)),
+        "other": Maybe([In(item_names)])
+        }, required=True)
+
+    errors = []
+    for inventory_type in data:
+        for inventory in data[inventory_type]:
+            errors.extend(checkSchema(inventory_schema, data[inventory_type][inventory], [inventory_type, inventory]))
+
+    return errors, []
+
+
+def validateCharacters(data, inventory_list):
+    """Validate the characters json
+
+    Returns: List[string], List[string] : errors and warnings
+    """
     char_schema = Schema({
         'name': str,
         'image': str,
@@ -115,244 +336,45 @@ def validateCharacters(inventory_list):
         'inventory': Maybe(In(inventory_list))
     }, required=True)
 
-    names = []
-    try:
-        for char_id in data:
-            names.append(char_id)
-            char_schema(data[char_id])
-    except voluptuous.error.Invalid as e:
-        print("Error with Character %s: %s" % (char_id, e))
-        return False, names
-
-    return True, names
-
-
-def validateItems():
-    """Validate Items File
-
-    Returns : bool"""
+    errors = []
+    for char_id in data:
+        errors.extend(checkSchema(char_schema, data[char_id], [char_id]))
 
-    valid = True
+    return errors, []
 
-    # Validate File can be loaded
-    try:
-        data = loadJson(items_json)
-    except JSONDecodeError:
-        print("Error loading %s" %items_json)
-        return False, []
 
-    # Get the Categories of items
-    try:
-        armors = data['ARMOR']
-        weapons = data['WEAPONS']
-        reactors = data['REACTORS']
-        batteries = data['BATTERIES']
-    except KeyError as e:
-        print("Missing Category %s in %s" % (e, items_json))
-        return False, []
-
-    # Schemas
-    
-    armor_schema = Schema({
-        'name': str,
-        'image': Maybe(str),
-        'defense': int,
-        'difficulty': int
-    }, required=True)
-    weapon_schema = Schema({
-        'name': str,
-        'image': Any(None, str),
-        'melee_verb': str,
-        'melee_damage': Any(int, float),
-        'melee_speed': int,
-        'quick_draw': bool,
-        'difficulty': int,
-        'ranged': Any(None, {
-            'verb': str,
-            'damage': Any(int, float),
-            'energy': Any(int, float),
-            'fire_rate': int,
-            'range': int,
-            'projectile': str
-        }, required=True)
-    }, required=True)
-    reactor_schema = Schema({
-        'name': str,
-        'image': Any(None, str),
-        'max_charge': int,
-        'recharge_rate': float,
-        'recovery': int,
-        'recoil_charge': Any(int, float),
-        'difficulty': int
-    }, required=True)
-    battery_schema = Schema({
-        'name': str,
-        'image': Maybe(str),
-        'power': Any(int, float),
-        'difficulty': int
-    }, required=True)
+def validateLeveledList(data, item_names, character_names):
+    """Validate the leveled lists json
 
-    item_names = []
-    # Validate Batteries
-    for battery in batteries:
-        item_names.append(battery)
-        try:
-            id_parts = battery.split("_")
-            assert (id_parts[0] == "BATTERY")
-            battery_schema(batteries[battery])
-        except AssertionError:
-            print("Invalid Battery name %s" % battery)
-            valid = False
-        except voluptuous.error.Invalid as e:
-            print("Error with %s: %s" % (battery, e))
-            valid = False
-
-    # Validate Armors
-    for armor in armors:
-        item_names.append(armor)
-        try:
-            id_parts = armor.split("_")
-            assert (id_parts[0] == "ARMOR")
-            armor_schema(armors[armor])
-        except AssertionError:
-            print("Invalid Armor name %s" % armor)
-            valid = False
-        except voluptuous.error.Invalid as e:
-            print("Error with %s: %s" % (armor, e))
-            valid = False
-
-    # Validate Weapons
-    for weapon in weapons:
-        item_names.append(weapon)
-        try:
-            id_parts = weapon.split("_")
-            assert (id_parts[0] in WEAPONS)
-            weapon_schema(weapons[weapon])
-        except AssertionError:
-            print("Invalid Weapon name %s" % weapon)
-            valid = False
-        except voluptuous.error.Invalid as e:
-            print("Error with %s: %s" % (weapon, e))
-            valid = False
-
-    # Validate Reactors
-    for reactor in reactors:
-        item_names.append(reactor)
-        try:
-            id_parts = reactor.split("_")
-            assert (id_parts[0] in REACTORS)
-            reactor_schema(reactors[reactor])
-        except AssertionError:
-            print("Invalid Reactor name %s" % reactor)
-            valid = False
-        except voluptuous.error.Invalid as e:
-            print("Error with %s: %s" % (reactor, e))
-            valid = False
-            
-    return valid, item_names
-
-
-def validateInventories(item_names):
-    """Validates the inventories JSON
-    
-    returns : bool, list
+    Returns: List[string], List[string] : errors and warnings
     """
-    valid = True
-    try:
-        data = loadJson(inventories_json)
-    except JSONDecodeError:
-        print("Error loading %s" % items_json)
-        return False, []
-    
-    inventory_list = []
-    
-    inventory_schema = Schema({
-        "weapon": Maybe(In(item_names)),
-        "armor": Maybe(In(item_names)),
-        "reactor": Maybe(In(item_names)),
-        "other": Maybe([In(item_names)])
-        }, required=True)
-
-    for inventory_type in data:
-        inventory_list.append(inventory_type)
-        for inventory in data[inventory_type]:
-            try:
-                inventory_schema(data[inventory_type][inventory])
-            except voluptuous.error.Invalid as e:
-                print("Error with inventory type %s, %s: %s" %(inventory_type, inventory, e))
-                valid = False
-        
-        
-    return valid, inventory_list
+    # Validate main schema
+    errors = checkSchema(leveled_lists_schema, data, [])
+    if errors:
+        return errors, []
 
+    warnings = []
 
-def validateLeveledList(item_names, character_names):
-    #todo
-    valid = True
+    # Item and consumable lists hold item ids, enemy lists hold character ids. LeveledList samples a table by its
+    # cumulative weights, so a table needs at least one entry and weights that are not negative
+    weight = All(int, Range(min=0))
+    list_schemas = {'ITEMS': Schema(All({In(item_names): weight}, Length(min=1))),
+                    'ENEMIES': Schema(All({In(character_names): weight}, Length(min=1))),
+                    'CONSUMABLES': Schema(All({In(item_names): weight}, Length(min=1)))}
 
-    # Attempt Loading File
-    try:
-        data = loadJson(leveled_lists_json)
-    except JSONDecodeError:
-        print("Error loading %s" % leveled_lists_json)
-        return False
+    for category, schema in list_schemas.items():
+        for level in data[category]:
+            level_errors = checkSchema(schema, data[category][level], [category, level])
+            if not level_errors and sum(data[category][level].values()) <= 0:
+                level_errors.append("%s: total weight must be positive" % formatPath([category, level]))
+            errors.extend(level_errors)
 
-    # Main Schema
-    main_schema = Schema({
-        'ENEMIES': dict,
-        'ITEMS': dict,
-        'CONSUMABLES': dict
-    }, required=True)
-    # Validate main schema
-    try:
-        main_schema(data)
-    except voluptuous.error.Invalid as e:
-        print("Error with structure of %s: %s" % (leveled_lists_json, e))
-        return False
+    for level in data["CONSUMABLES"]:
+        if data["CONSUMABLES"][level] and sum(data["CONSUMABLES"][level].values()) != 100:
+            warnings.append("Consumables %s list sum does not equal 100" % level)
 
-    # Item Leveled List Schema
-    items_schema = Schema({
-        In(item_names): int
-    })
-
-    # Validate Item Schema
-    for item_list in data["ITEMS"]:
-        try:
-            items_schema(data["ITEMS"][item_list])
-        except voluptuous.error.Invalid as e:
-            print("Error in Item Leveled List %s: %s" % (item_list, e))
-            valid = False
-
-    # Enemy Leveled List Schema
-    items_schema = Schema({
-        In(character_names): int
-    })
-
-    # Validate Enemy Schema
-    for enemy_list in data["ENEMIES"]:
-        try:
-            items_schema(data["ENEMIES"][enemy_list])
-        except voluptuous.error.Invalid as e:
-            print("Error in Item Leveled List %s: %s" % (enemy_list, e))
-            valid = False
-
-    # Consumable Leveled List Schema
-    consum_schema = Schema({
-        In(item_names): int
-    })
-    
-    # Validate Consumables Schema
-    for consum_list in data["CONSUMABLES"]:
-        try:
-            consum_schema(data["CONSUMABLES"][consum_list])
-        except voluptuous.error.Invalid as e:
-            print("Error in Consumable Leveled List %s: %s" % (consum_list, e))
-            valid = False
-        if sum(data["CONSUMABLES"][consum_list].values()) != 100:
-            print("Warning: Consumables %s list sum does not equal 100" % consum_list)
-    
-    return valid
+    return errors, warnings
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()